@@ -34,9 +34,13 @@ def ALU(control, op1, op2, out_, zero):
      1100           NOR
     =============  =======================
 
+    With a plain int ``out_`` (dlx's fast_arithmetic), the operators are
+    read as ints and the result wraps around to 32 bits signed instead of
+    being range checked. Not convertible.
     """
 
-    
+    if not isinstance(out_.val, intbv):
+        return ALU_int(control, op1, op2, out_, zero)
 
     @always_comb
     def logic_alu():
@@ -73,6 +77,35 @@ def ALU(control, op1, op2, out_, zero):
     return logic_alu, zero_detector
 
 
+def ALU_int(control, op1, op2, out_, zero):
+    """
+    ALU on plain ints, with 32 bits wraparound (see ALU).
+    """
+
+    @always_comb
+    def logic_alu():
+        a = int(op1)
+        b = int(op2)
+        if control == 0:
+            out_.next = a & b
+        elif control == 1:
+            out_.next = a | b
+        elif control == 2:
+            out_.next = ((a + b + 0x80000000) & 0xffffffff) - 0x80000000
+        elif control == 6:
+            out_.next = ((a - b + 0x80000000) & 0xffffffff) - 0x80000000
+        elif control == 7:
+            out_.next = int(a < b)
+        elif control == 12:
+            out_.next = ~(a | b)
+
+    @always_comb
+    def zero_detector():
+        zero.next = int(out_ == 0)
+
+    return logic_alu, zero_detector
+
+
 ### TESTBENCHS
 
 def testBench_alu():
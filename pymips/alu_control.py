@@ -15,35 +15,62 @@ from myhdl import Signal, delay, always_comb, always, Simulation, \
 
 
 def alu_control(aluop, funct_field, control_out):
-    
+    """
+    With a plain int ``control_out`` (dlx's fast_arithmetic), aluop and
+    the funct field are read as ints. Not convertible then.
+    """
+
+    if not isinstance(control_out.val, intbv):
+        @always_comb
+        def logic_int():
+            op = int(aluop)
+            funct = int(funct_field) & 7
+            if not op & 3:
+                control_out.next = 0b0010
+            elif op & 1:
+                control_out.next = 0b0110
+            elif funct == 0b0000:
+                control_out.next = 0b0010
+            elif funct == 0b0010:
+                control_out.next = 0b0110
+            elif funct == 0b0100:
+                control_out.next = 0b0000
+            elif funct == 0b0101:
+                control_out.next = 0b0001
+            elif funct == 0b1010:
+                control_out.next = 0b0111
+            else:
+                control_out.next = 0
+
+        return logic_int
 
     @always_comb
     def logic():
         if not aluop[0] and not aluop[1]:
-            control_out.next = intbv('0010')
+            control_out.next = 0b0010
 
         elif aluop[0]:
-            control_out.next = intbv('0110')
+            control_out.next = 0b0110
 
         elif aluop[1]:
            
-            if bin(funct_field[3:], 4) == '0000':
-                control_out.next = intbv('0010')
+            if funct_field[3:] == 0b0000:
+                control_out.next = 0b0010
             
-            elif bin(funct_field[3:], 4) == '0010':
-                control_out.next = intbv('0110')
+            elif funct_field[3:] == 0b0010:
+                control_out.next = 0b0110
                 
-            elif bin(funct_field[3:], 4) == '0100':
-                control_out.next = intbv('0000')
+            elif funct_field[3:] == 0b0100:
+                control_out.next = 0b0000
         
-            elif bin(funct_field[3:], 4) == '0101':
-                control_out.next = intbv('0001')
+            elif funct_field[3:] == 0b0101:
+                control_out.next = 0b0001
         
-            elif bin(funct_field[3:], 4) == '1010':
-                control_out.next = intbv('0111')
+            elif funct_field[3:] == 0b1010:
+                control_out.next = 0b0111
 
             else:
-                control_out.next = intbv(0)
+                control_out.next = 0
         #else:
         #    control_out.next = intbv(0)
 
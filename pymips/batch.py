@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Fork server batch runner
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import cPickle as pickle
+from optparse import OptionParser
+
+from processor import Processor
+from program import load_image
+
+
+_LENGTH = struct.Struct('<I')   #prefix of the messages between processes
+
+
+def cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+class BatchRunner(object):
+    """
+    Run many programs on a processor.Processor elaborated once, in this
+    process, by forked worker children. Workers inherit the built netlist
+    copy-on-write, so they neither import nor elaborate anything. They get
+    programs and send back results through pipes, one program at a time,
+    so results stream back as soon as each one finishes. A worker that
+    dies only fails the program it was running, and is replaced. One that
+    dies while idle is replaced and its next program given to another.
+    Requires ``os.fork``.
+
+    jobs -- workers (default: one per core)
+
+    The other arguments are the Processor's.
+    """
+
+    def __init__(self, rom_size=1024, memory=None, max_cycles=10000, jobs=None):
+        self.processor = Processor(rom_size, memory, max_cycles)
+        self.jobs = jobs or cpu_count()
+
+    def execute(self, name, program):
+        """
+        Run a program in this process. Return its result: a dict with the
+        ``name``, ``cycles``, ``halted`` (see halt.Halt), ``registers`` and
+        the CRC32 of the data memory (``memory``), or the ``error`` that
+        stopped it.
+
+        program -- a sequence of words or the path of a program
+        """
+        result = {'name': name, 'cycles': None, 'halted': None,
+                  'registers': None, 'memory': None, 'error': None}
+        processor = self.processor
+        try:
+            if isinstance(program, basestring):
+                program = load_image(program)
+            processor.load(program)
+            result['cycles'] = processor.run()
+            result['halted'] = processor.halted
+            result['registers'] = processor.registers.snapshot()
+            result['memory'] = processor.memory.checksum()
+        except Exception, e:
+            result['error'] = '%s: %s' % (e.__class__.__name__, e)
+        return result
+
+    def _fork(self, workers):
+        """
+        Start a worker child. Return its pid and the file descriptors to
+        send it tasks and to read its results.
+        """
+        tasks_read, tasks_write = os.pipe()
+        results_read, results_write = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(tasks_read)
+            os.close(results_write)
+            return pid, tasks_write, results_read
+
+        #child: close the pipes of the other workers, so they see EOF
+        #when the parent closes them
+        status = 1
+        try:
+            os.close(tasks_write)
+            os.close(results_read)
+            for worker in workers.values():
+                os.close(worker[1])
+                os.close(worker[2])
+            while True:
+                task = receive(tasks_read)
+                if task is None:
+                    break
+                send(results_write, self.execute(*task))
+            status = 0
+        finally:
+            os._exit(status)
+
+    def _reap(self, workers, worker):
+        """
+        Forget a dead worker. Return its exit status.
+        """
+        del workers[worker[2]]
+        os.close(worker[1])
+        os.close(worker[2])
+        return os.waitpid(worker[0], 0)[1]
+
+    def run(self, programs):
+        """
+        Run ``programs``, an iterable of paths or of ``(name, words)``,
+        and yield their results (see ``execute``) as they finish.
+        """
+        programs = iter(programs)
+        workers = {}    #results fd: [pid, tasks fd, results fd, name of the running program]
+        idle = []
+        retry = None    #(name, program) a worker died before getting
+        try:
+            while True:
+                while len(workers) < self.jobs:
+                    pid, tasks, results = self._fork(workers)
+                    workers[results] = [pid, tasks, results, None]
+                    idle.append(results)
+
+                while idle:
+                    if retry is not None:
+                        (name, program), retried, retry = retry, True, None
+                    else:
+                        try:
+                            program = next(programs)
+                        except StopIteration:
+                            break
+                        if isinstance(program, basestring):
+                            name = program
+                        else:
+                            name, program = program
+                        retried = False
+                    worker = workers[idle.pop()]
+                    try:
+                        send(worker[1], (name, program))
+                    except OSError, e:
+                        if e.errno != errno.EPIPE:
+                            raise
+                        #the worker died while idle: replace it and give
+                        #the program to the new one (once)
+                        status = self._reap(workers, worker)
+                        if retried:
+                            yield {'name': name, 'cycles': None, 'halted': None,
+                                   'registers': None, 'memory': None,
+                                   'error': 'worker died (status %i)' % status}
+                        else:
+                            retry = name, program
+                        break
+                    worker[3] = name
+
+                busy = [fd for fd in workers if workers[fd][3] is not None]
+                if not busy:
+                    if retry is not None or len(workers) < self.jobs:
+                        continue
+                    return
+
+                for fd in select.select(busy, [], [])[0]:
+                    worker = workers[fd]
+                    result = receive(fd)
+                    if result is None:  #the worker died: replace it
+                        status = self._reap(workers, worker)
+                        result = {'name': worker[3], 'cycles': None, 'halted': None,
+                                  'registers': None, 'memory': None,
+                                  'error': 'worker died (status %i)' % status}
+                    else:
+                        worker[3] = None
+                        idle.append(fd)
+                    yield result
+        finally:
+            for pid, tasks, results, name in workers.values():
+                os.close(tasks)
+                os.close(results)
+            for pid, tasks, results, name in workers.values():
+                os.waitpid(pid, 0)
+
+
+def send(fd, obj):
+    """
+    Write a pickled ``obj`` to ``fd``, prefixed with its length.
+    """
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    data = _LENGTH.pack(len(data)) + data
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def receive(fd):
+    """
+    Read an object written by ``send``. Return None on EOF.
+    """
+    header = _read(fd, _LENGTH.size)
+    if header is None:
+        return None
+    data = _read(fd, _LENGTH.unpack(header)[0])
+    if data is None:
+        return None
+    return pickle.loads(data)
+
+
+def _read(fd, size):
+    chunks = []
+    while size:
+        chunk = os.read(fd, min(size, 1 << 16))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] program...')
+    parser.add_option('-j', '--jobs', type='int', help='parallel runs (default: one per core)')
+    parser.add_option('--rom-size', type='int', default=1024, help='largest program, in words')
+    parser.add_option('--max-cycles', type='int', default=10000, help='cycle limit of every run')
+    options, programs = parser.parse_args()
+    if not programs:
+        parser.error('no programs given')
+
+    runner = BatchRunner(options.rom_size, max_cycles=options.max_cycles, jobs=options.jobs)
+    failed = 0
+    for result in runner.run(programs):
+        if result['error']:
+            failed += 1
+            print '%s: %s' % (result['name'], result['error'])
+        else:
+            print '%s: %i cycles (%s) | mem crc %08x | reg: %s' % (result['name'],
+                    result['cycles'], result['halted'], result['memory'], result['registers'])
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
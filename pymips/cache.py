@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Cache models
+"""
+
+import sys
+import random
+from collections import deque
+
+from myhdl import instance
+
+
+#replacement policies
+LRU = 'lru'         #evict the least recently used line of the set
+FIFO = 'fifo'       #evict the oldest line of the set
+RANDOM = 'random'   #evict any line of the set
+
+REPLACEMENTS = (LRU, FIFO, RANDOM)
+
+
+class Cache(object):
+    """
+    Timing model of a set associative cache: which lines are cached, and
+    the accesses that hit or missed. The data itself stays in the memory
+    behind it (the ROM for the instruction cache).
+
+    size -- words cached (addresses are word addresses, as the PC's)
+    line -- words of a line
+    ways -- lines per set (``size // line`` for a fully associative cache)
+    replacement -- one of REPLACEMENTS
+    latency -- cycles to refill a line after a miss
+    seed -- seed of the RANDOM replacement, so runs are repeatable
+
+    After a run, ``accesses``, ``hits``, ``misses`` and ``evictions``
+    count what happened; ``clear()`` starts over with an empty cache.
+    """
+
+    def __init__(self, size=256, line=4, ways=1, replacement=LRU, latency=10, seed=0):
+        if replacement not in REPLACEMENTS:
+            raise ValueError('Unknown replacement policy %r' % (replacement,))
+        for name, value in (('size', size), ('line', line), ('ways', ways)):
+            if value < 1 or value & (value - 1):
+                raise ValueError('%s must be a power of 2, not %r' % (name, value))
+        if line * ways > size:
+            raise ValueError('%i ways of %i words lines do not fit in %i words' % (ways, line, size))
+        if latency < 1:
+            raise ValueError('latency must be at least 1 cycle, not %r' % (latency,))
+        self.size = size
+        self.line = line
+        self.ways = ways
+        self.sets = size // (line * ways)
+        self.replacement = replacement
+        self.latency = latency
+        self.seed = seed
+        self.clear()
+
+    def clear(self):
+        """
+        Empty the cache and forget the counts, for a new run.
+        """
+        self.tags = [[] for i in range(self.sets)]     #lines cached in every set, the next victim first
+        self.random = random.Random(self.seed)
+        self.accesses = self.hits = self.misses = self.evictions = 0
+
+    def _find(self, address):
+        """
+        Return ``(line, tags, hit)``: the line number of ``address``, the
+        tags of its set, and whether it's cached. A hit is moved to the end
+        of ``tags`` if replacement is LRU.
+        """
+        line = address // self.line
+        tags = self.tags[line % self.sets]
+        tag = line // self.sets
+        if tag not in tags:
+            return line, tags, False
+        if self.replacement == LRU and tags[-1] != tag:
+            tags.remove(tag)
+            tags.append(tag)
+        return line, tags, True
+
+    def _allocate(self, line, tags):
+        """
+        Cache ``line`` in its set ``tags``. Return the line number evicted
+        to make room for it, or None.
+        """
+        evicted = None
+        if len(tags) == self.ways:
+            victim = 0 if self.replacement != RANDOM else self.random.randrange(self.ways)
+            evicted = tags.pop(victim) * self.sets + line % self.sets
+            self.evictions += 1
+        tags.append(line // self.sets)
+        return evicted
+
+    def read(self, address):
+        """
+        Access the word at ``address``, caching its line on a miss. Return
+        True for a hit.
+        """
+        self.accesses += 1
+        line, tags, hit = self._find(address)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._allocate(line, tags)
+        return hit
+
+    @property
+    def hit_rate(self):
+        """
+        Fraction of the accesses that hit (None without accesses).
+        """
+        if not self.accesses:
+            return None
+        return float(self.hits) / self.accesses
+
+    def summary(self):
+        """
+        Return the geometry, the counts and the hit rate as text.
+        """
+        hit_rate = '-' if self.hit_rate is None else '%.2f%%' % (100 * self.hit_rate)
+        return '%i words, %i words lines, %i ways, %s, %i cycles refill: ' \
+               '%i accesses, %i hits, %i misses, %i evictions | hit rate: %s' \
+               % (self.size, self.line, self.ways, self.replacement, self.latency,
+                  self.accesses, self.hits, self.misses, self.evictions, hit_rate)
+
+
+class DataCache(Cache):
+    """
+    Timing model of a data cache (see Cache): ``access()`` returns the
+    cycles a load or a store stalls the pipeline.
+
+    write_back -- stores only write the cache, and a dirty line is written
+                  back when it's evicted. Otherwise stores are written
+                  through to memory.
+    write_allocate -- a store that misses caches the line (refilling it
+                      first). Otherwise it's written around the cache.
+    write_buffer -- entries of the write buffer: writes to memory (written
+                    through, around or back) wait there, ``latency`` cycles
+                    each, one after the other, and only stall the pipeline
+                    when it's full. 0 makes every write stall.
+
+    Besides the counts of Cache, ``writebacks`` counts the dirty lines
+    written back and ``buffer_stalls`` the cycles waiting for the write
+    buffer.
+    """
+
+    def __init__(self, size=256, line=4, ways=1, replacement=LRU, latency=10, seed=0,
+                 write_back=True, write_allocate=True, write_buffer=4):
+        self.write_back = write_back
+        self.write_allocate = write_allocate
+        self.write_buffer = write_buffer
+        Cache.__init__(self, size, line, ways, replacement, latency, seed)
+
+    def clear(self):
+        Cache.clear(self)
+        self.dirty = set()          #line numbers
+        self.pending = deque()      #cycles the buffered writes end, in order
+        self.writebacks = self.buffer_stalls = 0
+
+    def _write_memory(self, cycle):
+        """
+        Queue a write to memory at ``cycle``. Return the cycles to wait for
+        room in the write buffer.
+        """
+        if not self.write_buffer:
+            self.buffer_stalls += self.latency
+            return self.latency
+        pending = self.pending
+        while pending and pending[0] <= cycle:
+            pending.popleft()
+        wait = 0
+        if len(pending) >= self.write_buffer:
+            wait = pending.popleft() - cycle
+            self.buffer_stalls += wait
+        pending.append(max(pending[-1] if pending else 0, cycle + wait) + self.latency)
+        return wait
+
+    def access(self, address, write, cycle):
+        """
+        Load (or store, if ``write``) the word at ``address`` on ``cycle``.
+        Return the cycles it stalls the pipeline: the refill of a missed
+        line, and the waits for the write buffer.
+        """
+        self.accesses += 1
+        line, tags, hit = self._find(address)
+        stall = 0
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if not write or self.write_allocate:
+                evicted = self._allocate(line, tags)
+                stall = self.latency
+                if evicted in self.dirty:
+                    self.dirty.discard(evicted)
+                    self.writebacks += 1
+                    stall += self._write_memory(cycle)
+                hit = True
+        if write:
+            if hit and self.write_back:
+                self.dirty.add(line)
+            else:
+                stall += self._write_memory(cycle + stall)
+        return stall
+
+    def summary(self):
+        """
+        Return the policies, the geometry, the counts and the hit rate as text.
+        """
+        return '%s, %s, %i entries write buffer, %s | %i writebacks, %i write buffer stalls' \
+               % ('write-back' if self.write_back else 'write-through',
+                  'write-allocate' if self.write_allocate else 'no-write-allocate',
+                  self.write_buffer, Cache.summary(self), self.writebacks, self.buffer_stalls)
+
+
+def instruction_cache(clk, address, stall, cache, flush=None):
+    """
+    Look up ``cache`` (a Cache) with every address fetched, and on a miss
+    assert ``stall`` for ``cache.latency`` cycles, until the refilled
+    instruction can be latched into IF/ID. ``stall`` is released after a
+    negative edge, so the program counter keeps the address. Not
+    convertible.
+
+    clk -- trigger
+    address -- the pointer defined by PC
+    stall -- output. Freezes the program counter and IF/ID
+    flush -- a taken branch discards the fetch: the refill stops stalling,
+             so the program counter can load the target
+    """
+
+    @instance
+    def logic():
+        while True:
+            if not cache.read(int(address)):
+                stall.next = 1
+                for cycle in range(cache.latency):
+                    if flush is None:
+                        yield clk.negedge
+                    else:
+                        yield clk.negedge, flush.posedge
+                        if flush:
+                            break
+                stall.next = 0
+            yield address
+
+    return logic
+
+
+def data_cache(clk, address, read, write, stall, cache):
+    """
+    Look up ``cache`` (a DataCache) with every load and store latched into
+    EX/MEM, and assert ``stall`` for the cycles it takes. Meanwhile dlx
+    holds the clock of the pipeline high, so nothing moves and the access
+    completes on the negative edge after. Not convertible.
+
+    clk -- trigger (the clock that keeps running)
+    address -- address of the load or store in EX
+    read, write -- MemRead and MemWrite of the instruction in EX
+    stall -- output. Freezes the pipeline
+    """
+
+    @instance
+    def logic():
+        cycle = remaining = 0
+        while True:
+            yield clk.posedge
+            if remaining:
+                #frozen: nothing moves on this edge
+                remaining -= 1
+                if not remaining:
+                    stall.next = 0
+            elif read or write:
+                remaining = cache.access(int(address), bool(write), cycle)
+                if remaining:
+                    stall.next = 1
+            cycle += 1
+
+    return logic
+
+
+def main():
+    from processor import Processor
+    from program import load_image, DEFAULT_PROGRAM
+    from counters import Counters
+
+    args = sys.argv[1:]
+    program = args.pop(0) if args else DEFAULT_PROGRAM
+    try:
+        size, line, ways = [int(arg) for arg in args[:3]] + [256, 4, 1][len(args[:3]):]
+        latency = int(args[4]) if len(args) > 4 else 10
+        replacement = args[3] if len(args) > 3 else LRU
+        policies = args[5:]
+        if set(policies) - set(['write-through', 'no-write-allocate']):
+            raise ValueError('Unknown write policy in %s' % ', '.join(policies))
+        icache = Cache(size, line, ways, replacement, latency)
+        dcache = DataCache(size, line, ways, replacement, latency,
+                           write_back='write-through' not in policies,
+                           write_allocate='no-write-allocate' not in policies)
+    except ValueError as e:
+        print e
+        print 'usage: cache.py [program] [size] [line] [ways] [%s] [latency] ' \
+              '[write-through] [no-write-allocate]' % '|'.join(REPLACEMENTS)
+        sys.exit(1)
+
+    rom = load_image(program)
+    counters = Counters()
+    processor = Processor(max(len(rom), 1), icache=icache, dcache=dcache, counters=counters)
+    processor.load(rom)
+    cycles = processor.run()
+    print '%s: %i cycles (%s)' % (program, cycles, processor.halted)
+    print counters.summary()
+    print 'I-cache:', icache.summary()
+    print 'D-cache:', dcache.summary()
+
+if __name__ == '__main__':
+    main()
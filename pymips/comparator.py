@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Equality comparator
+"""
+
+import random
+
+from myhdl import Signal, delay, always_comb, always, Simulation, \
+                  intbv, bin, instance, instances, now, toVHDL
+
+
+def comparator(op1, op2, equal):
+    """
+    op1: operator 1. 32bits
+    op2: operator 2. 32bits
+    equal: ``1`` when op1 == op2
+
+    Unlike an ALU subtracting, it can't overflow.
+    """
+
+    @always_comb
+    def logic():
+        if op1 == op2:
+            equal.next = 1
+        else:
+            equal.next = 0
+
+    return logic
+
+
+### TESTBENCHS
+
+def testBench_comparator():
+
+    op1_i, op2_i = [Signal(intbv(0, min=-(2**31), max=2**31-1)) for i in range(2)]
+    equal_i = Signal(intbv(0)[1:])
+
+    comparator_i = toVHDL(comparator, op1_i, op2_i, equal_i)
+
+    @instance
+    def stimulus():
+        for i in range(8):
+            op1_i.next = random.randint(-2, 2)
+            op2_i.next = random.randint(-2, 2)
+
+            yield delay(2)
+
+            print "%i %i | %i " % (op1_i, op2_i, equal_i)
+
+    return instances()
+
+
+def main():
+    sim = Simulation(testBench_comparator())
+    sim.run()
+
+if __name__ == '__main__':
+    main()
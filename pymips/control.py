@@ -32,7 +32,7 @@ def control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop,
             MemRead.next = 0
             MemWrite.next = 0
             Branch.next = 0
-            ALUop.next = intbv('00')
+            ALUop.next = 0b00
 
         else:
 
@@ -44,7 +44,7 @@ def control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop,
                 MemRead.next = 0
                 MemWrite.next = 0
                 Branch.next = 0
-                ALUop.next = intbv('10')
+                ALUop.next = 0b10
             
             elif opcode == 0x23: #lw
                 RegDst.next = 0
@@ -54,7 +54,7 @@ def control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop,
                 MemRead.next = 1
                 MemWrite.next = 0
                 Branch.next = 0
-                ALUop.next = intbv('00')   
+                ALUop.next = 0b00   
      
             elif opcode == 0x2b: #sw
                 ALUSrc.next = 1
@@ -62,7 +62,7 @@ def control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop,
                 MemRead.next = 0
                 MemWrite.next = 1
                 Branch.next = 0
-                ALUop.next = intbv('00')   
+                ALUop.next = 0b00   
 
             elif opcode == 0x04: #beq
                 ALUSrc.next = 0
@@ -70,7 +70,7 @@ def control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop,
                 MemRead.next = 0
                 MemWrite.next = 0
                 Branch.next = 1
-                ALUop.next = intbv('01')   
+                ALUop.next = 0b01   
 
     return logic
 
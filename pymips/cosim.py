@@ -0,0 +1,448 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Lockstep co-simulation checker
+"""
+
+import sys
+import traceback
+from collections import namedtuple
+from multiprocessing import Process, Queue
+from Queue import Empty
+from optparse import OptionParser
+
+from myhdl import always, Simulation, StopSimulation
+
+from isa import ISA, wrap32
+from predecode import predecode, ALU_OP, LOAD, STORE
+from program import load_image, DEFAULT_PROGRAM
+from halt import SELF_BRANCH, END, LIMIT
+
+
+#what an instruction writes
+REG, MEM = 'reg', 'mem'
+
+#a write to the register file (``index`` is the register) or to the data
+#memory (``index`` is the address), by the instruction at ``pc`` on the
+#``cycle`` of the model that retired it
+Event = namedtuple('Event', 'cycle pc kind index value')
+
+#the models that can be checked against the ISA
+MODELS = ('dlx', 'pipeline', 'datapath')
+
+#messages of a model to the checker, with an Event or why it stopped
+_EVENT, _STOPPED, _FAILED = range(3)
+
+
+class Retirement(object):
+    """
+    Report the writes of a model to the register file and the data memory
+    as they happen, in program order, as ``Event``s: ``sink(event)`` is
+    called for each one, and nothing is kept.
+
+    sink -- callable taking an Event
+    size -- words of the program. If given, the simulation is stopped
+            once the PC left the program and the pipeline drained, or a
+            ``beq r, r, -1`` was taken (dlx.dlx stops with a halt.Halt).
+
+    The cycle of an Event is the number of positive edges of the clock
+    given to ``attach`` before the write.
+    """
+
+    def __init__(self, sink, size=None):
+        self.sink = sink
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        """
+        Get ready for a new run from cycle 0.
+        """
+        self.cycle = 0
+        self.retired = 0        #events reported
+        self._pc_mem = self._pc_wb = None
+        self._drain = 0
+        self.reason = None      #why the simulation was stopped, see halt.Halt
+
+    def _stop(self, reason):
+        self.reason = reason
+        raise StopSimulation(reason)
+
+    def _retire(self, pc, kind, index, value):
+        self.retired += 1
+        self.sink(Event(self.cycle, pc, kind, int(index), int(value)))
+
+
+class DLXRetirement(Retirement):
+    """
+    Retirement of dlx.dlx: registers are written in WB and memory in MEM,
+    on the negative edges of ``ClkCore``. The PC of an instruction is
+    taken from ``PcAdderOut_ex`` when it leaves EX, and moves to WB with
+    it (nothing moves while a data cache miss holds ``ClkCore``).
+    """
+
+    def attach(self, clk, signals):
+        """
+        Return the instances watching dlx's ``signals`` (a ``{name: Signal}``
+        dict), with ``clk`` its ``Clk``.
+        """
+        ClkCore, PcAdderOut_ex = signals['ClkCore'], signals['PcAdderOut_ex']
+        RegWrite_wb, WrRegDest_wb, MuxMemO_wb = [signals[name] for name in
+                                                 ('RegWrite_wb', 'WrRegDest_wb', 'MuxMemO_wb')]
+        MemWrite_mem, AluResult_mem, Data2_mem = [signals[name] for name in
+                                                  ('MemWrite_mem', 'AluResult_mem', 'Data2_mem')]
+        self.clear()
+
+        @always(clk.posedge)
+        def counter():
+            self.cycle += 1
+
+        @always(ClkCore.posedge)
+        def shift():
+            self._pc_wb = self._pc_mem
+            self._pc_mem = int(PcAdderOut_ex._val) - 1
+
+        @always(ClkCore.negedge)
+        def retire():
+            #the instruction in WB is older than the one in MEM
+            if RegWrite_wb._val:
+                self._retire(self._pc_wb, REG, WrRegDest_wb._val, MuxMemO_wb._val)
+            if MemWrite_mem._val:
+                self._retire(self._pc_mem, MEM, AluResult_mem._val, Data2_mem._val)
+
+        return counter, shift, retire
+
+
+class PipelineRetirement(Retirement):
+    """
+    Retirement of pipeline.pipeline, tracked as in DLXRetirement on
+    ``Clk``. Without forwarding, hazard detection nor flushes, it only
+    agrees with the ISA on programs that don't need them.
+    """
+
+    def attach(self, clk, signals):
+        """
+        Return the instances watching pipeline's ``signals`` (a ``{name:
+        Signal}`` dict), with ``clk`` its ``Clk``.
+        """
+        PcAdderOut_ex, Ip = signals['PcAdderOut_ex'], signals['Ip']
+        RegWrite_wb, WrRegDest_wb, MuxMemO_wb = [signals[name] for name in
+                                                 ('RegWrite_wb', 'WrRegDest_wb', 'MuxMemO_wb')]
+        MemWrite_mem, AluResult_mem, Data2_mem = [signals[name] for name in
+                                                  ('MemWrite_mem', 'AluResult_mem', 'Data2_mem')]
+        Branch_mem, Zero_mem, BranchAdderO_mem = [signals[name] for name in
+                                                  ('Branch_mem', 'Zero_mem', 'BranchAdderO_mem')]
+        self.clear()
+
+        @always(clk.posedge)
+        def shift():
+            self.cycle += 1
+            self._pc_wb = self._pc_mem
+            self._pc_mem = int(PcAdderOut_ex._val) - 1
+
+        @always(clk.negedge)
+        def retire():
+            if RegWrite_wb._val:
+                self._retire(self._pc_wb, REG, WrRegDest_wb._val, MuxMemO_wb._val)
+            if MemWrite_mem._val:
+                self._retire(self._pc_mem, MEM, AluResult_mem._val, Data2_mem._val)
+
+            if self.size is None:
+                return
+            if Branch_mem._val and Zero_mem._val and BranchAdderO_mem._val == self._pc_mem:
+                self._stop(SELF_BRANCH)
+            if Ip._val >= self.size:
+                #IF/ID, ID/EX, EX/MEM and MEM/WB empty
+                self._drain += 1
+                if self._drain > 4:
+                    self._stop(END)
+
+        return shift, retire
+
+
+class DatapathRetirement(Retirement):
+    """
+    Retirement of the single cycle datapath.datapath. Its PC moves on the
+    negative edges of ``clk_pc``, every 4 cycles of ``clk``, and the
+    registers and memory are written on every negative edge of ``clk``
+    meanwhile: the write reported is the last one, on the edge the PC
+    moves. A cycle is an instruction.
+
+    The word 0 is a NOP for the ISA and for dlx.dlx (see predecode.NOP),
+    but the control of datapath decodes it as an R format ``add r0, r0,
+    r0``. Those writes aren't reported.
+    """
+
+    def attach(self, clk, signals):
+        """
+        Return the instance watching datapath's ``signals`` (a ``{name:
+        Signal}`` dict), with ``clk`` its ``clk``.
+        """
+        clk_pc, ip, instruction = signals['clk_pc'], signals['ip'], signals['instruction']
+        RegWrite, wr_reg_in, mux_ram_out = [signals[name] for name in
+                                            ('RegWrite', 'wr_reg_in', 'mux_ram_out')]
+        MemWrite, alu_out, data2 = [signals[name] for name in ('MemWrite', 'alu_out', 'data2')]
+        Branch, zero, address = signals['Branch'], signals['zero'], signals['address']
+        self.clear()
+
+        @always(clk_pc.negedge)
+        def retire():
+            pc = int(ip._val)
+            if self.size is not None and pc >= self.size:
+                self._stop(END)
+            self.cycle += 1
+            if instruction._val == 0:
+                return
+            if RegWrite._val:
+                self._retire(pc, REG, wr_reg_in._val, mux_ram_out._val)
+            if MemWrite._val:
+                self._retire(pc, MEM, alu_out._val, data2._val)
+            if self.size is not None and Branch._val and zero._val and address._val == -1:
+                self._stop(SELF_BRANCH)
+
+        return retire
+
+
+def reference(rom, max_steps=None):
+    """
+    Generate the Events of ``rom`` run by isa.ISA, one instruction at a
+    time. A cycle is an instruction.
+    """
+    decoded = predecode(rom)
+    isa = ISA(rom)
+    while isa.halted is None and isa.steps != max_steps:
+        pc = isa.pc
+        if not isa.run(1):
+            break
+        instruction = decoded[pc]
+        if instruction.kind in (ALU_OP, LOAD):
+            yield Event(isa.steps, pc, REG, instruction.dest, isa.registers[instruction.dest])
+        elif instruction.kind == STORE:
+            address = wrap32(isa.registers[instruction.rs] + instruction.immediate)
+            yield Event(isa.steps, pc, MEM, address, isa.memory[address])
+
+
+def _simulate(model, rom, retirement, max_cycles, options):
+    """
+    Run ``rom`` on ``model`` with ``retirement`` attached, for at most
+    ``max_cycles`` of its cycles. Return why it stopped.
+    """
+    if model == 'dlx':
+        from processor import Processor
+        processor = Processor(max(len(rom), 1), max_cycles=max_cycles, retirement=retirement,
+                              **options)
+        processor.load(rom)
+        processor.run()
+        return processor.halted
+
+    import datapath as datapath_module
+    import pipeline as pipeline_module
+    #no printing of the internals on every cycle
+    datapath_module.DEBUG = pipeline_module.DEBUG = False
+    if model == 'pipeline':
+        #a cycle of Clk is 2 time units
+        instances, duration = pipeline_module.pipeline(rom=rom, retirement=retirement), 2 * max_cycles
+    elif model == 'datapath':
+        #an instruction is a cycle of clk_pc: 8 time units
+        instances, duration = datapath_module.datapath(rom=rom, retirement=retirement), 8 * max_cycles
+    else:
+        raise ValueError('Unknown model %r, expected one of %s' % (model, ', '.join(MODELS)))
+    if Simulation(instances).run(duration, quiet=1):
+        return LIMIT
+    return retirement.reason
+
+
+def _run_model(model, rom, queue, max_cycles, options):
+    """
+    Simulate ``model`` in this process, putting its Events in ``queue``.
+    A full queue blocks the simulation until the checker catches up.
+    """
+    retirement = None
+    try:
+        retirement = {'dlx': DLXRetirement, 'pipeline': PipelineRetirement,
+                      'datapath': DatapathRetirement}[model](lambda event: queue.put((_EVENT, event)),
+                                                             len(rom))
+        reason = _simulate(model, rom, retirement, max_cycles, options)
+        queue.put((_STOPPED, (retirement.cycle, reason)))
+    except Exception, e:
+        cycle = retirement.cycle if retirement is not None else 0
+        queue.put((_FAILED, (cycle, ''.join(traceback.format_exception_only(type(e), e)).strip())))
+
+
+class Mismatch(object):
+    """
+    The first retirement where a model disagreed with the ISA.
+
+    model -- name of the model
+    index -- number of Events that agreed before
+    expected -- the Event of the ISA (None if the ISA had halted)
+    got -- the Event of the model (None if it stopped first)
+    reason -- why the model stopped, if it did: a halt.Halt reason or an
+              exception
+    cycle -- cycle of the model
+    """
+
+    def __init__(self, model, index, expected, got, reason=None, cycle=None):
+        self.model = model
+        self.index = index
+        self.expected = expected
+        self.got = got
+        self.reason = reason
+        self.cycle = got.cycle if got is not None else cycle
+
+    @property
+    def pc(self):
+        event = self.got or self.expected
+        return event.pc if event is not None else None
+
+    def __str__(self):
+        def describe(event):
+            if event is None:
+                return 'nothing'
+            target = 'r%i' % event.index if event.kind == REG else 'mem[%i]' % event.index
+            return '%s = %i (pc %i)' % (target, event.value, event.pc)
+
+        text = '%s: retirement %i, pc %s, cycle %s: expected %s, got %s' % (
+            self.model, self.index, self.pc, self.cycle, describe(self.expected),
+            describe(self.got))
+        if self.reason is not None:
+            text += ' (%s)' % self.reason
+        return text
+
+
+class Checker(object):
+    """
+    Run models of the DLX side by side with isa.ISA and compare every
+    write to the register file and the data memory, in program order, as
+    they retire: the value, the register or address and the PC. The cycle
+    of each model is only reported.
+
+    Every model is simulated in its own process and sends its Events to
+    the checker through a queue of ``window`` Events: a model that gets
+    ahead waits for the others, and the ISA is run one instruction at a
+    time when they all retired an Event. Nothing else is kept, so long
+    programs run in bounded memory.
+
+    A model is stopped on its first mismatch: its state has diverged.
+
+    models -- names in MODELS
+    max_cycles -- cycle limit of every model, and instruction limit of the
+                  ISA
+    window -- Events a model can be ahead
+    options -- keyword arguments of the processor.Processor simulating
+               dlx (``early_branch``, ``predictor``, ``icache``,
+               ``cycle_based``...)
+
+    Note that dlx, as dlx_model.DLXModel, fetches from address 0 after a
+    branch taken in MEM: only ``early_branch`` (or a predictor) branches
+    as the ISA does.
+    """
+
+    def __init__(self, models=MODELS, max_cycles=10000, window=64, **options):
+        self.models = list(models)
+        self.max_cycles = max_cycles
+        self.window = window
+        self.options = options
+        self.retired = 0
+
+    def check(self, rom):
+        """
+        Run ``rom`` on every model. Return the list of Mismatches (empty if
+        every model agreed with the ISA).
+        """
+        rom = [int(word) for word in rom]
+        running = {}
+        for model in self.models:
+            queue = Queue(self.window)
+            process = Process(target=_run_model, args=(model, rom, queue, self.max_cycles,
+                                                           self.options))
+            process.daemon = True
+            process.start()
+            running[model] = (process, queue)
+
+        mismatches = []
+        self.retired = 0
+        try:
+            for expected in reference(rom, self.max_cycles):
+                for model in list(running):
+                    got, reason, cycle = self._next(running[model])
+                    if got is None or got[1:] != expected[1:]:
+                        mismatches.append(Mismatch(model, self.retired, expected, got, reason, cycle))
+                        self._stop(running.pop(model))
+                if not running:
+                    break
+                self.retired += 1
+
+            #the ISA halted: the models can't write anything else
+            for model in list(running):
+                got, reason, cycle = self._next(running[model])
+                if got is not None:
+                    mismatches.append(Mismatch(model, self.retired, None, got))
+                self._stop(running.pop(model))
+        finally:
+            for process_queue in running.values():
+                self._stop(process_queue)
+        return mismatches
+
+    def _next(self, process_queue):
+        """
+        Return the next ``(Event, None, None)`` of a model, or ``(None,
+        reason, cycle)`` when it stopped.
+        """
+        process, queue = process_queue
+        while True:
+            try:
+                kind, data = queue.get(timeout=1)
+                break
+            except Empty:
+                if not process.is_alive():
+                    return None, 'exit code %s' % process.exitcode, None
+        if kind == _EVENT:
+            return data, None, None
+        cycle, reason = data
+        return None, reason, cycle
+
+    def _stop(self, process_queue):
+        process, queue = process_queue
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [program]',
+                          description='Check dlx, pipeline and datapath against the ISA, '
+                                      'write by write.')
+    parser.add_option('-m', '--models', default=','.join(MODELS),
+                      help='comma separated models to check (default: %default)')
+    parser.add_option('--max-cycles', type='int', default=10000,
+                      help='cycle limit of every model (default: %default)')
+    parser.add_option('-w', '--window', type='int', default=64,
+                      help='writes a model can run ahead of the others (default: %default)')
+    parser.add_option('-e', '--early-branch', action='store_true', default=False,
+                      help='resolve the branches of dlx in ID')
+    parser.add_option('-c', '--cycle-based', action='store_true', default=False,
+                      help='simulate dlx with the cycle based kernel')
+    options, args = parser.parse_args()
+
+    rom = load_image(args[0] if args else DEFAULT_PROGRAM)
+    models = [model for model in options.models.split(',') if model]
+    unknown = [model for model in models if model not in MODELS]
+    if unknown:
+        parser.error('Unknown models: %s' % ', '.join(unknown))
+
+    checker = Checker(models, options.max_cycles, options.window,
+                      early_branch=options.early_branch, cycle_based=options.cycle_based)
+    mismatches = checker.check(rom)
+    print 'writes checked: %i' % checker.retired
+    for mismatch in mismatches:
+        print mismatch
+    for model in models:
+        if model not in [mismatch.model for mismatch in mismatches]:
+            print '%s: ok' % model
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
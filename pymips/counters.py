@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Performance counters
+"""
+
+from myhdl import always
+
+
+#forwarding sources, as selected by ForwardA and ForwardB
+FROM_WB = 1     #MEM/WB
+FROM_MEM = 2    #EX/MEM
+
+#the counters, in the order of ``Counters.counts``
+NAMES = ('cycles', 'retired', 'stalls', 'flushes',
+         'forward_a_mem', 'forward_a_wb', 'forward_b_mem', 'forward_b_wb',
+         'fetch_stalls', 'mem_stalls')
+
+FROZEN = (1,) + (0,) * (len(NAMES) - 2) + (1,)     #sample of a cycle frozen by the data cache
+
+
+class Counters(object):
+    """
+    Count events of dlx.dlx on every cycle:
+
+    cycles -- clock cycles
+    retired -- instructions latched into EX/MEM (which is never flushed),
+               so neither NOPs nor bubbles nor instructions flushed by a
+               taken branch
+    stalls -- cycles with ``Stall`` asserted by the hazard detector
+    flushes -- taken branches flushing IF/ID and ID/EX (``FlushOnBranch``),
+               or only IF/ID when resolved in ID (``Redirect_id``: every
+               taken branch, or every mispredicted one with a predictor)
+    forward_a_mem, forward_a_wb, forward_b_mem, forward_b_wb -- retired
+        instructions whose ALU operands were forwarded (``ForwardA``,
+        ``ForwardB``) from EX/MEM or MEM/WB. Bubbles keep the registers of
+        the stalled instruction, so their forwards aren't counted.
+    fetch_stalls -- cycles with ``FetchStall`` asserted by the instruction
+                    cache, refilling a line
+    mem_stalls -- cycles the pipeline is frozen by the data cache
+                  (``MemStall``). Nothing else is counted on them.
+
+    Every positive edge samples the signals it latches, but the sample is
+    added only on the next edge: the edge a halt.Halt stops on isn't
+    counted, so ``cycles`` is the ``cycles`` of the Halt.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def attach(self, clk, signals):
+        """
+        Return the instance counting dlx's ``signals`` (a ``{name: Signal}``
+        dict) on the positive edges of ``clk``.
+        """
+        Stall, PCSrc_mem, Redirect_id, FetchStall, MemStall = [signals[name] for name in
+                                                               ('Stall', 'PCSrc_mem', 'Redirect_id',
+                                                                'FetchStall', 'MemStall')]
+        ForwardA, ForwardB = signals['ForwardA'], signals['ForwardB']
+        RegWrite_ex, MemWrite_ex, Branch_ex = [signals[name] for name in
+                                               ('RegWrite_ex', 'MemWrite_ex', 'Branch_ex')]
+        self.clear()
+
+        @always(clk.posedge)
+        def counter():
+            counts, sample = self.counts, self._sample
+            if sample is not None:
+                for index, value in enumerate(sample):
+                    counts[index] += value
+
+            if MemStall._val:
+                #frozen: the pipeline doesn't see this edge
+                self._sample = FROZEN
+                return
+            retired = int(bool(RegWrite_ex._val or MemWrite_ex._val or Branch_ex._val))
+            forward_a = int(ForwardA._val) if retired else 0
+            forward_b = int(ForwardB._val) if retired else 0
+            flush = int(bool(PCSrc_mem._val or Redirect_id._val))
+            self._sample = (1, retired, int(Stall._val), flush,
+                            int(forward_a == FROM_MEM), int(forward_a == FROM_WB),
+                            int(forward_b == FROM_MEM), int(forward_b == FROM_WB),
+                            int(FetchStall._val), 0)
+
+        return counter
+
+    def clear(self):
+        """
+        Set every counter to 0, to count a new run.
+        """
+        self.counts = [0] * len(NAMES)
+        self._sample = None     #the cycle that ends on the next edge
+
+    def __getattr__(self, name):
+        if name in NAMES:
+            return self.counts[NAMES.index(name)]
+        raise AttributeError(name)
+
+    @property
+    def cpi(self):
+        """
+        Cycles per retired instruction (None if nothing was retired).
+        """
+        if not self.retired:
+            return None
+        return float(self.cycles) / self.retired
+
+    def as_dict(self):
+        """
+        Return the counters and the CPI as a dict.
+        """
+        counters = dict(zip(NAMES, self.counts))
+        counters['cpi'] = self.cpi
+        return counters
+
+    def summary(self):
+        """
+        Return the counters as text.
+        """
+        cpi = '-' if self.cpi is None else '%.3f' % self.cpi
+        return '\n'.join(['cycles: %i | retired: %i | CPI: %s' % (self.cycles, self.retired, cpi),
+                          'stalls: %i | flushes: %i | fetch stalls: %i | memory stalls: %i'
+                          % (self.stalls, self.flushes, self.fetch_stalls, self.mem_stalls),
+                          'ForwardA: EX/MEM %i, MEM/WB %i | ForwardB: EX/MEM %i, MEM/WB %i'
+                          % (self.forward_a_mem, self.forward_a_wb,
+                             self.forward_b_mem, self.forward_b_wb)])
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Hazard scenario coverage
+"""
+
+from myhdl import always
+
+
+#what is in EX
+BUBBLE, ALU, LOAD, STORE, BRANCH = range(5)
+KINDS = ('bubble', 'alu', 'load', 'store', 'branch')
+
+#the fields of a scenario, and how many values each one takes
+FIELDS = (('ex', len(KINDS)),       #kind of the instruction in EX
+          ('forward_a', 3),         #ForwardA: 0, FROM_WB or FROM_MEM
+          ('forward_b', 3),         #ForwardB
+          ('stall', 2),             #Stall: a load-use (or branch) hazard holds ID
+          ('branch_id', 2),         #a branch in ID (behind the one in EX: back to back)
+          ('flush', 2),             #PCSrc_mem or Redirect_id
+          ('forward_id', 2))        #the comparator in ID forwarded (ForwardC or ForwardD, early_branch)
+
+SCENARIOS = reduce(lambda count, field: count * field[1], FIELDS, 1)
+
+
+def scenario(ex, forward_a, forward_b, stall, branch_id, flush, forward_id):
+    """
+    Return the number of a scenario, from 0 to SCENARIOS - 1.
+    """
+    index = 0
+    for (name, size), value in zip(FIELDS, (ex, forward_a, forward_b, stall, branch_id,
+                                            flush, forward_id)):
+        index = index * size + value
+    return index
+
+
+def fields(index):
+    """
+    Return the ``{field: value}`` dict of a scenario number.
+    """
+    values = {}
+    for name, size in reversed(FIELDS):
+        index, values[name] = divmod(index, size)
+    return values
+
+
+def count(bits):
+    """
+    Return the number of scenarios set in ``bits``.
+    """
+    return bin(bits).count('1')
+
+
+class Coverage(object):
+    """
+    Record which hazard scenarios a run of dlx.dlx went through, as bits
+    of a single int: every cycle sets the bit of ``scenario()`` for the
+    instruction in EX, where its operands came from (``ForwardA``,
+    ``ForwardB``), whether the hazard detector stalled ID, a branch in ID
+    behind another one, a flush, and the forwarding to the comparator of
+    ``early_branch``. Many combinations can't happen.
+
+    ``bits`` accumulates until ``clear()``. Bitsets of several runs merge
+    with ``|``. Cycles frozen by the data cache aren't sampled.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def attach(self, clk, signals):
+        """
+        Return the instance sampling dlx's ``signals`` (a ``{name: Signal}``
+        dict) on the positive edges of ``clk``.
+        """
+        RegWrite_ex, MemRead_ex, MemWrite_ex, Branch_ex = [signals[name] for name in
+                                                           ('RegWrite_ex', 'MemRead_ex',
+                                                            'MemWrite_ex', 'Branch_ex')]
+        ForwardA, ForwardB, Stall, Branch_id = [signals[name] for name in
+                                                ('ForwardA', 'ForwardB', 'Stall', 'Branch_id')]
+        PCSrc_mem, Redirect_id, MemStall = [signals[name] for name in
+                                            ('PCSrc_mem', 'Redirect_id', 'MemStall')]
+        #only with early_branch
+        ForwardC, ForwardD = signals.get('ForwardC'), signals.get('ForwardD')
+        self.clear()
+
+        @always(clk.posedge)
+        def sampler():
+            if MemStall._val:
+                return
+            if MemRead_ex._val:
+                ex = LOAD
+            elif MemWrite_ex._val:
+                ex = STORE
+            elif Branch_ex._val:
+                ex = BRANCH
+            elif RegWrite_ex._val:
+                ex = ALU
+            else:
+                ex = BUBBLE
+            forward_id = ForwardC is not None and bool(ForwardC._val or ForwardD._val)
+            self.bits |= 1 << scenario(ex, int(ForwardA._val), int(ForwardB._val),
+                                       int(bool(Stall._val)), int(bool(Branch_id._val)),
+                                       int(bool(PCSrc_mem._val or Redirect_id._val)),
+                                       int(forward_id))
+
+        return sampler
+
+    def clear(self):
+        """
+        Forget the scenarios, to record a new run.
+        """
+        self.bits = 0
+
+
+def summary(bits):
+    """
+    Return the scenarios of ``bits`` as text: how many, and how many
+    have each value of every field.
+    """
+    totals = dict((name, [0] * size) for name, size in FIELDS)
+    for index in range(SCENARIOS):
+        if bits >> index & 1:
+            for name, value in fields(index).items():
+                totals[name][value] += 1
+
+    lines = ['scenarios: %i of %i' % (count(bits), SCENARIOS)]
+    for name, size in FIELDS:
+        if name == 'ex':
+            labels = KINDS
+        elif name.startswith('forward_') and name != 'forward_id':
+            labels = ('none', 'MEM/WB', 'EX/MEM')
+        else:
+            labels = ('no', 'yes')
+        lines.append('%-10s %s' % (name + ':', ' | '.join('%s %i' % (label, total) for label, total
+                                                        in zip(labels, totals[name]))))
+    return '\n'.join(lines)
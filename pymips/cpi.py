@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+CPI stack
+"""
+
+import sys
+from array import array
+
+from myhdl import always
+
+from trace import TYPECODE
+
+
+#what a cycle was spent on
+RETIRED = 'retired'     #an instruction was retired
+STALL = 'stall'         #bubble of a load-use stall (hazard_detector)
+FETCH = 'fetch'         #bubble of an instruction cache miss (FetchStall)
+MEMORY = 'memory'       #the pipeline was frozen by the data cache (MemStall)
+FLUSH = 'flush'         #bubble of a taken (or mispredicted) branch (FlushOnBranch, Redirect_id)
+FILL = 'fill'           #the pipeline was filling after reset
+DRAIN = 'drain'         #the PC left the program: the pipeline was draining
+NOP = 'nop'             #an explicit NOP (NopSignal), or an instruction without effects
+
+CAUSES = (RETIRED, STALL, FETCH, MEMORY, FLUSH, FILL, DRAIN, NOP)
+
+_FETCHED = 'fetched'    #tag of an instruction of the program in ID or EX
+
+
+class CPIStack(object):
+    """
+    Split the cycles of a run of dlx.dlx by what they were spent on (see
+    CAUSES): every cycle, either an instruction leaves EX for MEM, and is
+    retired, or a bubble does, and the cycle is lost to whatever made
+    that bubble. Cycles frozen by a data cache access go to the load or
+    store in MEM.
+
+    The cycles are also accounted by instruction address, in one
+    ``array`` per cause: the retired instruction, the one a stall held in
+    ID, the instruction being fetched after a cache miss, the branch that
+    flushed the pipeline or the NOP. Fill and drain
+    cycles belong to no instruction, so ``region`` adds up any range of
+    the program.
+
+    size -- words of the program image: fetching beyond it drains the
+            pipeline. The arrays grow if the PC goes beyond it.
+
+    As counters.Counters, samples are added on the next positive edge, so
+    the edge a halt.Halt stops on isn't accounted.
+    """
+
+    def __init__(self, size=0):
+        self.size = size
+        self.clear()
+
+    def attach(self, clk, signals):
+        """
+        Return the instance accounting dlx's ``signals`` (a ``{name: Signal}``
+        dict) on the positive edges of ``clk``.
+        """
+        RegWrite_ex, MemWrite_ex, Branch_ex = [signals[name] for name in
+                                               ('RegWrite_ex', 'MemWrite_ex', 'Branch_ex')]
+        PcAdderOut_ex, PcAdderOut_id, Ip = [signals[name] for name in
+                                            ('PcAdderOut_ex', 'PcAdderOut_id', 'Ip')]
+        Stall, PCSrc_mem, Redirect_id, NopSignal = [signals[name] for name in
+                                                    ('Stall', 'PCSrc_mem', 'Redirect_id',
+                                                     'NopSignal')]
+        FetchStall, MemStall = signals['FetchStall'], signals['MemStall']
+        self.clear()
+
+        @always(clk.posedge)
+        def cpi_stack():
+            if self._sample is not None:
+                self._add(*self._sample)
+
+            if MemStall._val:
+                #frozen: nothing moves on this edge
+                self._sample = (MEMORY, self._retired)
+                return
+
+            #(tag, address) of what is in ID and EX
+            id_slot, ex_slot = self._id, self._ex
+            if PCSrc_mem._val:
+                #the taken branch retired last cycle flushed IF/ID and ID/EX,
+                #and keeps them flushed on this edge
+                id_slot = ex_slot = (FLUSH, self._retired)
+            elif id_slot[0] == _FETCHED and NopSignal._val:
+                id_slot = (NOP, id_slot[1])
+
+            if RegWrite_ex._val or MemWrite_ex._val or Branch_ex._val:
+                self._retired = int(PcAdderOut_ex._val) - 1
+                self._sample = (RETIRED, self._retired)
+            else:
+                self._retired = None
+                tag, pc = ex_slot
+                self._sample = (NOP if tag == _FETCHED else tag, pc)
+
+            #what the edge latches
+            if PCSrc_mem._val:
+                self._id = self._ex = id_slot
+            elif Stall._val:
+                self._ex = (STALL, int(PcAdderOut_id._val) - 1)
+                self._id = id_slot
+            elif FetchStall._val:
+                #IF/ID waits for the instruction cache
+                pc = int(Ip._val)
+                self._ex = (FETCH, pc if pc < self.size else None)
+                self._id = id_slot
+            elif Redirect_id._val:
+                #resolved (or mispredicted) in ID: only IF/ID is flushed
+                self._ex = id_slot
+                self._id = (FLUSH, int(PcAdderOut_id._val) - 1)
+            else:
+                self._ex = id_slot
+                pc = int(Ip._val)
+                self._id = (DRAIN, None) if pc >= self.size else (_FETCHED, pc)
+
+        return cpi_stack
+
+    def _add(self, cause, pc):
+        """
+        Account a cycle spent on ``cause``, by the instruction at ``pc``
+        (None for no instruction).
+        """
+        self.totals[cause] += 1
+        if pc is None:
+            return
+        column = self.by_pc[cause]
+        if pc >= len(column):
+            for other in self.by_pc.values():
+                other.extend(array(TYPECODE, [0]) * (pc + 1 - len(other)))
+        column[pc] += 1
+
+    def clear(self):
+        """
+        Forget the accounted cycles, to account a new run.
+        """
+        self.totals = dict((cause, 0) for cause in CAUSES)
+        self.by_pc = dict((cause, array(TYPECODE, [0]) * self.size) for cause in CAUSES)
+        self._sample = None             #the cycle that ends on the next edge
+        self._id = self._ex = (FILL, None)
+        self._retired = None            #address of the instruction retired last cycle
+
+    @property
+    def cycles(self):
+        return sum(self.totals.values())
+
+    def region(self, first, last):
+        """
+        Return the ``{cause: cycles}`` of the instructions from address
+        ``first`` to ``last`` (included).
+        """
+        return dict((cause, sum(self.by_pc[cause][first:last + 1])) for cause in CAUSES)
+
+    def report(self, regions=()):
+        """
+        Return the CPI stack of the run as text, followed by the ones of
+        ``regions``, a sequence of ``(name, first, last)`` address ranges.
+        Every cause is shown in cycles, in percent of the cycles and as
+        its share of the CPI.
+        """
+        lines = [self._format('run', self.totals)]
+        for name, first, last in regions:
+            lines.append(self._format('%s (%i-%i)' % (name, first, last), self.region(first, last)))
+        return '\n\n'.join(lines)
+
+    @staticmethod
+    def _format(name, counts):
+        cycles = sum(counts.values())
+        retired = counts[RETIRED]
+        cpi = '%.3f' % (float(cycles) / retired) if retired else '-'
+        lines = ['%s: %i cycles, %i retired, CPI %s' % (name, cycles, retired, cpi)]
+        for cause in CAUSES:
+            lines.append('  %-8s %8i %7.2f%% %8s' % (cause, counts[cause],
+                                                    100.0 * counts[cause] / (cycles or 1),
+                                                    '%.3f' % (float(counts[cause]) / retired)
+                                                    if retired else '-'))
+        return '\n'.join(lines)
+
+
+def main():
+    from processor import Processor
+    from program import load_image, DEFAULT_PROGRAM
+
+    args = sys.argv[1:]
+    program = args.pop(0) if args else DEFAULT_PROGRAM
+    try:
+        regions = []
+        for arg in args:
+            first, last = arg.split('-')
+            regions.append(('region', int(first), int(last)))
+    except ValueError:
+        print 'usage: cpi.py [program] [first-last...]'
+        sys.exit(1)
+
+    rom = load_image(program)
+    stack = CPIStack(len(rom))
+    processor = Processor(max(len(rom), 1), cpi_stack=stack)
+    processor.load(rom)
+    cycles = processor.run()
+    print '%s: %i cycles (%s)' % (program, cycles, processor.halted)
+    print stack.report(regions)
+
+if __name__ == '__main__':
+    main()
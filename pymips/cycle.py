@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Cycle based simulation kernel
+"""
+
+import sys
+import time
+from types import GeneratorType
+
+from myhdl import StopSimulation, delay, intbv
+from myhdl import _simulator
+from myhdl._simulator import _signals, _siglist
+from myhdl._Signal import _Signal, _PosedgeWaiterList, _NegedgeWaiterList
+from myhdl._instance import _Instantiator
+from myhdl._always import _Always
+from myhdl._always_comb import _AlwaysComb
+
+
+#what wakes a process up
+CHANGE, POSEDGE, NEGEDGE = range(3)
+
+
+class CombinationalLoop(Exception):
+    pass
+
+
+def _signals_in(obj):
+    """
+    Return the Signals of ``obj``: a Signal, a list of them, or anything else.
+    """
+    if isinstance(obj, _Signal):
+        return [obj]
+    if isinstance(obj, (list, tuple)):
+        return [s for item in obj for s in _signals_in(item)]
+    return []
+
+
+def _flatten(instances):
+    if isinstance(instances, (list, tuple)):
+        return [i for item in instances for i in _flatten(item)]
+    return [instances]
+
+
+def _triggers(clause):
+    """
+    Return the ``(Signal, CHANGE|POSEDGE|NEGEDGE)`` a sensitivity list, or
+    what a generator yields, waits for.
+    """
+    if isinstance(clause, _PosedgeWaiterList):
+        return [(clause.sig, POSEDGE)]
+    if isinstance(clause, _NegedgeWaiterList):
+        return [(clause.sig, NEGEDGE)]
+    if isinstance(clause, _Signal):
+        return [(clause, CHANGE)]
+    if isinstance(clause, (tuple, list)):   #after the edges, which are lists
+        return [trigger for item in clause for trigger in _triggers(item)]
+    raise TypeError('Cannot wait for %r in a cycle based simulation' % (clause,))
+
+
+class _Process(object):
+    """
+    An ``@always`` block on signals or edges: runs when they trigger.
+    """
+
+    def __init__(self, index, func, triggers):
+        self.index = index
+        self.func = func
+        self.triggers = triggers
+
+    def references(self):
+        return [sig for sig, kind in self.triggers]
+
+    def start(self, kernel):
+        for sig, kind in self.triggers:
+            kernel.watch(sig, kind, self)
+
+    def run(self, kernel):
+        self.func()
+
+
+class _Generator(object):
+    """
+    An ``@instance`` generator: runs until its next ``yield``, and waits
+    for what it yields.
+    """
+
+    def __init__(self, index, instance):
+        self.index = index
+        self.instance = instance
+        self.gen = None
+        self.waiting = []
+
+    def references(self):
+        """
+        Return the signals the generator function could wait for: the
+        ones in its closure (or in the frame of a bare generator).
+        """
+        if isinstance(self.instance, _Instantiator):
+            cells = self.instance.genfunc.func_closure or ()
+            return _signals_in([cell.cell_contents for cell in cells])
+        return _signals_in(self.instance.gi_frame.f_locals.values())
+
+    def start(self, kernel):
+        self.gen = self.instance.gen if isinstance(self.instance, _Instantiator) else self.instance
+        self.waiting = []
+        self.run(kernel)
+
+    def run(self, kernel):
+        for sig, kind in self.waiting:
+            kernel.unwatch(sig, kind, self)
+        try:
+            clause = self.gen.next()
+        except StopIteration:
+            self.waiting = []
+            return
+        self.waiting = _triggers(clause)
+        for sig, kind in self.waiting:
+            kernel.watch(sig, kind, self)
+
+
+class CycleSimulation(object):
+    """
+    Run MyHDL instances clock edge by clock edge instead of event by event.
+
+    The ``always_comb`` blocks are levelized once: each one is placed
+    after the blocks driving its inputs. On every clock edge, the
+    processes it triggers (latches, register file, memories, monitors)
+    run, their outputs are updated together, and then every combinational
+    block whose inputs changed runs once, in level order, its outputs
+    updated right away. Edges this produces (a gated clock, ``stop`` of a
+    halt.Halt) run their processes the same way, until nothing is left.
+    MyHDL's Simulation instead wakes a block up every time one of its
+    inputs settles, so most blocks run several times per edge.
+
+    The ``clock_driver``s (``always`` blocks on a delay) are replaced by
+    the kernel, which toggles the clocks they drove; a clock nothing
+    reads (``ClkPc`` of dlx.dlx) isn't simulated. Other delays, shadow
+    signals and combinational loops aren't supported.
+
+    instances -- what Simulation takes: instances, generators, or nested
+                 sequences of them
+
+    A CycleSimulation can be run several times: each ``run()`` starts at
+    time 0 from the generators of its instances (see processor.rearm).
+    """
+
+    def __init__(self, *instances):
+        self.clocks = []        #[Signal, half period]
+        self.processes = []
+        comb = []
+        for index, inst in enumerate(_flatten(list(instances))):
+            if isinstance(inst, _AlwaysComb):
+                comb.append(inst)
+            elif isinstance(inst, _Always) and isinstance(inst.senslist[0], delay):
+                self._add_clock(inst)
+            elif isinstance(inst, _Always):
+                self.processes.append(_Process(index, inst.func, _triggers(inst.senslist)))
+            elif isinstance(inst, (_Instantiator, GeneratorType)):
+                self.processes.append(_Generator(index, inst))
+            else:
+                raise TypeError('Cannot simulate %r' % (inst,))
+        self._levelize(comb)
+
+        #drop the clocks nothing reads
+        read = set(id(sig) for block in self.comb for sig in block.senslist)
+        for process in self.processes:
+            read.update(id(sig) for sig in process.references())
+        self.clocks = [clock for clock in self.clocks if id(clock[0]) in read]
+
+    def _add_clock(self, inst):
+        if len(inst.senslist) != 1:
+            raise TypeError('Cannot wait for a delay and signals in a cycle based simulation')
+        cells = inst.func.func_closure or ()
+        clocks = [c.cell_contents for c in cells if isinstance(c.cell_contents, _Signal)]
+        if len(clocks) != 1:
+            raise TypeError('%s is not a clock driver' % inst.func.__name__)
+        self.clocks.append((clocks[0], inst.senslist[0]._time))
+
+    def _levelize(self, blocks):
+        """
+        Sort the combinational ``blocks`` so that every block comes after
+        the ones driving its inputs.
+        """
+        drivers = {}    #id of a signal: index of the block driving it
+        for index, block in enumerate(blocks):
+            for sig in _signals_in([block.symdict[name] for name in block.outputs]):
+                drivers[id(sig)] = index
+
+        fanout = [set() for block in blocks]
+        fanin = [0] * len(blocks)
+        for index, block in enumerate(blocks):
+            for source in set(drivers.get(id(sig)) for sig in block.senslist):
+                if source is not None and index not in fanout[source]:
+                    fanout[source].add(index)
+                    fanin[index] += 1
+
+        level = [0] * len(blocks)
+        ready = [index for index in range(len(blocks)) if not fanin[index]]
+        order = []
+        while ready:
+            index = ready.pop(0)
+            order.append(index)
+            for target in sorted(fanout[index]):
+                level[target] = max(level[target], level[index] + 1)
+                fanin[target] -= 1
+                if not fanin[target]:
+                    ready.append(target)
+        if len(order) < len(blocks):
+            loop = [blocks[index].func.__name__ for index in range(len(blocks)) if fanin[index]]
+            raise CombinationalLoop('Combinational loop through %s' % ', '.join(loop))
+
+        order.sort(key=lambda index: (level[index], index))
+        self.comb = [blocks[index] for index in order]
+        self.levels = max(level) + 1 if blocks else 0
+        self._readers = {}      #id of a signal: positions of the blocks reading it
+        for position, block in enumerate(self.comb):
+            for sig in block.senslist:
+                self._readers.setdefault(id(sig), []).append(position)
+
+    def watch(self, sig, kind, process):
+        self._watchers.setdefault(id(sig), []).append((kind, process))
+
+    def unwatch(self, sig, kind, process):
+        self._watchers[id(sig)].remove((kind, process))
+
+    def _commit(self):
+        """
+        Update the signals given a ``next`` value. Return the processes
+        they trigger, and mark the combinational blocks reading them.
+        """
+        triggered = set()
+        watchers, readers, dirty = self._watchers, self._readers, self._dirty
+        for sig in _siglist:
+            val, next = sig._val, sig._next
+            if isinstance(val, intbv):
+                #what _Signal._update does, without the waiters of Simulation
+                was, now = val._val, next._val
+                if was == now:
+                    continue
+                val._val = now
+            else:
+                was, now = val, next
+                if was == now:
+                    continue
+                if isinstance(next, (int, long)):
+                    sig._val = next
+                else:
+                    sig._update()
+            for kind, process in watchers.get(id(sig), ()):
+                if kind == CHANGE or (kind == POSEDGE and now and not was) or \
+                        (kind == NEGEDGE and was and not now):
+                    triggered.add(process)
+            for position in readers.get(id(sig), ()):
+                dirty[position] = True
+        del _siglist[:]
+        return triggered
+
+    def _evaluate(self):
+        """
+        Run the combinational blocks marked, in level order, updating their
+        outputs as they go. Return the processes triggered.
+        """
+        triggered = set()
+        dirty = self._dirty
+        for position, block in enumerate(self.comb):
+            if dirty[position]:
+                dirty[position] = False
+                block.func()
+                if _siglist:
+                    triggered.update(self._commit())
+        return triggered
+
+    def _settle(self):
+        """
+        Propagate the signals given a ``next`` value, and run the processes
+        they trigger, until nothing else is triggered.
+        """
+        triggered = self._commit()
+        triggered.update(self._evaluate())
+        while triggered:
+            for process in sorted(triggered, key=lambda process: process.index):
+                process.run(self)
+            triggered = self._commit()
+            triggered.update(self._evaluate())
+
+    def _finalize(self):
+        for sig in _signals:
+            sig._clear()
+
+    def run(self, duration=None, quiet=0):
+        """
+        Run until a StopSimulation, or ``duration`` time steps. Signals get
+        their initial values back when it stops, as with Simulation.
+        """
+        _simulator._time = 0
+        del _siglist[:]
+        self._watchers = {}
+        self._dirty = [True] * len(self.comb)
+        try:
+            for process in self.processes:
+                process.start(self)
+            self._settle()
+
+            toggles = [period for clk, period in self.clocks]
+            while toggles:
+                t = _simulator._time = min(toggles)
+                if duration is not None and t > duration:
+                    return 1
+                for index, (clk, period) in enumerate(self.clocks):
+                    if toggles[index] == t:
+                        clk.next = not clk._val
+                        toggles[index] += period
+                self._settle()
+            raise StopSimulation('No more events')
+        except StopSimulation, e:
+            if not quiet:
+                print '%s: %s' % (e.__class__.__name__, e)
+            self._finalize()
+            return 0
+        except:
+            self._finalize()
+            raise
+
+
+def main():
+    from myhdl import Simulation
+    from processor import Processor
+    from program import load_image, DEFAULT_PROGRAM
+
+    rom = load_image(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROGRAM)
+    for cycle_based in (False, True):
+        processor = Processor(max(len(rom), 1), cycle_based=cycle_based)
+        processor.load(rom)
+        start = time.time()
+        cycles = processor.run()
+        print '%-14s %i cycles (%s) in %.3fs | reg: %s' % ('cycle based:' if cycle_based else 'event driven:',
+                                                          cycles, processor.halted, time.time() - start,
+                                                          processor.registers.snapshot()[:8])
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ import random
 from myhdl import Signal, delay, always_comb, always, Simulation, \
                   intbv, bin, instance, instances, now, toVHDL
 
+from memory import PagedMemory
+
 
 
 def data_memory(clk, address, write_data, read_data, memread, memwrite ):
@@ -43,6 +45,32 @@ def data_memory(clk, address, write_data, read_data, memread, memwrite ):
 
 
 
+def data_memory_model(clk, address, write_data, read_data, memread, memwrite, memory=None):
+    """
+    Same ports than data_memory, but the contents are kept in ``memory``
+    instead of a list of Signals. Not convertible.
+
+    memory -- any object indexable by address, updated in place:
+              a memory.PagedMemory (the default, with the same initial
+              contents than data_memory) for the whole 32 bits address
+              space, or a memory.DenseMemory to export the contents.
+    """
+
+    if memory is None:
+        memory = PagedMemory({7: 51})
+
+    @always(clk.negedge)
+    def logic():
+        if memwrite == 1:
+            memory[int(address)] = int(write_data.val)
+
+        elif memread == 1:
+            read_data.next = memory[int(address)]
+
+    return logic
+
+
+
 def testBench():
 
     depth = 5
@@ -6,27 +6,51 @@
 Datapath
 """
 
+import sys
+
 from myhdl import Signal, delay, always, always_comb, now, Simulation, \
                   intbv, bin, instance, instances, now, toVHDL
 
 from clock_driver import clock_driver
 from program_counter import program_counter
-from instruction_memory import instruction_memory
+from instruction_memory import instruction_memory, load_program
 from instruction_decoder import instruction_dec
 from alu import ALU
 from alu_control import alu_control
 from and_gate import and_gate
 from control import control
-from register_file import register_file
+from register_file import register_file, register_file_model, print_registers
 from sign_extender import sign_extend
 from mux import mux2, mux4
 
 from data_memory import data_memory
+from trace import Trace, signals_of
+from memory import DenseMemory
+from isa import initial_registers
 
 DEBUG = True  #set to false to convert 
+PRINT_REGISTERS = False  #print the first registers on every cycle (see register_file.print_registers)
+
+#signals traced by main when DEBUG is set
+DEBUG_SIGNALS = ['clk', 'clk_pc', 'ip', 'pc_adder_out', 'branch_adder_out', 'branchZ', 'next_ip',
+                 'instruction', 'opcode', 'rs', 'rt', 'rd', 'shamt', 'func', 'address',
+                 'wr_reg_in', 'data1', 'data2', 'mux_alu_out',
+                 'RegDst', 'ALUSrc', 'MemtoReg', 'RegWrite', 'MemRead', 'MemWrite', 'Branch', 'ALUop',
+                 'alu_control_out', 'alu_out', 'zero', 'ram_out', 'mux_ram_out']
 
 
-def datapath(clk_period=1, reset=Signal(intbv(0)[1:]), zero=Signal(intbv(0)[1:])):
+def datapath(clk_period=1, reset=Signal(intbv(0)[1:]), zero=Signal(intbv(0)[1:]), trace=None,
+             rom=None, retirement=None, registers=None):
+    """
+    trace -- a ``trace.Trace`` recording the internal signals on every
+             cycle. Not convertible.
+    rom -- program image (default: the ROM loaded with
+           ``instruction_memory.load_program``)
+    registers -- register values, a ``memory.DenseMemory`` (default: the
+                 Signals of ``register_file``). Not convertible.
+    retirement -- a ``cosim.DatapathRetirement`` reporting the writes to
+                  the register file and the data memory. Not convertible.
+    """
 
     ##############################
     #
@@ -111,14 +135,19 @@ def datapath(clk_period=1, reset=Signal(intbv(0)[1:]), zero=Signal(intbv(0)[1:])
     mux_branch = mux2(branchZ, next_ip, pc_adder_out, branch_adder_out)
 
 
-    im = instruction_memory ( ip, instruction)
+    im = instruction_memory ( ip, instruction, rom)
     
     id = instruction_dec(instruction, opcode, rs, rt, rd, shamt, func, address)
 
     control_i = control(opcode, RegDst, Branch, MemRead, MemtoReg, ALUop, MemWrite, ALUSrc, RegWrite)
 
     mux_wreg = mux2(RegDst, wr_reg_in, rt, rd)
-    register_file_i = register_file(clk, rs, rt, wr_reg_in, mux_ram_out, RegWrite, data1, data2, depth=32)
+    if registers is None:
+        register_file_i = register_file(clk, rs, rt, wr_reg_in, mux_ram_out, RegWrite, data1, data2, depth=32,
+                                        trace=print_registers if PRINT_REGISTERS else None)
+    else:
+        register_file_i = register_file_model(clk, rs, rt, wr_reg_in, mux_ram_out, RegWrite, data1, data2, registers,
+                                              trace=print_registers if PRINT_REGISTERS else None)
     
     
     sign_extend_i = sign_extend(address, address32)
@@ -133,45 +162,25 @@ def datapath(clk_period=1, reset=Signal(intbv(0)[1:]), zero=Signal(intbv(0)[1:])
     mux_mem2reg = mux2(MemtoReg, mux_ram_out, alu_out, ram_out)
     
 
-    if DEBUG:
-        @always(clk.posedge)
-        def debug_internals():
-            print "-" * 78
-            print "time %s | clk %i | clk_pc %i | ip %i " % (now(), clk, clk_pc, ip)
-
-            print 'pc_add_o %i | branch_add_o %i | BranchZ %i | next_ip %i' % (pc_adder_out, branch_adder_out, branchZ, next_ip)
-            print 'instruction', bin(instruction, 32) 
+    if trace is not None:
+        tracer_ = trace.attach(clk, signals_of(locals()))
 
-            print 'opcode %s | rs %i | rt %i | rd %i | shamt %i | func %i | address %i' % \
-                 (bin(opcode, 6), rs, rt, rd, shamt, func, address )
-
-            print 'wr_reg_in %i | dat1 %i | dat2 %i | muxALUo %i ' % \
-                  (wr_reg_in, data1, data2, mux_alu_out)
-
-            print 'RegDst %i | ALUSrc %i | Mem2Reg %i | RegW %i | MemR %i | MemW %i | Branch %i | ALUop %s' % ( RegDst, ALUSrc, MemtoReg, RegWrite, MemRead, MemWrite, Branch, bin(ALUop, 2))
-        
-            print 'func: %s | aluop: %s | alu_c_out: %s' % ( bin(func, 5), 
-                                                            bin(ALUop, 2), 
-                                                            bin(alu_control_out, 4) )
-
-            print 'ALU_out: %i | Zero: %i' % (alu_out, zero)
-
-
-            print 'ram_out %i | mux_ram_out %i ' % (ram_out, mux_ram_out)
-            
-            
+    if retirement is not None:
+        retirement_ = retirement.attach(clk, signals_of(locals()))
 
     return instances()
 
 
 
-def testBench():
+def testBench(trace=None, registers=None):
 
 
     if not DEBUG:
         datapath_i = toVHDL(datapath)
     else:
-        datapath_i = datapath()
+        if registers is None:
+            registers = DenseMemory(32, initial_registers(32))
+        datapath_i = datapath(trace=trace, registers=registers)
 
     
 
@@ -180,8 +189,14 @@ def testBench():
 
 
 def main():
-    sim = Simulation(testBench())
+    load_program(sys.argv[1] if len(sys.argv) > 1 else None)
+    trace = Trace(DEBUG_SIGNALS) if DEBUG else None
+    registers = DenseMemory(32, initial_registers(32))
+    sim = Simulation(testBench(trace, registers))
     sim.run(20)
+    if DEBUG:
+        print trace.format()
+        print 'reg:', registers.snapshot()
 
 
 if __name__ == '__main__':
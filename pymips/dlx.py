@@ -6,22 +6,25 @@
 Datapath
 """
 
+import sys
+
 from myhdl import Signal, delay, always, always_comb, now, Simulation, \
                   intbv, bin, instance, instances, now, toVHDL, traceSignals
 
 from clock_driver import clock_driver
 from program_counter import program_counter
-from instruction_memory import instruction_memory
+from instruction_memory import instruction_memory, load_program
 from instruction_decoder import instruction_dec
 from alu import ALU
 
 from alu_control import alu_control
 from and_gate import and_gate
+from or_gate import or_gate
 from control import control
-from register_file import register_file
+from register_file import register_file, register_file_model, print_registers
 from sign_extender import sign_extend
 from mux import mux2, mux4
-from data_memory import data_memory
+from data_memory import data_memory, data_memory_model
 
 from latch_if_id import latch_if_id
 from latch_id_ex import latch_id_ex
@@ -30,13 +33,43 @@ from latch_mem_wb import latch_mem_wb
 
 #hazard controls
 
-from forwarding import forwarding
-from hazard_detector import hazard_detector
+from forwarding import forwarding, branch_forwarding
+from hazard_detector import hazard_detector, branch_hazard_detector
+
+#branches resolved in ID
+from comparator import comparator
+from latch_branch import latch_branch
+
+#branch prediction
+from mispredict import mispredict
+from predictor import branch_predictor
+
+#caches
+from cache import instruction_cache, data_cache
+
+from trace import Trace, signals_of
+from halt import Halt
+from counters import Counters
+from memory import DenseMemory
+from isa import initial_registers
+
 
+MAX_CYCLES = 10000  #stop anyway if the program doesn't halt (see halt.Halt)
 
-SIM_TIME = 20   #time to simulation. 
+#signals traced by main when DEBUG is set, by pipeline stage
+DEBUG_SIGNALS = ['PcAdderOut_if', 'NextIp', 'Ip', 'Instruction_if',                            #IF
+                 'PcAdderOut_id', 'Instruction_id', 'NopSignal', 'Rs_id', 'Rt_id', 'Rd_id',     #ID
+                 'Address32_id', 'Data1_id', 'Data2_id', 'RegDst_id', 'ALUop_id', 'ALUSrc_id',
+                 'Branch_id', 'MemRead_id', 'MemWrite_id', 'RegWrite_id', 'MemtoReg_id', 'Stall',
+                 'PcAdderOut_ex', 'BranchAdderO_ex', 'Rs_ex', 'Rt_ex', 'Rd_ex', 'Address32_ex',  #EX
+                 'Data1_ex', 'Data2_ex', 'ForwardA', 'ForwardB', 'ForwMux1Out', 'ForwMux2Out',
+                 'AluControl', 'AluResult_ex', 'Zero_ex', 'WrRegDest_ex',
+                 'BranchAdderO_mem', 'Branch_mem', 'Zero_mem', 'PCSrc_mem', 'AluResult_mem',      #MEM
+                 'Data2_mem', 'DataMemOut_mem', 'MemRead_mem', 'MemWrite_mem', 'WrRegDest_mem',
+                 'DataMemOut_wb', 'AluResult_wb', 'MuxMemO_wb', 'WrRegDest_wb', 'RegWrite_wb']    #WB
 
 DEBUG = True  #set to false to convert 
+PRINT_REGISTERS = False  #print the first registers on every cycle (see register_file.print_registers)
 
 
 import random
@@ -49,7 +82,11 @@ MAX_16 = 2**15 - 1
 
 
 
-def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
+def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:]), rom=None,
+        memory=None, registers=None, trace=None, halt=None, counters=None,
+        profiler=None, cpi_stack=None, early_branch=False, predictor=None,
+        icache=None, dcache=None, fast_arithmetic=False, retirement=None,
+        coverage=None, predecoded=False):
 
     """
     A DLX processor with 5 pipeline stages. 
@@ -81,41 +118,132 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
       For example: ``PcAdderO_if``  before IF/ID latch is the same signal than 
       ``PcAdderO_id`` after it. 
 
+    rom -- program image (default: the ROM loaded with
+           ``instruction_memory.load_program``)
+    memory -- data memory contents, a ``memory.PagedMemory`` or
+              ``memory.DenseMemory`` (default: the 1024 words of
+              ``data_memory``)
+    registers -- register values, a ``memory.DenseMemory`` that can be
+                 inspected while simulating (default: the Signals of
+                 ``register_file``)
+    trace -- a ``trace.Trace`` recording the internal signals on every
+             cycle (by name, e.g. ``Ip`` or ``AluResult_ex``)
+    halt -- a ``halt.Halt`` that stops the simulation when the program
+            finishes
+    counters -- a ``counters.Counters`` counting cycles, retired
+                instructions, stalls, flushes and forwards
+    profiler -- a ``profiler.Profiler`` accounting cycles, stalls and
+                flushes by instruction address
+    cpi_stack -- a ``cpi.CPIStack`` splitting the cycles by what they were
+                 spent on
+    early_branch -- resolve ``beq`` in ID instead of MEM: a comparator with
+                    its own forwarding from EX/MEM and MEM/WB and an adder
+                    for the target, so a taken branch flushes only IF/ID
+                    (one bubble instead of three) and fetches from its
+                    target. The hazard detector also stalls a branch whose
+                    registers are still computed in EX or loaded in MEM.
+    predictor -- a ``predictor.Predictor`` looked up when an instruction is
+                 fetched: a branch predicted taken fetches from the target
+                 of the branch target buffer on the next cycle. Branches are
+                 resolved in ID (it implies ``early_branch``) and a wrong
+                 prediction flushes IF/ID and fetches the right address.
+    icache -- a ``cache.Cache`` looked up with every address fetched. A
+              miss freezes the program counter and IF/ID, as a stall
+              does, until the line is refilled.
+    dcache -- a ``cache.DataCache`` looked up with every load and store
+              entering MEM. A miss (or a full write buffer) freezes the
+              whole pipeline: its clock is held high until the access
+              completes.
+    fast_arithmetic -- the signals are plain ints instead of intbv, without
+                       range checks or widths: the ALU wraps around to 32
+                       bits (see alu.ALU), and the models of the register
+                       file and the data memory are used. Only for simulation.
+    retirement -- a ``cosim.DLXRetirement`` reporting the writes to the
+                  register file and the data memory as they happen
+    coverage -- a ``coverage.Coverage`` recording the hazard scenarios
+    predecoded -- decode with the ``predecode.Decoded`` records of the
+                  instructions instead of slicing them (see
+                  instruction_decoder.instruction_dec). Not convertible.
+
     """
 
+    if predictor is not None:
+        early_branch = True
+
+    def bits(width, value=0):
+        """
+        A signal of ``width`` bits: an intbv, or a plain int with
+        fast_arithmetic.
+        """
+        if fast_arithmetic:
+            return Signal(value)
+        return Signal(intbv(value)[width:])
+
+    def word():
+        """
+        A 32 bits signed signal of the datapath.
+        """
+        if fast_arithmetic:
+            return Signal(0)
+        return Signal(intbv(0, min=MIN, max=MAX))
+
     ##############################
     # clock settings
     ##############################
 
-    Clk = Signal(intbv(0)[1:])     #internal clock
-    ClkPc = Signal(intbv(0)[1:])   #frec should be almost 1/4 clk internal
+    Clk = bits(1)     #internal clock
+    ClkPc = bits(1)   #frec should be almost 1/4 clk internal
 
     clk_driver = clock_driver(Clk, clk_period)
     clk_driver_pc = clock_driver(ClkPc, clk_period * 4)
 
+    MemStall = bits(1)     #a data cache access is being completed (dcache only)
+    if dcache is None:
+        ClkCore = Clk
+    else:
+        ClkCore = bits(1)  #clock of the pipeline: Clk, held high while MemStall
+        clk_gate_ = or_gate(Clk, MemStall, ClkCore)
+
     ####################
     #feedback Signals 
     ######################
     
     # signals from and advanced stage which feeds a previous component
 
-    BranchAdderO_mem = Signal(intbv(0, min=MIN, max=MAX)[32:])
-    PCSrc_mem   = Signal(intbv(0)[1:]) #control of mux for program_counter on IF stage - (branch or inmediante_next)    
+    BranchAdderO_mem = bits(32)
+    PCSrc_mem   = bits(1) #control of mux for program_counter on IF stage - (branch or inmediante_next)    
 
     FlushOnBranch = PCSrc_mem           # 1 when beq condition is asserted => flush IF / ID / EX to discard 
                                         # instructions chargued wrongly
 
-    WrRegDest_wb = Signal(intbv(0)[32:])        #register pointer where MuxMemO_wb data will be stored.
-    MuxMemO_wb = Signal(intbv(0, min=MIN, max=MAX))    #data output from WB mux connected as Write Data input on Register File (ID stage)
+    WrRegDest_wb = bits(32)        #register pointer where MuxMemO_wb data will be stored.
+    MuxMemO_wb = word()    #data output from WB mux connected as Write Data input on Register File (ID stage)
 
-    RegWrite_wb = Signal(intbv(0)[1:])
+    RegWrite_wb = bits(1)
 
-    ForwardA, ForwardB = [ Signal(intbv(0)[2:]) for i in range(2) ]     #Signals Generated in Forwarding units to control ALU's input muxers 
+    ForwardA, ForwardB = [ bits(2) for i in range(2) ]     #Signals Generated in Forwarding units to control ALU's input muxers 
             
-    AluResult_mem = Signal(intbv(0, min=MIN, max=MAX))
+    AluResult_mem = word()
 
-    Stall = Signal(intbv(0)[1:])  #when asserted the pipeline is stalled. It 'freezes' PC count 
+    Stall = bits(1)  #when asserted the pipeline is stalled. It 'freezes' PC count 
                                   #and put all Control Signals to 0's
+
+    FetchStall = bits(1)   #an instruction cache miss is being refilled (icache only)
+    if icache is None:
+        Freeze = Stall
+    else:
+        Freeze = bits(1)   #Stall or FetchStall: freezes PC and IF/ID, and the control signals
+
+    BranchTaken_id = bits(1)   #a branch taken in ID (early_branch only)
+    Redirect_id = bits(1)      #the instruction fetched after the branch in ID is wrong: flush IF/ID
+    if predictor is None:
+        Redirect_id = BranchTaken_id        #without prediction, every taken branch redirects the fetch
+
+    PCSrc_if = bits(1)         #Redirect_id one cycle later, selects the target
+    BranchTarget_if = word()
+
+    Predicted_id = bits(1)     #the instruction in ID was predicted a taken branch
+    PredictedTarget_id = word()
     
 
     
@@ -126,34 +254,47 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
 
     #instruction memory
 
-    Ip = Signal(intbv(0)[32:] ) #connect PC with intruction_memory
-    Instruction_if = Signal(intbv(0)[32:])   #32 bits instruction line.
-    im = instruction_memory (Ip, Instruction_if)
+    Ip = bits(32) #connect PC with intruction_memory
+    Instruction_if = bits(32)   #32 bits instruction line.
+    im = instruction_memory (Ip, Instruction_if, rom)
 
     #PC
-    NextIp =  Signal(intbv(0)[32:] )   #output of mux_branch - input of pc
-    pc = program_counter(Clk, NextIp, Ip, Stall)
+    NextIp =  bits(32)   #output of mux_branch - input of pc
+    pc = program_counter(ClkCore, NextIp, Ip, Freeze)
+
+    #instruction cache
+    if icache is not None:
+        icache_ = instruction_cache(ClkCore, Ip, FetchStall, icache, FlushOnBranch)
+        freeze_gate = or_gate(Stall, FetchStall, Freeze)
 
     #pc_adder
     INCREMENT = 1   #it's 4 in the book, but my instruction memory is organized in 32bits words, not in bytes
-    PcAdderOut_if =  Signal(intbv(0)[32:] )   #output of pc_adder - input0 branch_adder and mux_branch
+    PcAdderOut_if =  bits(32)   #output of pc_adder - input0 branch_adder and mux_branch
 
     pc_adder = ALU(Signal(0b0010), Ip, Signal(INCREMENT), PcAdderOut_if, Signal(0))    #hardwiring an ALU to works as an adder
     
     #mux controlling next ip branches. 
 
-    mux_pc_source = mux2(PCSrc_mem, NextIp, PcAdderOut_if, BranchAdderO_mem)
+    if predictor is not None:
+        PredictedIp = bits(32)   #next address, as predicted
+        mux_prediction = mux2(Predicted_id, PredictedIp, PcAdderOut_if, PredictedTarget_id)
+        mux_pc_source = mux2(PCSrc_if, NextIp, PredictedIp, BranchTarget_if)
+    elif early_branch:
+        mux_pc_source = mux2(PCSrc_if, NextIp, PcAdderOut_if, BranchTarget_if)
+    else:
+        mux_pc_source = mux2(PCSrc_mem, NextIp, PcAdderOut_if, BranchAdderO_mem)
 
     ##############################
     # IF/ID
     ##############################
 
-    PcAdderOut_id =  Signal(intbv(0)[32:])
-    Instruction_id = Signal(intbv(0)[32:])   
+    PcAdderOut_id =  bits(32)
+    Instruction_id = bits(32)   
 
 
 
-    latch_if_id_ = latch_if_id(Clk, FlushOnBranch, Instruction_if, PcAdderOut_if, Instruction_id, PcAdderOut_id, Stall)
+    latch_if_id_ = latch_if_id(ClkCore, FlushOnBranch, Instruction_if, PcAdderOut_if, Instruction_id, PcAdderOut_id, Freeze,
+                               Redirect_id)
 
 
     ##############################
@@ -161,38 +302,44 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     ##############################
 
     #DECODER
-    Opcode_id = Signal(intbv(0)[6:])   #instruction 31:26  - to Control
-    Rs_id = Signal(intbv(0)[5:])       #instruction 25:21  - to read_reg_1
-    Rt_id = Signal(intbv(0)[5:])       #instruction 20:16  - to read_reg_2 and mux controlled by RegDst
-    Rd_id = Signal(intbv(0)[5:])       #instruction 15:11  - to the mux controlled by RegDst
-    Shamt_id = Signal(intbv(0)[5:])    #instruction 10:6   - 
-    Func_id = Signal(intbv(0)[6:])     #instruction 5:0    - to ALUCtrl
-    Address16_id = Signal(intbv(0, min=-(2**15), max=2**15 - 1))   #instruction 15:0   - to Sign Extend
+    Opcode_id = bits(6)   #instruction 31:26  - to Control
+    Rs_id = bits(5)       #instruction 25:21  - to read_reg_1
+    Rt_id = bits(5)       #instruction 20:16  - to read_reg_2 and mux controlled by RegDst
+    Rd_id = bits(5)       #instruction 15:11  - to the mux controlled by RegDst
+    Shamt_id = bits(5)    #instruction 10:6   - 
+    Func_id = bits(6)     #instruction 5:0    - to ALUCtrl
+    Address16_id = Signal(0) if fast_arithmetic else Signal(intbv(0, min=MIN_16, max=MAX_16))   #instruction 15:0   - to Sign Extend
 
-    NopSignal = Signal(intbv(0)[1:])
+    NopSignal = bits(1)
 
-    instruction_decoder_ = instruction_dec(Instruction_id, Opcode_id, Rs_id, Rt_id, Rd_id, Shamt_id, Func_id, Address16_id, NopSignal)
+    instruction_decoder_ = instruction_dec(Instruction_id, Opcode_id, Rs_id, Rt_id, Rd_id, Shamt_id, Func_id, Address16_id, NopSignal,
+                                           predecoded=predecoded)
 
     #sign extend
-    Address32_id = Signal(intbv(0, min=MIN, max=MAX)) 
+    Address32_id = word() 
 
     sign_extend_ = sign_extend(Address16_id, Address32_id)
 
     #CONTROL 
-    signals_1bit = [Signal(intbv(0)[1:]) for i in range(7)]
+    signals_1bit = [bits(1) for i in range(7)]
     RegDst_id, ALUSrc_id, MemtoReg_id, RegWrite_id, MemRead_id, MemWrite_id, Branch_id = signals_1bit     
     
-    ALUop_id = Signal(intbv(0)[2:])  
+    ALUop_id = bits(2)  
     
     control_ = control(Opcode_id, RegDst_id, Branch_id, MemRead_id, 
-                        MemtoReg_id, ALUop_id, MemWrite_id, ALUSrc_id, RegWrite_id, NopSignal, Stall)
+                        MemtoReg_id, ALUop_id, MemWrite_id, ALUSrc_id, RegWrite_id, NopSignal, Freeze)
     
 
     #REGISTER FILE
-    Data1_id =  Signal(intbv(0, min=MIN, max=MAX))
-    Data2_id =  Signal(intbv(0, min=MIN, max=MAX))
+    Data1_id =  word()
+    Data2_id =  word()
 
-    register_file_i = register_file(Clk, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, depth=32)
+    if registers is None and not fast_arithmetic:
+        register_file_i = register_file(ClkCore, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, depth=32,
+                                        trace=print_registers if PRINT_REGISTERS else None)
+    else:
+        register_file_i = register_file_model(ClkCore, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, registers,
+                                              trace=print_registers if PRINT_REGISTERS else None)
     
     
     
@@ -200,27 +347,27 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     # ID/EX
     ##############################
     
-    PcAdderOut_ex =  Signal(intbv(0)[32:])
+    PcAdderOut_ex =  bits(32)
     
-    signals_1bit = [Signal(intbv(0)[1:]) for i in range(7)]
+    signals_1bit = [bits(1) for i in range(7)]
     RegDst_ex, ALUSrc_ex, MemtoReg_ex, RegWrite_ex, MemRead_ex, MemWrite_ex, Branch_ex = signals_1bit
 
-    ALUop_ex = Signal(intbv(0)[2:])  
+    ALUop_ex = bits(2)  
     
-    Data1_ex =  Signal(intbv(0, min=MIN, max=MAX))
-    Data2_ex =  Signal(intbv(0, min=MIN, max=MAX))
+    Data1_ex =  word()
+    Data2_ex =  word()
     
 
-    Rs_ex = Signal(intbv(0)[5:])       #instruction 25:21  - to read_reg_1
-    Rt_ex = Signal(intbv(0)[5:])       #instruction 20:16  - to read_reg_2 and mux controlled by RegDst
-    Rd_ex = Signal(intbv(0)[5:])       #instruction 15:11  - to the mux controlled by RegDst
+    Rs_ex = bits(5)       #instruction 25:21  - to read_reg_1
+    Rt_ex = bits(5)       #instruction 20:16  - to read_reg_2 and mux controlled by RegDst
+    Rd_ex = bits(5)       #instruction 15:11  - to the mux controlled by RegDst
     #Shamt_ex = Signal(intbv(0)[5:])    #instruction 10:6   - 
-    Func_ex = Signal(intbv(0)[6:])     #instruction 5:0    - to ALUCtrl
+    Func_ex = bits(6)     #instruction 5:0    - to ALUCtrl
     
-    Address32_ex = Signal(intbv(0, min=MIN, max=MAX)) 
+    Address32_ex = word() 
 
     
-    latch_id_ex_ = latch_id_ex(Clk, FlushOnBranch, 
+    latch_id_ex_ = latch_id_ex(ClkCore, FlushOnBranch, 
                                 PcAdderOut_id, 
                                 Data1_id, Data2_id, Address32_id,
                                 Rs_id, Rt_id, Rd_id, Func_id, 
@@ -243,16 +390,16 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     # EX
     ##############################
 
-    BranchAdderO_ex = Signal(intbv(0, min=MIN, max=MAX)[32:])
+    BranchAdderO_ex = bits(32)
 
-    Zero_ex = Signal(intbv(0)[1:])
-    AluResult_ex = Signal(intbv(0, min=MIN, max=MAX))
+    Zero_ex = bits(1)
+    AluResult_ex = word()
 
-    ForwMux1Out, ForwMux2Out = [ Signal(intbv(0, min=MIN, max=MAX)) for i in range(2) ]  #Output of forw_mux1 and forw_mux2
+    ForwMux1Out, ForwMux2Out = [word() for i in range(2)]  #Output of forw_mux1 and forw_mux2
 
-    MuxAluDataSrc_ex = Signal(intbv(0, min=MIN, max=MAX))
+    MuxAluDataSrc_ex = word()
 
-    WrRegDest_ex = Signal(intbv(0)[32:])
+    WrRegDest_ex = bits(32)
     
     
     
@@ -268,7 +415,7 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     branch_adder_ = ALU(Signal(0b0010), PcAdderOut_ex, Address32_ex, BranchAdderO_ex, Signal(0))
 
     #ALU Control
-    AluControl = Signal(intbv('1111')[4:])  #control signal to alu
+    AluControl = bits(4, 0b1111)  #control signal to alu
     alu_control_ = alu_control(ALUop_ex, Func_ex, AluControl)
 
     #ALU
@@ -282,21 +429,21 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     # EX/MEM
     ##############################
 
-    BranchAdderO_mem = Signal(intbv(0, min=MIN, max=MAX))
+    BranchAdderO_mem = word()
 
-    Zero_mem = Signal(intbv(0)[1:])
+    Zero_mem = bits(1)
     
 
-    Data2_mem =  Signal(intbv(0, min=MIN, max=MAX))
+    Data2_mem =  word()
 
-    WrRegDest_mem = Signal(intbv(0)[32:])
+    WrRegDest_mem = bits(32)
 
     #control signals
-    signals_1bit = [Signal(intbv(0)[1:]) for i in range(5)]
+    signals_1bit = [bits(1) for i in range(5)]
     MemtoReg_mem, RegWrite_mem, MemRead_mem, MemWrite_mem, Branch_mem = signals_1bit
 
     
-    latch_ex_mem_ = latch_ex_mem(Clk, Reset, 
+    latch_ex_mem_ = latch_ex_mem(ClkCore, Reset, 
                                 BranchAdderO_ex,
                                 AluResult_ex, Zero_ex, 
                                 Data2_ex, WrRegDest_ex, 
@@ -315,13 +462,21 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     # MEM
     ##############################
 
-    DataMemOut_mem = Signal(intbv(0, min=MIN, max=MAX))
+    DataMemOut_mem = word()
     
     #branch AND gate
-    branch_and_gate = and_gate(Branch_mem, Zero_mem, PCSrc_mem)  
+    if not early_branch:
+        branch_and_gate = and_gate(Branch_mem, Zero_mem, PCSrc_mem)  
     
     #data memory
-    data_memory_ = data_memory(Clk, AluResult_mem, Data2_mem, DataMemOut_mem, MemRead_mem, MemWrite_mem)
+    if memory is None and not fast_arithmetic:
+        data_memory_ = data_memory(ClkCore, AluResult_mem, Data2_mem, DataMemOut_mem, MemRead_mem, MemWrite_mem)
+    else:
+        data_memory_ = data_memory_model(ClkCore, AluResult_mem, Data2_mem, DataMemOut_mem, MemRead_mem, MemWrite_mem, memory)
+
+    #data cache
+    if dcache is not None:
+        dcache_ = data_cache(Clk, AluResult_ex, MemRead_ex, MemWrite_ex, MemStall, dcache)
 
     
     ##############################
@@ -329,15 +484,15 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     ##############################
     
     #RegWrite_wb, on feedback signals section
-    MemtoReg_wb = Signal(intbv(0)[1:])
+    MemtoReg_wb = bits(1)
     
-    DataMemOut_wb = Signal(intbv(0, min=MIN, max=MAX))
-    AluResult_wb = Signal(intbv(0, min=MIN, max=MAX))
+    DataMemOut_wb = word()
+    AluResult_wb = word()
 
 
     #WrRegDest_wb on feedback signals sections. 
 
-    latch_mem_wb_ = latch_mem_wb(Clk, Reset, 
+    latch_mem_wb_ = latch_mem_wb(ClkCore, Reset, 
                                  DataMemOut_mem, 
                                  AluResult_mem, 
                                  WrRegDest_mem, 
@@ -376,98 +531,96 @@ def dlx(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
     
 
 
-    hazard_detector_  = hazard_detector(MemRead_ex, Rt_ex, 
-                                        Rs_id, Rt_id, 
-                                        Stall)
+    if early_branch:
+        hazard_detector_ = branch_hazard_detector(MemRead_ex, Rt_ex,
+                                                  Rs_id, Rt_id,
+                                                  Stall,
+                                                  Opcode_id, RegWrite_ex, WrRegDest_ex,
+                                                  MemRead_mem, WrRegDest_mem)
+    else:
+        hazard_detector_  = hazard_detector(MemRead_ex, Rt_ex, 
+                                            Rs_id, Rt_id, 
+                                            Stall)
 
-    if DEBUG:
-        @always(Clk.posedge)
-        def debug_internals():
-            sep =  "\n" + "=" * 31 + " cycle %i (%ins)" + "=" * 31
-            print sep %  ( int(now()/2.0 + 0.5), now() )
-            #IF
-            print "\n" +  "." * 35 + " IF " + "." * 35 + "\n"
-            print "PcAdderOut_if %i | BranchAdderO_mem %i | PCSrc_mem %i | NextIp %i | Ip %i"  % (PcAdderOut_if, BranchAdderO_mem, PCSrc_mem, NextIp, Ip)
-            print 'Instruction_if %s (%i)' %  (bin(Instruction_if, 32), Instruction_if)
-
-            if True: # now () > 2:
-
-                #ID
-                print "\n" + "." * 35 + " ID " + "." * 35 + "\n"
-                print "PcAdderO_id %i | Instruction_id %s (%i) | Nop %i"  % (PcAdderOut_id, bin(Instruction_id, 32), Instruction_id, NopSignal )
-                print 'Op %s | Rs %i | Rt %i | Rd %i | Func %i | Addr16 %i | Addr32 %i' % \
-                        (bin(Opcode_id, 6), Rs_id, Rt_id, Rd_id, Func_id, Address16_id, Address32_id )
-                
-                print 'Data1 %i | Data2 %i' % (Data1_id, Data2_id)
-                print '-->CONTROL'
-                print 'RegDst %i  ALUop %s  ALUSrc %i | Branch %i  MemR %i  MemW %i |  RegW %i Mem2Reg %i ' % \
-                        ( RegDst_id , bin(ALUop_id, 2), ALUSrc_id, Branch_id, MemRead_id, MemWrite_id, RegWrite_id, MemtoReg_id)
-
-                print 'Stall --> %i' % Stall
-
-            if True: #if now () > 4:
-
-                #EX
-                print "\n" + "." * 35 + " EX " + "." * 35 + "\n"
-
-                print "PcAdderO_ex %i | BranchAdderO_ex %i "  % (PcAdderOut_ex, BranchAdderO_ex)
-                print "Rs %i | Rt %i | Rd %i | Func %i | Addr32 %i" % (Rs_ex, Rt_ex, Rd_ex, Func_ex, Address32_ex )
-                
-                print 'Data1_ex %i | Data2_ex %i' % (Data1_ex, Data2_ex)
-                
-                print 'ForwardA %i | ForwardB %i' % (ForwardA, ForwardB)
-                print 'ForwMux1Out %i | ForwMux2Out %i' % (ForwMux1Out, ForwMux2Out)
-                
-
-                print '-->CONTROL'
-                print 'RegDst %i  ALUop %s  ALUSrc %i | Branch %i  MemR %i  MemW %i |  RegW %i Mem2Reg %i ' % \
-                        ( RegDst_ex , bin(ALUop_ex, 2), ALUSrc_ex, Branch_ex, MemRead_ex, MemWrite_ex, RegWrite_ex, MemtoReg_ex)
-                
-                print '--> ALU'
-                print 'MuxAluDataSrc %i  | AluCtrl %s | AluResult_ex %i | Zero_ex %i'   % (MuxAluDataSrc_ex, bin(AluControl, 4), AluResult_ex, Zero_ex)
-                print 'WrRegDest_ex %i' % WrRegDest_ex
-
-            if True: #if now () > 6:
-    
-                #MEM
-                print "\n" + "." * 35 + "MEM " + "." * 35 + "\n"
-                print "BranchAdderO_mem %i "  % (BranchAdderO_mem)
-                
-                print '-->CONTROL'
-                print 'Branch %i  MemR %i  MemW %i |  RegW %i Mem2Reg %i ' % \
-                         ( Branch_mem, MemRead_mem, MemWrite_mem, RegWrite_mem, MemtoReg_mem)
-
-                print '--> Branch'
-                print 'Branch_mem %i Zero %i | PCSrc_mem %i' % (Branch_mem, Zero_mem, PCSrc_mem)
-
-                print '--> Data mem'
-                print 'AluResult_mem %i | Data2_mem %i | DataMemOut_mem %i | MemW %i MemR %i' \
-                        % (AluResult_mem, Data2_mem, DataMemOut_mem, MemWrite_mem, MemRead_mem)
-
-                print 'WrRegDest_mem %i' % WrRegDest_mem
-            
-            if True: #if now() > 8: 
-                #WB
-                print "\n" + "." * 35 + "WB" + "." * 35 + "\n"
-                print 'CONTROL --> RegW %i Mem2Reg %i ' %  ( RegWrite_mem, MemtoReg_mem)
-                
-                print 'DataMemOut_wb %i | AluResult_wb %i | MuxMemO_wb %i ' % (DataMemOut_wb, AluResult_wb, MuxMemO_wb)
-                print 'WrRegDest_wb %i | MuxMemO_wb %i' % (WrRegDest_wb, MuxMemO_wb)
-            
-            
-                  
+    ##############################
+    # branch resolution in ID
+    ##############################
+
+    if early_branch:
+        ForwardC, ForwardD = [bits(2) for i in range(2)]     #control the comparator's input muxers
+        CmpData1_id, CmpData2_id = [word() for i in range(2)]
+        Equal_id = bits(1)
+        BranchTarget_id = word()
+
+        forwarding_id_ = branch_forwarding(RegWrite_mem, WrRegDest_mem, Rs_id, Rt_id,
+                                           RegWrite_wb, WrRegDest_wb,
+                                           ForwardC, ForwardD)
+
+        cmp_mux1_ = mux4(ForwardC, CmpData1_id, Data1_id, MuxMemO_wb, AluResult_mem)
+        cmp_mux2_ = mux4(ForwardD, CmpData2_id, Data2_id, MuxMemO_wb, AluResult_mem)
+
+        comparator_ = comparator(CmpData1_id, CmpData2_id, Equal_id)
+        branch_taken_gate = and_gate(Branch_id, Equal_id, BranchTaken_id)
+
+        branch_adder_id_ = ALU(Signal(0b0010), PcAdderOut_id, Address32_id, BranchTarget_id, Signal(0))
+
+        if predictor is None:
+            RedirectTarget_id = BranchTarget_id
+        else:
+            #the prediction is checked here, and the fetch redirected to the
+            #target or to the next instruction
+            RedirectTarget_id = word()
+
+            mispredict_ = mispredict(Branch_id, BranchTaken_id, Predicted_id, Redirect_id)
+            mux_redirect_ = mux2(BranchTaken_id, RedirectTarget_id, PcAdderOut_id, BranchTarget_id)
+
+            predictor_ = branch_predictor(ClkCore, Ip, Freeze, Redirect_id,
+                                          Branch_id, BranchTaken_id, PcAdderOut_id, BranchTarget_id,
+                                          Predicted_id, PredictedTarget_id, predictor)
+
+        latch_branch_ = latch_branch(ClkCore, Redirect_id, RedirectTarget_id, PCSrc_if, BranchTarget_if)
+
+    ##############################
+    # trace
+    ##############################
+
+    if trace is not None:
+        tracer_ = trace.attach(Clk, signals_of(locals()))
+
+    if halt is not None:
+        halt_ = halt.attach(Clk, signals_of(locals()))
+
+    if counters is not None:
+        counters_ = counters.attach(Clk, signals_of(locals()))
+
+    if profiler is not None:
+        profiler_ = profiler.attach(Clk, signals_of(locals()))
+
+    if cpi_stack is not None:
+        cpi_stack_ = cpi_stack.attach(Clk, signals_of(locals()))
+
+    if retirement is not None:
+        retirement_ = retirement.attach(Clk, signals_of(locals()))
+
+    if coverage is not None:
+        coverage_ = coverage.attach(Clk, signals_of(locals()))
 
     return instances()
 
 
 
-def testBench():
+def testBench(trace=None, halt=None, counters=None,
+        profiler=None, cpi_stack=None, registers=None):
 
 
     if not DEBUG:
-        datapath_i = traceSignals(dlx)  #() #toVHDL(datapath)
+        datapath_i = traceSignals(dlx, halt=halt, counters=counters, profiler=profiler,
+                                  cpi_stack=cpi_stack)  #() #toVHDL(datapath)
     else:
-        datapath_i = dlx()
+        if registers is None:
+            registers = DenseMemory(32, initial_registers(32))
+        datapath_i = dlx(trace=trace, halt=halt, counters=counters, profiler=profiler,
+                         cpi_stack=cpi_stack, registers=registers)
 
     
 
@@ -476,8 +629,18 @@ def testBench():
 
 
 def main():
-    sim = Simulation(testBench())
-    sim.run(SIM_TIME)
+    rom = load_program(sys.argv[1] if len(sys.argv) > 1 else None)
+    trace = Trace(DEBUG_SIGNALS) if DEBUG else None
+    halt = Halt(len(rom), MAX_CYCLES)
+    counters = Counters()
+    registers = DenseMemory(32, initial_registers(32))
+    sim = Simulation(testBench(trace, halt, counters, registers=registers))
+    sim.run(quiet=1)
+    if DEBUG:
+        print trace.format()
+        print 'reg:', registers.snapshot()
+    print 'cycles: %i | halted: %s' % (halt.cycles, halt.reason)
+    print counters.summary()
 
 
 if __name__ == '__main__':
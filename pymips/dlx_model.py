@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Cycle accurate model of the DLX pipeline
+"""
+
+import sys
+
+from program import load_image, DEFAULT_PROGRAM
+from isa import alu, initial_registers, initial_memory
+from predecode import predecode, control_lines, ALU_CONTROL, NO_CONTROL, \
+                      NOP_INSTRUCTION
+from halt import SELF_BRANCH, END
+
+
+class IfId(object):
+    """IF/ID pipeline register (see latch_if_id)"""
+
+    __slots__ = ('decoded', 'pc_adder')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.decoded = NOP_INSTRUCTION
+        self.pc_adder = 0
+
+    @property
+    def instruction(self):
+        return self.decoded.word
+
+
+class IdEx(object):
+    """ID/EX pipeline register (see latch_id_ex)"""
+
+    __slots__ = ('pc_adder', 'data1', 'data2', 'address32',
+                 'rs', 'rt', 'rd', 'func',
+                 'RegDst', 'ALUop', 'ALUSrc',
+                 'Branch', 'MemRead', 'MemWrite',
+                 'RegWrite', 'MemtoReg')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.pc_adder = self.data1 = self.data2 = self.address32 = 0
+        self.rs = self.rt = self.rd = self.func = 0
+        self.RegDst = self.ALUop = self.ALUSrc = 0
+        self.Branch = self.MemRead = self.MemWrite = 0
+        self.RegWrite = self.MemtoReg = 0
+
+
+class ExMem(object):
+    """EX/MEM pipeline register (see latch_ex_mem)"""
+
+    __slots__ = ('branch_adder', 'alu_result', 'zero', 'data2', 'wr_reg', 'halt',
+                 'Branch', 'MemRead', 'MemWrite',
+                 'RegWrite', 'MemtoReg')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.branch_adder = self.alu_result = self.zero = 0
+        self.data2 = self.wr_reg = 0
+        self.halt = 0   #branch to itself (no latch_ex_mem output)
+        self.Branch = self.MemRead = self.MemWrite = 0
+        self.RegWrite = self.MemtoReg = 0
+
+
+class MemWb(object):
+    """MEM/WB pipeline register (see latch_mem_wb)"""
+
+    __slots__ = ('ram', 'alu_result', 'wr_reg', 'RegWrite', 'MemtoReg')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.ram = self.alu_result = self.wr_reg = 0
+        self.RegWrite = self.MemtoReg = 0
+
+
+class DLXModel(object):
+    """
+    Cycle accurate model of dlx.dlx that doesn't use the MyHDL scheduler.
+
+    Every ``step()`` is one clock cycle: latches capture on the positive
+    edge, the (asynchronous) flush on branch is applied, and then the
+    program counter, register file and data memory update on the negative
+    edge, exactly like the netlist does. After a step, the attributes hold
+    the values the netlist signals have just before the next positive edge.
+
+    rom -- sequence of 32 bits encoded instructions. Fetching beyond its
+           end reads NOPs.
+    registers -- initial register file (default: ``isa.initial_registers()``)
+    memory -- initial data memory (default: ``isa.initial_memory()``)
+
+    Differences with the netlist: the ALU wraps to 32 bits instead of
+    raising on overflow.
+
+    Note that, as in dlx.dlx, ``mux_pc_source`` reads a ``BranchAdderO_mem``
+    that nothing drives, so a taken branch fetches from address 0, and
+    the flush at the following edge discards that first instruction.
+    """
+
+    def __init__(self, rom, registers=None, memory=None):
+        self.rom = predecode(rom)
+        self.registers = initial_registers() if registers is None else registers
+        self.memory = initial_memory() if memory is None else memory
+
+        self.cycle = 0
+        self.pc = 0
+
+        self.if_id = IfId()
+        self.id_ex = IdEx()
+        self.ex_mem = ExMem()
+        self.mem_wb = MemWb()
+
+        #outputs of components clocked on negedge
+        self.data1 = 0          #Data1_id
+        self.data2 = 0          #Data2_id
+        self.data_mem_out = 0   #DataMemOut_mem
+
+        #control lines in ID, kept because control.control holds some of them
+        self.control = NO_CONTROL
+
+        self.stall = 0
+        self.flush = 0          #PCSrc_mem / FlushOnBranch
+        self.forward_a = 0
+        self.forward_b = 0
+
+        self.halted = None      #why the program halted, see halt.Halt
+
+    def fetch(self, address):
+        rom = self.rom
+        if address < len(rom):
+            return rom[address]
+        return NOP_INSTRUCTION
+
+    def step(self):
+        """
+        Simulate one clock cycle.
+        """
+        if_id = self.if_id
+        id_ex = self.id_ex
+        ex_mem = self.ex_mem
+        mem_wb = self.mem_wb
+        regs = self.registers
+
+        decoded = if_id.decoded
+        stall = self.stall
+        flush = self.flush
+
+        #combinational EX stage, with the values before the edge
+        forward_a, forward_b = self.forward_a, self.forward_b
+        wb_value = mem_wb.ram if mem_wb.MemtoReg else mem_wb.alu_result
+
+        if forward_a == 2:
+            op1 = ex_mem.alu_result
+        elif forward_a == 1:
+            op1 = wb_value
+        else:
+            op1 = id_ex.data1
+
+        if forward_b == 2:
+            op2 = ex_mem.alu_result
+        elif forward_b == 1:
+            op2 = wb_value
+        else:
+            op2 = id_ex.data2
+
+        if id_ex.ALUSrc:
+            op2 = id_ex.address32
+
+        alu_result = alu(ALU_CONTROL[id_ex.ALUop][id_ex.func], op1, op2)
+
+        ##############################
+        # positive edge
+        ##############################
+
+        mem_wb.ram = self.data_mem_out
+        mem_wb.alu_result = ex_mem.alu_result
+        mem_wb.wr_reg = ex_mem.wr_reg
+        mem_wb.RegWrite = ex_mem.RegWrite
+        mem_wb.MemtoReg = ex_mem.MemtoReg
+
+        ex_mem.branch_adder = id_ex.pc_adder + id_ex.address32
+        ex_mem.alu_result = alu_result
+        ex_mem.zero = int(alu_result == 0)
+        ex_mem.data2 = id_ex.data2
+        ex_mem.wr_reg = id_ex.rd if id_ex.RegDst else id_ex.rt
+        ex_mem.halt = id_ex.Branch and id_ex.address32 == -1
+        ex_mem.Branch = id_ex.Branch
+        ex_mem.MemRead = id_ex.MemRead
+        ex_mem.MemWrite = id_ex.MemWrite
+        ex_mem.RegWrite = id_ex.RegWrite
+        ex_mem.MemtoReg = id_ex.MemtoReg
+
+        if flush:
+            id_ex.clear()
+            if_id.clear()
+        else:
+            (id_ex.RegDst, id_ex.ALUop, id_ex.ALUSrc, id_ex.Branch,
+             id_ex.MemRead, id_ex.MemWrite, id_ex.RegWrite,
+             id_ex.MemtoReg) = self.control
+            id_ex.pc_adder = if_id.pc_adder
+            id_ex.data1 = self.data1
+            id_ex.data2 = self.data2
+            id_ex.address32 = decoded.immediate
+            id_ex.rs = decoded.rs
+            id_ex.rt = decoded.rt
+            id_ex.rd = decoded.rd
+            id_ex.func = decoded.funct
+
+            if not stall:
+                pc = self.pc
+                if_id.decoded = self.fetch(pc)
+                if_id.pc_adder = pc + 1
+
+        #branch condition in MEM, resets IF/ID and ID/EX asynchronously
+        flush = ex_mem.Branch & ex_mem.zero
+        if flush:
+            id_ex.clear()
+            if_id.clear()
+
+        #ID stage settles. Rs_id and Rt_id reach the hazard detector one
+        #delta cycle after ID/EX does, so control may see a Stall glitch
+        #computed with the previous ones, which matters for the lines it holds
+        control = self.control
+        if not flush:
+            glitch = id_ex.MemRead and (id_ex.rt == decoded.rs or id_ex.rt == decoded.rt)
+
+        decoded = if_id.decoded
+        rs = decoded.rs
+        rt = decoded.rt
+        stall = int(bool(id_ex.MemRead and (id_ex.rt == rs or id_ex.rt == rt)))
+
+        if decoded.holds:
+            if not flush:
+                control = control_lines(decoded.opcode, 0, glitch, control)
+            control = control_lines(decoded.opcode, 0, stall, control)
+        elif stall:
+            control = NO_CONTROL
+        else:
+            control = decoded.control
+        self.control = control
+
+        #forwarding unit
+        wr_mem = ex_mem.wr_reg
+        wr_wb = mem_wb.wr_reg
+        if ex_mem.RegWrite and wr_mem != 0 and wr_mem == id_ex.rs:
+            self.forward_a = 2
+        elif mem_wb.RegWrite and wr_wb != 0 and wr_mem != id_ex.rs and wr_wb == id_ex.rs:
+            self.forward_a = 1
+        else:
+            self.forward_a = 0
+
+        if ex_mem.RegWrite and wr_mem != 0 and wr_mem == id_ex.rt:
+            self.forward_b = 2
+        elif mem_wb.RegWrite and wr_wb != 0 and wr_mem != id_ex.rt and wr_wb == id_ex.rt:
+            self.forward_b = 1
+        else:
+            self.forward_b = 0
+
+        ##############################
+        # negative edge
+        ##############################
+
+        if not stall:
+            self.pc = 0 if flush else self.pc + 1
+
+        if mem_wb.RegWrite:
+            regs[mem_wb.wr_reg] = mem_wb.ram if mem_wb.MemtoReg else mem_wb.alu_result
+        self.data1 = regs[rs]
+        self.data2 = regs[rt]
+
+        if ex_mem.MemWrite:
+            self.memory[ex_mem.alu_result] = ex_mem.data2
+        elif ex_mem.MemRead:
+            self.data_mem_out = self.memory[ex_mem.alu_result]
+
+        self.stall = stall
+        self.flush = flush
+        self.cycle += 1
+
+        if flush and ex_mem.halt:
+            self.halted = SELF_BRANCH
+        elif self.pc >= len(self.rom) and not if_id.decoded.word and \
+                not (id_ex.RegWrite or id_ex.MemWrite or id_ex.Branch or ex_mem.RegWrite):
+            self.halted = END
+        else:
+            self.halted = None
+
+    def run(self, cycles=None):
+        """
+        Simulate until the program halts (see halt.Halt) or at most
+        ``cycles`` clock cycles. Return the number of cycles simulated.
+        """
+        step = self.step
+        count = 0
+        limit = -1 if cycles is None else cycles
+        while self.halted is None and count != limit:
+            step()
+            count += 1
+        return count
+
+
+def main():
+    program = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROGRAM
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    model = DLXModel(load_image(program))
+    model.run(cycles)
+
+    print 'cycles: %i | pc: %i | halted: %s' % (model.cycle, model.pc, model.halted)
+    print 'reg:', model.registers
+    print 'mem:', [(i, v) for (i, v) in enumerate(model.memory) if v]
+
+if __name__ == '__main__':
+    main()
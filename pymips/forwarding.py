@@ -57,6 +57,38 @@ def forwarding(RegWrite_mem, Rd_mem, Rs_ex, Rt_ex,     #inputs of EX hazards
     return hazards_control
 
 
+def branch_forwarding(RegWrite_mem, Rd_mem, Rs_id, Rt_id,
+                      RegWrite_wb, Rd_wb,
+                      ForwardC, ForwardD
+                     ):
+    """
+    Forwarding into the comparator of a branch resolved in ID (see dlx's
+    early_branch), with the same encoding than forwarding: 2 from EX/MEM,
+    1 from MEM/WB.
+
+    EX/MEM only hides MEM/WB when it writes the register: after a stall
+    EX/MEM holds a bubble with the registers of the stalled instruction.
+    """
+
+    @always_comb
+    def hazards_control():
+        if RegWrite_mem == 1 and Rd_mem != 0 and Rd_mem == Rs_id:
+            ForwardC.next = 2
+        elif RegWrite_wb == 1 and Rd_wb != 0 and Rd_wb == Rs_id:
+            ForwardC.next = 1
+        else:
+            ForwardC.next = 0
+
+        if RegWrite_mem == 1 and Rd_mem != 0 and Rd_mem == Rt_id:
+            ForwardD.next = 2
+        elif RegWrite_wb == 1 and Rd_wb != 0 and Rd_wb == Rt_id:
+            ForwardD.next = 1
+        else:
+            ForwardD.next = 0
+
+    return hazards_control
+
+
 
 import unittest
 
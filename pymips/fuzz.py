@@ -0,0 +1,453 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Coverage guided random program fuzzer
+"""
+
+import os
+import sys
+import time
+import random
+import multiprocessing
+from optparse import OptionParser
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from predecode import decode, R_FORMAT, LW, SW, BEQ, ALU_OP, LOAD, STORE, BRANCH
+from isa import ISA, initial_registers, initial_memory
+from coverage import Coverage, count, summary
+from halt import LIMIT
+
+
+FUNCTS = (('add', 0b100000), ('sub', 0b100010), ('and', 0b100100), ('or', 0b100101),
+          ('slt', 0b101010))
+
+#registers written by the programs: few, so that dependencies are dense.
+#r0 is the base of every lw and sw and is never written, so the addresses
+#stay in the data memory
+REGISTERS = range(1, 8)
+OFFSETS = 16        #words addressed by lw and sw: r0 + 0 to r0 + 15
+
+MAX_LENGTH = 64     #words of the ROM, the longest program
+
+
+def r_format(funct, rd, rs, rt):
+    return (R_FORMAT << 26) | (rs << 21) | (rt << 16) | (rd << 11) | funct
+
+
+def i_format(opcode, rt, rs, immediate):
+    return (opcode << 26) | (rs << 21) | (rt << 16) | (immediate & 0xffff)
+
+
+def disassemble(word):
+    """
+    Return the assembler of an instruction word.
+    """
+    d = decode(word)
+    if d.kind == ALU_OP:
+        names = dict((funct, name) for name, funct in FUNCTS)
+        return '%s $r%i, $r%i, $r%i' % (names.get(d.funct, 'funct %i' % d.funct), d.rd, d.rs, d.rt)
+    elif d.kind in (LOAD, STORE):
+        return '%s $r%i, %i($r%i)' % ('lw' if d.kind == LOAD else 'sw', d.rt, d.immediate, d.rs)
+    elif d.kind == BRANCH:
+        return 'beq r%i, r%i, %i' % (d.rs, d.rt, d.immediate)
+    elif word == 0:
+        return 'nop'
+    return '.word 0x%08x' % word
+
+
+class Generator(object):
+    """
+    Random programs of ``add``, ``sub``, ``and``, ``or``, ``slt``, ``lw``,
+    ``sw`` and ``beq``, biased toward what forwarding and hazard_detector
+    handle: sources that were just written (RAW dependencies), loads
+    followed by a use of what they load, and branches back to back.
+
+    Branches only jump forward (0 to 3 words), so every program halts, at
+    its end, and addresses stay in the data memory (see REGISTERS).
+
+    rng -- a random.Random
+    length -- words of a new program
+    raw -- probability a source is one of the last 3 registers written
+    load_use -- probability of a ``lw`` and a use of its register
+    branch_pair -- probability of two ``beq`` back to back
+    branch -- probability of a single ``beq``
+    store -- probability of a ``sw``
+    """
+
+    def __init__(self, rng, length=24, raw=0.7, load_use=0.2, branch_pair=0.1, branch=0.1,
+                 store=0.15):
+        self.rng = rng
+        self.length = length
+        self.raw = raw
+        self.load_use = load_use
+        self.branch_pair = branch_pair
+        self.branch = branch
+        self.store = store
+        self._recent = []
+
+    def _source(self):
+        if self._recent and self.rng.random() < self.raw:
+            return self.rng.choice(self._recent[-3:])
+        return self.rng.choice(REGISTERS)
+
+    def _dest(self):
+        dest = self.rng.choice(REGISTERS)
+        self._recent.append(dest)
+        return dest
+
+    def _alu(self, source=None):
+        funct = self.rng.choice(FUNCTS)[1]
+        rs, rt = self._source(), self._source()
+        if source is not None:
+            if self.rng.random() < 0.5:
+                rs = source
+            else:
+                rt = source
+        return r_format(funct, self._dest(), rs, rt)
+
+    def _store(self, source=None):
+        return i_format(SW, self._source() if source is None else source, 0,
+                        self.rng.randrange(OFFSETS))
+
+    def _load(self):
+        return i_format(LW, self._dest(), 0, self.rng.randrange(OFFSETS))
+
+    def _branch(self, source=None):
+        rs = self._source() if source is None else source
+        rt = rs if self.rng.random() < 0.3 else self._source()
+        return i_format(BEQ, rt, rs, self.rng.randint(0, 3))
+
+    def fragment(self):
+        """
+        Return a few instructions: a single one, a load and its use, or
+        two branches.
+        """
+        rng = self.rng
+        choice = rng.random()
+        if choice < self.load_use:
+            load = self._load()
+            dest = self._recent[-1]
+            use = rng.choice((self._alu, self._alu, self._store, self._branch))
+            return [load, use(dest)]
+        choice -= self.load_use
+        if choice < self.branch_pair:
+            return [self._branch(), self._branch()]
+        choice -= self.branch_pair
+        if choice < self.branch:
+            return [self._branch()]
+        choice -= self.branch
+        if choice < self.store:
+            return [self._store()]
+        return [self._alu()]
+
+    def program(self):
+        """
+        Return a new program of ``length`` words.
+        """
+        self._recent = []
+        words = []
+        while len(words) < self.length:
+            words.extend(self.fragment())
+        return words[:self.length]
+
+    def mutate(self, program):
+        """
+        Return a copy of ``program`` with a fragment inserted or replacing
+        an instruction, an instruction removed, or two swapped.
+        """
+        rng = self.rng
+        words = list(program)
+        self._recent = [decode(word).dest for word in words if decode(word).dest]
+        index = rng.randrange(len(words) + 1)
+        choice = rng.random()
+        if choice < 0.4 or len(words) < 2:
+            words[index:index] = self.fragment()
+        elif choice < 0.7:
+            words[min(index, len(words) - 1):index + 1] = self.fragment()
+        elif choice < 0.85:
+            del words[min(index, len(words) - 1)]
+        else:
+            index = min(index, len(words) - 2)
+            words[index], words[index + 1] = words[index + 1], words[index]
+        return words[:MAX_LENGTH]
+
+
+_processors = {}    #elaborated once per worker process and early_branch
+
+
+def _processor(early_branch, max_cycles):
+    if early_branch not in _processors:
+        from processor import Processor
+        _processors[early_branch] = Processor(MAX_LENGTH, max_cycles=max_cycles,
+                                              early_branch=early_branch, coverage=Coverage())
+    return _processors[early_branch]
+
+
+def expected_state(program, reference='isa', max_cycles=2000):
+    """
+    Return what ``program`` should end with: ``(cycles, halted, registers,
+    memory)``. The ``isa`` doesn't know cycles (None); ``model``, the
+    dlx_model.DLXModel, does.
+    """
+    if reference == 'isa':
+        isa = ISA(program)
+        isa.run(max_cycles)
+        return None, isa.halted or LIMIT, isa.registers, isa.memory
+    elif reference == 'model':
+        from dlx_model import DLXModel
+        model = DLXModel(program)
+        cycles = model.run(max_cycles)
+        return cycles, model.halted or LIMIT, model.registers, model.memory
+    raise ValueError('Unknown reference %r' % reference)
+
+
+def check(program, reference='isa', early_branch=True, max_cycles=2000):
+    """
+    Run ``program`` on dlx.dlx and compare how it ends with the
+    ``reference``. Return the hazard scenarios it covered (a
+    coverage.Coverage bitset) and what went wrong (None if nothing).
+    """
+    processor = _processor(early_branch, max_cycles)
+    processor.load(program)
+    try:
+        cycles = processor.run(max_cycles)
+    except Exception, e:
+        return processor.coverage.bits, '%s: %s' % (e.__class__.__name__, e)
+
+    expected = expected_state(program, reference, max_cycles)
+    got = (cycles, processor.halted, processor.registers.snapshot(),
+           processor.memory.snapshot())
+    problems = []
+    if expected[0] is not None and got[0] != expected[0]:
+        problems.append('%i cycles (expected %i)' % (got[0], expected[0]))
+    if got[1] != expected[1]:
+        problems.append('halted: %s (expected %s)' % (got[1], expected[1]))
+    for name, values, reference_values in (('r', got[2], expected[2]), ('mem', got[3], expected[3])):
+        for index, (value, expected_value) in enumerate(zip(values, reference_values)):
+            if value != expected_value:
+                problems.append('%s%s = %i (expected %i)' % (
+                    name, index if name == 'r' else '[%i]' % index, value, expected_value))
+    return processor.coverage.bits, '; '.join(problems) or None
+
+
+def check_batch(programs, reference='isa', early_branch=True, max_cycles=2000):
+    """
+    ``check`` several programs. Return the list of results.
+    """
+    return [check(program, reference, early_branch, max_cycles) for program in programs]
+
+
+def minimize(program, fails):
+    """
+    Return the shortest program found, removing instructions from
+    ``program`` (in halves, quarters... down to single words, as delta
+    debugging does), for which ``fails(program)`` is still true.
+    """
+    parts = 2
+    while len(program) > 1:
+        size = (len(program) + parts - 1) // parts
+        for start in range(0, len(program), size):
+            candidate = program[:start] + program[start + size:]
+            if candidate and fails(candidate):
+                program = candidate
+                parts = max(parts - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            parts = min(parts * 2, len(program))
+    return program
+
+
+class Failure(object):
+    """
+    A program dlx.dlx didn't run as the reference did.
+
+    program -- the program generated
+    minimized -- the shortest one that still fails (see ``minimize``)
+    message -- what went wrong with ``minimized``
+    """
+
+    def __init__(self, program, minimized, message):
+        self.program = program
+        self.minimized = minimized
+        self.message = message
+
+    def text(self, reference='isa', max_cycles=2000):
+        """
+        Return ``minimized`` as a text program (see program.read_program),
+        with the final state of the ``reference`` as ``# expect:`` lines,
+        for regression.py.
+        """
+        lines = ['# %s' % self.message]
+        for word in self.minimized:
+            bits = '{0:032b}'.format(word)
+            if decode(word).opcode == R_FORMAT:
+                fields = (bits[:6], bits[6:11], bits[11:16], bits[16:21], bits[21:26], bits[26:])
+            else:
+                fields = (bits[:6], bits[6:11], bits[11:16], ' ' + bits[16:])
+            lines.append('%-40s # %s' % (' '.join(fields), disassemble(word)))
+
+        #what changed, and what the program writes even if it doesn't change
+        cycles, halted, registers, memory = expected_state(self.minimized, reference, max_cycles)
+        initial = (initial_registers(len(registers)), initial_memory(len(memory)))
+        decoded = [decode(word) for word in self.minimized]
+        written = set(d.dest for d in decoded if d.dest)
+        stored = set(registers[d.rs] + d.immediate for d in decoded if d.kind == STORE)
+        expected = ['r%i = %i' % (index, value) for index, value in enumerate(registers)
+                    if value != initial[0][index] or index in written]
+        expected += ['mem[%i] = %i' % (index, value) for index, value in enumerate(memory)
+                     if value != initial[1][index] or index in stored]
+        for start in range(0, len(expected), 8):
+            lines.append('# expect: %s' % ', '.join(expected[start:start + 8]))
+        return '\n'.join(lines) + '\n'
+
+
+class Fuzzer(object):
+    """
+    Generate programs, run them on dlx.dlx in a pool of ``jobs`` processes
+    (default: one per core) in batches of ``batch``, and check them
+    against the ``reference``: ``isa`` (registers, memory and halt) or
+    ``model`` (the cycles too, with branches resolved in MEM as
+    dlx_model.DLXModel does).
+
+    The hazard scenarios of every run (see coverage.Coverage) are merged
+    into ``bits``. A program that covers a scenario no other program did
+    joins the ``corpus``, and half the new programs are mutations of the
+    corpus. Every failing program is
+    minimized and kept in ``failures``.
+
+    seed -- seed of the generator
+    early_branch -- resolve the branches of dlx in ID (see dlx.dlx); only
+                    with the ``isa``
+    max_cycles -- cycle limit of a run
+    """
+
+    def __init__(self, jobs=None, seed=None, batch=16, reference='isa', early_branch=True,
+                 max_cycles=2000, length=24):
+        if reference == 'model' and early_branch:
+            raise ValueError('dlx_model resolves branches in MEM, not with early_branch')
+        self.jobs = jobs or multiprocessing.cpu_count()
+        self.batch = batch
+        self.reference = reference
+        self.early_branch = early_branch
+        self.max_cycles = max_cycles
+        self.rng = random.Random(seed)
+        self.generator = Generator(self.rng, length)
+        self.bits = 0
+        self.corpus = []
+        self.failures = []
+        self.programs = 0
+
+    def _programs(self, count):
+        programs = []
+        for i in range(count):
+            if self.corpus and self.rng.random() < 0.5:
+                programs.append(self.generator.mutate(self.rng.choice(self.corpus)))
+            else:
+                programs.append(self.generator.program())
+        return programs
+
+    def _fails(self, program):
+        return check(program, self.reference, self.early_branch, self.max_cycles)[1] is not None
+
+    def _add(self, program, bits, message):
+        self.programs += 1
+        if message is not None:
+            minimized = minimize(program, self._fails)
+            message = check(minimized, self.reference, self.early_branch, self.max_cycles)[1]
+            self.failures.append(Failure(program, minimized, message))
+        if bits & ~self.bits:
+            self.corpus.append(program)
+            self.bits |= bits
+
+    def run(self, programs, max_failures=None, progress=None):
+        """
+        Check ``programs`` more programs, or stop after ``max_failures``.
+        ``progress(fuzzer)`` is called after every batch. Return the
+        failures.
+        """
+        executor = ProcessPoolExecutor(self.jobs)
+        try:
+            pending = set()
+            submitted = 0
+            #enough batches in flight to keep every process busy, and the
+            #corpus feeding the next ones
+            in_flight = 2 * self.jobs
+            while submitted < programs or pending:
+                while submitted < programs and len(pending) < in_flight:
+                    batch = self._programs(min(self.batch, programs - submitted))
+                    submitted += len(batch)
+                    future = executor.submit(check_batch, batch, self.reference,
+                                             self.early_branch, self.max_cycles)
+                    future.programs = batch
+                    pending.add(future)
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for program, (bits, message) in zip(future.programs, future.result()):
+                        self._add(program, bits, message)
+                    if progress is not None:
+                        progress(self)
+                if max_failures is not None and len(self.failures) >= max_failures:
+                    for future in pending:
+                        future.cancel()
+                    break
+        finally:
+            executor.shutdown()
+        return self.failures
+
+
+def main():
+    parser = OptionParser(usage='%prog [options]',
+                          description='Run random programs on dlx and check them against the ISA.')
+    parser.add_option('-n', '--programs', type='int', default=1000,
+                      help='programs to run (default: %default)')
+    parser.add_option('-j', '--jobs', type='int', default=None,
+                      help='worker processes (default: one per core)')
+    parser.add_option('-s', '--seed', type='int', default=None,
+                      help='seed of the generator (default: random)')
+    parser.add_option('-l', '--length', type='int', default=24,
+                      help='words of a new program (default: %default)')
+    parser.add_option('-r', '--reference', choices=('isa', 'model'), default='isa',
+                      help='isa, or model to compare cycles with branches resolved in MEM '
+                           '(default: %default)')
+    parser.add_option('--max-failures', type='int', default=10,
+                      help='stop after these failures (default: %default)')
+    parser.add_option('-o', '--output', default=None,
+                      help='directory to write the minimized failing programs to')
+    options, args = parser.parse_args()
+    if not 0 < options.length <= MAX_LENGTH:
+        parser.error('The length must be between 1 and %i' % MAX_LENGTH)
+
+    fuzzer = Fuzzer(options.jobs, options.seed, reference=options.reference,
+                    early_branch=options.reference == 'isa', length=options.length)
+    start = time.time()
+
+    def progress(fuzzer):
+        sys.stderr.write('\r%i programs | %i scenarios | corpus %i | %i failures'
+                         % (fuzzer.programs, count(fuzzer.bits), len(fuzzer.corpus),
+                            len(fuzzer.failures)))
+
+    failures = fuzzer.run(options.programs, options.max_failures, progress)
+    sys.stderr.write('\n')
+    print '%i programs in %.1fs' % (fuzzer.programs, time.time() - start)
+    print summary(fuzzer.bits)
+
+    for number, failure in enumerate(failures):
+        print '\nfailure %i: %s' % (number, failure.message)
+        for word in failure.minimized:
+            print '  %08x  %s' % (word, disassemble(word))
+        if options.output:
+            if not os.path.isdir(options.output):
+                os.makedirs(options.output)
+            path = os.path.join(options.output, 'failure%i.txt' % number)
+            with open(path, 'w') as f:
+                f.write(failure.text(options.reference, fuzzer.max_cycles))
+            print '  written to %s' % path
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
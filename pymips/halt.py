@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Halt detection
+"""
+
+from myhdl import Signal, always, StopSimulation
+
+
+#why a program halted
+SELF_BRANCH = 'self branch'     #a taken ``beq r, r, -1`` reached MEM
+END = 'end of program'          #the PC left the image and the pipeline drained
+LIMIT = 'cycle limit'
+
+
+class Halt(object):
+    """
+    Stop the simulation of dlx.dlx when the program has finished:
+
+    * a taken branch to itself (``beq r, r, -1``, as in programs/simple.txt)
+      reached MEM, so every older instruction was written back, or
+    * the PC left the image and no instruction with effects is left in
+      the pipeline.
+
+    size -- words of the program image
+    max_cycles -- stop anyway after these cycles (default: never)
+
+    Both can be changed between runs.
+
+    After the run, ``cycles`` is the number of cycles executed and
+    ``reason`` one of SELF_BRANCH, END or LIMIT (None while running).
+    The simulation is stopped right after the positive edge that follows
+    (so a trace.Trace records that edge too, whatever the order of the
+    instances), before anything is written on the negative edge: the
+    registers and data memory hold the state after ``cycles`` cycles, as
+    in dlx_model.DLXModel.
+    """
+
+    def __init__(self, size, max_cycles=None):
+        self.size = size
+        self.max_cycles = max_cycles
+        self.clear()
+
+    def attach(self, clk, signals):
+        """
+        Return the instance watching dlx's ``signals`` (a ``{name: Signal}``
+        dict) on the positive edges of ``clk``.
+        """
+        Branch_ex, Zero_ex, Address32_ex = [signals[name] for name in
+                                            ('Branch_ex', 'Zero_ex', 'Address32_ex')]
+        Ip, Instruction_id, MemStall = [signals[name] for name in
+                                        ('Ip', 'Instruction_id', 'MemStall')]
+        RegWrite_ex, MemWrite_ex, RegWrite_mem = [signals[name] for name in
+                                                  ('RegWrite_ex', 'MemWrite_ex', 'RegWrite_mem')]
+        stop = Signal(bool(0))
+        self.clear()
+
+        @always(clk.posedge)
+        def halt():
+            #values before the edge are the ones after the previous cycle
+            cycles, reason = self._cycle, self._reason
+            if reason is None and Ip >= self.size and Instruction_id == 0 and not MemStall and \
+                    not (RegWrite_ex or MemWrite_ex or Branch_ex or RegWrite_mem):
+                reason = END
+            if reason is None and self.max_cycles is not None and cycles >= self.max_cycles:
+                reason = LIMIT
+            if reason is not None:
+                self.cycles, self.reason = cycles, reason
+                stop.next = 1
+                return
+
+            #the self branch goes to EX/MEM on this edge (unless the data
+            #cache holds the pipeline)
+            if not MemStall and Branch_ex and Zero_ex and Address32_ex == -1:
+                self._reason = SELF_BRANCH
+            self._cycle = cycles + 1
+
+        @always(stop.posedge)
+        def stopper():
+            raise StopSimulation(self.reason)
+
+        return halt, stopper
+
+    def clear(self):
+        """
+        Get ready for a new run from cycle 0.
+        """
+        self.cycles = 0
+        self.reason = None
+        self._cycle = 0
+        self._reason = None     #the self branch reached MEM
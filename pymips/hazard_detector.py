@@ -41,6 +41,38 @@ def hazard_detector(MemRead_ex, Rt_ex,
     return logic
 
 
+def branch_hazard_detector(MemRead_ex, Rt_ex,
+                           Rs_id, Rt_id,
+                           Stall,
+                           Opcode_id, RegWrite_ex, WrRegDest_ex,
+                           MemRead_mem, WrRegDest_mem
+                          ):
+    """
+    hazard_detector for branches resolved in ID (see dlx's early_branch).
+    Besides the load-use hazard, a ``beq`` in ID is stalled while one of
+    its registers is still being computed in EX, or loaded in MEM: the
+    comparator only gets forwarded values from EX/MEM and MEM/WB.
+
+    Branches are recognized by ``Opcode_id``, since control's ``Branch``
+    depends on Stall.
+    """
+
+    @always_comb
+    def logic():
+        if MemRead_ex == 1 and (Rt_ex == Rs_id or Rt_ex == Rt_id):
+            Stall.next = 1
+        elif Opcode_id == 0x04 and RegWrite_ex == 1 and WrRegDest_ex != 0 and \
+                (WrRegDest_ex == Rs_id or WrRegDest_ex == Rt_id):
+            Stall.next = 1
+        elif Opcode_id == 0x04 and MemRead_mem == 1 and WrRegDest_mem != 0 and \
+                (WrRegDest_mem == Rs_id or WrRegDest_mem == Rt_id):
+            Stall.next = 1
+        else:
+            Stall.next = 0
+
+    return logic
+
+
 
 import unittest
 
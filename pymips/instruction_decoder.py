@@ -9,10 +9,12 @@ Instruction decoder
 from myhdl import Signal, delay, always_comb, always, Simulation, \
                   intbv, bin, instance, now, toVHDL
 
+import predecode
 
 
 
-def instruction_dec(instruction, opcode, rs, rt, rd, shamt, func, address, NopSignal=Signal(intbv(0)[1:]) ):
+
+def instruction_dec(instruction, opcode, rs, rt, rd, shamt, func, address, NopSignal=Signal(intbv(0)[1:]), predecoded=False):
     """
 
     Decode segments of 32bits encoded instruction
@@ -24,9 +26,50 @@ def instruction_dec(instruction, opcode, rs, rt, rd, shamt, func, address, NopSi
     shamt = Signal(intbv(0)[5:])    #instruction 10:6   - 
     func = Signal(intbv(0)[6:])     #instruction 5:0    - to ALUCtrl
     address = Signal(intbv(0)[16:]) #instruction 15:0   - to Sign Extend
-    
+
+    With plain int signals (dlx's fast_arithmetic), the fields are
+    shifted and masked out of int(instruction). Not convertible then.
+
+    predecoded -- take the fields from the ``predecode.Decoded`` record of
+                  the word (decoded once, when the program is loaded)
+                  instead of slicing it on every instruction. Not
+                  convertible.
     """
 
+    if predecoded:
+        @always_comb
+        def decode_predecoded():
+            d = predecode.decode(int(instruction))
+            opcode.next = d.opcode
+            rs.next = d.rs
+            rt.next = d.rt
+            rd.next = d.rd
+            shamt.next = d.shamt
+            func.next = d.funct
+            address.next = d.immediate
+            NopSignal.next = d.nop
+
+        return decode_predecoded
+
+    if not isinstance(opcode.val, intbv):
+        @always_comb
+        def decode_int():
+            i = int(instruction)
+            opcode.next = (i >> 26) & 0x3f
+            rs.next = (i >> 21) & 0x1f
+            rt.next = (i >> 16) & 0x1f
+            rd.next = (i >> 11) & 0x1f
+            shamt.next = (i >> 6) & 0x1f
+            func.next = i & 0x3f
+            address.next = ((i & 0xffff) ^ 0x8000) - 0x8000
+
+            if i == 0:
+                NopSignal.next = 1
+            else:
+                NopSignal.next = 0
+
+        return decode_int
+
     @always_comb
     def decode():
         opcode.next = instruction[32:26]
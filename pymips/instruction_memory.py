@@ -9,38 +9,48 @@ Instruction memory
 from myhdl import Signal, delay, always_comb, now, Simulation, \
                   intbv, bin, instance, instances, toVHDL, toVerilog
 
+from program import load_image, DEFAULT_PROGRAM
 
-def load_program(ROM, program=None, comment_char='#' ):
+
+ROM_SIZE = 32   #minimum words of the ROM. Programs are padded with NOPs
+
+ROM = (0,) * ROM_SIZE   #default ROM of instruction_memory. See load_program
+
+
+def load_program(program=None, size=ROM_SIZE, format=None, comment_char='#'):
+    """
+    Load ``program`` (by default, programs/simple.txt) as the default ROM.
+
+    The ROM is sized from the image (at least ``size`` words) and large
+    binary images are mapped instead of read (see program.load_image).
+    It must be loaded before the processor is instantiated.
+    """
+    global ROM
     if program is None:
-        try:
-            import sys
-            program = sys.argv[1]
-            import pdb;pdb.set_trace()
-        except IndexError:
-            #default
-            program= '../programs/simple.txt'
-
-    index = 0
-    for line in open(program):
-        line = line.partition(comment_char)[0]
-        line = line.replace(' ', '')
-        if len(line) == 32:
-            ROM[index] = int(line, 2)
-            index += 1
-
-    return tuple(ROM)
-
-ROM = load_program([0] * 32)
-
-def instruction_memory(address, instruction):
+        program = DEFAULT_PROGRAM
+
+    ROM = load_image(program, format, size, comment_char)
+    return ROM
+
+
+def instruction_memory(address, instruction, rom=None):
     """
     address -- the pointer defined by PC
     instruction -- 32 bit encoded instruction
+    rom -- sequence of words (default: the ROM given to load_program).
+           Addresses beyond its end read 0 (NOP).
     """
 
+    if rom is None:
+        rom = ROM
+    size = len(rom)
+
     @always_comb
     def logic():
-            instruction.next = ROM[int(address)]
+        if address < size:
+            instruction.next = rom[int(address)]
+        else:
+            instruction.next = 0
     return logic
 
 
@@ -67,6 +77,7 @@ def testBench():
 
 
 def main():
+    load_program()
     sim = Simulation(testBench())
     sim.run()
 
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+ISA level interpreter
+"""
+
+import sys
+
+from program import load_image, DEFAULT_PROGRAM
+from predecode import predecode, ALU_AND, ALU_OR, ALU_ADD, ALU_SUB, \
+                      ALU_SLT, ALU_NOR, ALU_OP, LOAD, STORE, BRANCH, ILLEGAL
+from halt import SELF_BRANCH, END
+
+
+MIN = -(2**31)
+MAX = 2**31 - 1
+
+
+def wrap32(value):
+    """
+    Wrap ``value`` to a 32 bits two's complement integer.
+    """
+    value &= 0xffffffff
+    if value > MAX:
+        value -= 2**32
+    return value
+
+
+def alu(control, op1, op2):
+    """
+    Same function that alu.ALU implements, wrapped to 32 bits instead of
+    raising on overflow.
+    """
+    if control == ALU_AND:
+        return op1 & op2
+    elif control == ALU_OR:
+        return op1 | op2
+    elif control == ALU_ADD:
+        return wrap32(op1 + op2)
+    elif control == ALU_SUB:
+        return wrap32(op1 - op2)
+    elif control == ALU_SLT:
+        return int(op1 < op2)
+    elif control == ALU_NOR:
+        return ~(op1 | op2)
+    raise ValueError('Unknown ALU control %s' % bin(control))
+
+
+def initial_registers(depth=32):
+    """
+    Register values after power on, as register_file initializes them.
+    """
+    return [i + 1 for i in range(depth)]
+
+
+def initial_memory(size=1024):
+    """
+    Data memory contents after power on, as data_memory initializes it.
+    """
+    mem = [0] * size
+    mem[7] = 51
+    return mem
+
+
+class ISA(object):
+    """
+    Instruction accurate (not cycle accurate) model of the DLX.
+
+    It executes one instruction per step with the semantics of
+    control.control, alu_control.alu_control and alu.ALU, using plain
+    python ints and lists instead of MyHDL signals.
+
+    rom -- sequence of 32 bits encoded instructions
+    registers -- initial register file (default: ``initial_registers()``)
+    memory -- initial data memory (default: ``initial_memory()``)
+
+    ``registers`` and ``memory`` are updated in place.
+    """
+
+    def __init__(self, rom, registers=None, memory=None):
+        self.rom = rom
+        self.registers = initial_registers() if registers is None else registers
+        self.memory = initial_memory() if memory is None else memory
+        self.pc = 0
+        self.steps = 0
+        self.halted = None      #why the program halted, see halt.Halt
+        self._decoded = [(d.kind, d.rs, d.rt, d.dest, d.alu_control, d.immediate)
+                         for d in predecode(rom)]
+
+    def run(self, max_steps=None):
+        """
+        Execute until the program halts (a taken ``beq r, r, -1`` or the
+        PC leaving the program) or ``max_steps`` instructions were
+        executed. Return the number of executed steps.
+        """
+        decoded = self._decoded
+        regs = self.registers
+        mem = self.memory
+        size = len(decoded)
+        pc = self.pc
+        steps = 0
+        limit = -1 if max_steps is None else max_steps
+        halted = None
+
+        while 0 <= pc < size and steps != limit:
+            kind, rs, rt, dest, control, immediate = decoded[pc]
+            if kind == ILLEGAL:
+                self.pc = pc
+                self.steps += steps
+                raise ValueError('Unsupported instruction %08x at %i'
+                                 % (self.rom[pc], pc))
+            steps += 1
+            pc += 1
+
+            if kind == ALU_OP:
+                regs[dest] = alu(control, regs[rs], regs[rt])
+
+            elif kind == LOAD:
+                regs[dest] = mem[wrap32(regs[rs] + immediate)]
+
+            elif kind == STORE:
+                mem[wrap32(regs[rs] + immediate)] = regs[rt]
+
+            elif kind == BRANCH:
+                if regs[rs] == regs[rt]:
+                    if immediate == -1:
+                        halted = SELF_BRANCH
+                        pc -= 1
+                        break
+                    pc += immediate
+
+        if halted is None and not 0 <= pc < size:
+            halted = END
+        self.halted = halted
+        self.pc = pc
+        self.steps += steps
+        return steps
+
+
+def main():
+    program = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROGRAM
+    max_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    isa = ISA(load_image(program))
+    isa.run(max_steps)
+
+    print 'steps: %i | pc: %i | halted: %s' % (isa.steps, isa.pc, isa.halted)
+    print 'reg:', isa.registers
+    print 'mem:', [(i, v) for (i, v) in enumerate(isa.memory) if v]
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Latch of a branch resolved in ID
+"""
+
+import random
+
+from myhdl import Signal, delay, always_comb, always, Simulation, \
+                  intbv, bin, instance, instances, now, toVHDL
+
+
+def latch_branch(clk, taken_in, target_in, taken_out, target_out):
+    """
+    Keeps the decision of a branch resolved in ID for the next cycle, when
+    the program counter loads the target on the negative edge.
+
+    clk -- trigger
+    taken_in -- 1bit signal input. The branch is taken
+    target_in -- 32 bits signal input. The branch target
+    taken_out -- 1bit signal output, the program counter source
+    target_out -- 32 bits signal output
+    """
+
+    @always(clk.posedge)
+    def latch():
+        taken_out.next = taken_in
+        target_out.next = target_in
+
+    return latch
+
+
+def testBench():
+
+    target_in, target_out = [Signal(intbv(0)[32:]) for i in range(2)]
+    clk, taken_in, taken_out = [Signal(intbv(0)[1:]) for i in range(3)]
+
+    latch_inst = toVHDL(latch_branch, clk, taken_in, target_in, taken_out, target_out)
+
+    @instance
+    def stimulus():
+        for i in range(10):
+            target_in.next = random.randint(0, 255)
+            taken_in.next = random.randint(0, 1)
+            clk.next = 1
+            yield delay(1)
+            print "Inputs: %i %i | Output: %i %i" % (taken_in, target_in, taken_out, target_out)
+            clk.next = 0
+            yield delay(1)
+
+    return instances()
+
+
+def main():
+    sim = Simulation(testBench())
+    sim.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Pipeline register of a whole bundle of fields
+"""
+
+import random
+
+from myhdl import Signal, delay, always_comb, always, Simulation, \
+                  intbv, bin, instance, instances, now, toVHDL
+
+
+def latch_bundle(clk, rst, bundle_in, bundle_out):
+    """
+    Latch a bundle: the fields of a pipeline stage packed in one wide
+    signal (see latch_id_ex_bundled, latch_ex_mem_bundled and
+    latch_mem_wb_bundled). A stage transition is a single signal update
+    instead of one per field.
+
+    clk -- trigger
+    rst -- clears every field
+    bundle_in -- the fields, packed with concat
+    bundle_out -- the same width as bundle_in
+    """
+
+    @always(clk.posedge, rst.posedge)
+    def latch():
+        if rst == 1:
+            bundle_out.next = 0
+        else:
+            bundle_out.next = bundle_in
+
+    return latch
+
+
+def testBench():
+    """
+    Convert the bundled ID/EX latch, with the signals of dlx, and check it
+    against latch_id_ex.
+    """
+    from latch_id_ex import latch_id_ex, latch_id_ex_bundled
+
+    def fields():
+        words = [Signal(intbv(0)[32:])] + [Signal(intbv(0, min=-(2**31), max=2**31-1)) for i in range(3)]
+        registers = [Signal(intbv(0)[5:]) for i in range(3)] + [Signal(intbv(0)[6:])]
+        control = [Signal(intbv(0)[1:]), Signal(intbv(0)[2:])] + [Signal(intbv(0)[1:]) for i in range(6)]
+        return words + registers + control
+
+    inputs, outputs, expected = fields(), fields(), fields()
+    clk, rst = [Signal(intbv(0)[1:]) for i in range(2)]
+
+    latch_inst = toVHDL(latch_id_ex_bundled, clk, rst, *(inputs + outputs))
+    reference = latch_id_ex(clk, rst, *(inputs + expected))
+
+    @instance
+    def stimulus():
+        for i in range(10):
+            for sig in inputs:
+                sig.next = random.randint(sig.min or 0, sig.max - 1)
+            rst.next = random.random() > 0.75
+            yield delay(1)
+            clk.next = 1
+            yield delay(1)
+            print "rst: %i | %s | %s" % (rst, ' '.join('%i' % sig for sig in outputs),
+                                         'ok' if outputs == expected else 'expected %s' % expected)
+            clk.next = 0
+            rst.next = 0
+
+    return instances()
+
+
+def main():
+    sim = Simulation(testBench())
+    sim.run()
+
+if __name__ == '__main__':
+    main()
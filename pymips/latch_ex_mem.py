@@ -10,8 +10,9 @@ import random
 
 
 from myhdl import Signal, delay, always_comb, always, Simulation, \
-                  intbv, bin, instance, instances, now, toVHDL
+                  intbv, bin, instance, instances, now, toVHDL, concat
 
+from latch_bundle import latch_bundle
 
 
 def latch_ex_mem(clk, rst, 
@@ -62,6 +63,51 @@ def latch_ex_mem(clk, rst,
     return latch
 
 
+def latch_ex_mem_bundled(clk, rst,
+                         branch_adder_in,
+                         alu_result_in, zero_in,
+                         data2_in, wr_reg_in,
+                         Branch_in, MemRead_in, MemWrite_in,
+                         RegWrite_in, MemtoReg_in,
+                         branch_adder_out,
+                         alu_result_out, zero_out,
+                         data2_out, wr_reg_out,
+                         Branch_out, MemRead_out, MemWrite_out,
+                         RegWrite_out, MemtoReg_out,
+                        ):
+    """
+    latch_ex_mem with its fields packed in one 134 bits latch_bundle:
+
+      wr_reg [134:102] (unsigned), branch_adder [102:70], alu_result [70:38],
+      data2 [38:6] (signed), zero [5], Branch [4], MemRead [3], MemWrite [2],
+      RegWrite [1], MemtoReg [0]
+    """
+
+    bundle_in, bundle_out = [Signal(intbv(0)[134:]) for i in range(2)]
+
+    @always_comb
+    def pack():
+        bundle_in.next = concat(wr_reg_in, branch_adder_in, alu_result_in, data2_in, zero_in,
+                                Branch_in, MemRead_in, MemWrite_in, RegWrite_in, MemtoReg_in)
+
+    latch = latch_bundle(clk, rst, bundle_in, bundle_out)
+
+    @always_comb
+    def unpack():
+        wr_reg_out.next = bundle_out[134:102]
+        branch_adder_out.next = bundle_out[102:70].signed()
+        alu_result_out.next = bundle_out[70:38].signed()
+        data2_out.next = bundle_out[38:6].signed()
+        zero_out.next = bundle_out[5]
+        Branch_out.next = bundle_out[4]
+        MemRead_out.next = bundle_out[3]
+        MemWrite_out.next = bundle_out[2]
+        RegWrite_out.next = bundle_out[1]
+        MemtoReg_out.next = bundle_out[0]
+
+    return pack, latch, unpack
+
+
 def testBench():
 
     branch_adder_in, alu_result_in, data2_in, wr_reg_in = [Signal(intbv(random.randint(-255, 255), min=-(2**31), max=2**31-1)) for i in range(4)]
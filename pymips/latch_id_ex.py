@@ -10,8 +10,9 @@ import random
 
 
 from myhdl import Signal, delay, always_comb, always, Simulation, \
-                  intbv, bin, instance, instances, now, toVHDL
+                  intbv, bin, instance, instances, now, toVHDL, concat
 
+from latch_bundle import latch_bundle
 
 
 def latch_id_ex(clk, rst, 
@@ -78,6 +79,61 @@ def latch_id_ex(clk, rst,
     return latch
 
 
+def latch_id_ex_bundled(clk, rst,
+                        pc_adder_in,
+                        data1_in, data2_in, address32_in,
+                        rs_in, rt_in, rd_in, func_in,
+                        RegDst_in, ALUop_in, ALUSrc_in,
+                        Branch_in, MemRead_in, MemWrite_in,
+                        RegWrite_in, MemtoReg_in,
+                        pc_adder_out,
+                        data1_out, data2_out, address32_out,
+                        rs_out, rt_out, rd_out, func_out,
+                        RegDst_out, ALUop_out, ALUSrc_out,
+                        Branch_out, MemRead_out, MemWrite_out,
+                        RegWrite_out, MemtoReg_out,
+                       ):
+    """
+    latch_id_ex with its fields packed in one 158 bits latch_bundle:
+
+      pc_adder [158:126] (unsigned), data1 [126:94], data2 [94:62],
+      address32 [62:30] (signed), rs [30:25], rt [25:20], rd [20:15],
+      func [15:9], RegDst [8], ALUop [8:6] (2 bits), ALUSrc [5], Branch [4],
+      MemRead [3], MemWrite [2], RegWrite [1], MemtoReg [0]
+    """
+
+    bundle_in, bundle_out = [Signal(intbv(0)[158:]) for i in range(2)]
+
+    @always_comb
+    def pack():
+        bundle_in.next = concat(pc_adder_in, data1_in, data2_in, address32_in,
+                                rs_in, rt_in, rd_in, func_in, RegDst_in, ALUop_in, ALUSrc_in,
+                                Branch_in, MemRead_in, MemWrite_in, RegWrite_in, MemtoReg_in)
+
+    latch = latch_bundle(clk, rst, bundle_in, bundle_out)
+
+    @always_comb
+    def unpack():
+        pc_adder_out.next = bundle_out[158:126]
+        data1_out.next = bundle_out[126:94].signed()
+        data2_out.next = bundle_out[94:62].signed()
+        address32_out.next = bundle_out[62:30].signed()
+        rs_out.next = bundle_out[30:25]
+        rt_out.next = bundle_out[25:20]
+        rd_out.next = bundle_out[20:15]
+        func_out.next = bundle_out[15:9]
+        RegDst_out.next = bundle_out[8]
+        ALUop_out.next = bundle_out[8:6]
+        ALUSrc_out.next = bundle_out[5]
+        Branch_out.next = bundle_out[4]
+        MemRead_out.next = bundle_out[3]
+        MemWrite_out.next = bundle_out[2]
+        RegWrite_out.next = bundle_out[1]
+        MemtoReg_out.next = bundle_out[0]
+
+    return pack, latch, unpack
+
+
 def testBench():
 
     pc_adder_in, data1_in, data2_in, address32_in = [Signal(intbv(random.randint(-255, 255), min=-(2**31), max=2**31-1)) for i in range(4)]
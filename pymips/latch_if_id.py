@@ -14,7 +14,8 @@ from myhdl import Signal, delay, always_comb, always, Simulation, \
 
 
 
-def latch_if_id(clk, rst, instruction_in, pc_adder_in, instruction_out, pc_adder_out, stall=Signal(intbv(0)[1:]) ):
+def latch_if_id(clk, rst, instruction_in, pc_adder_in, instruction_out, pc_adder_out, stall=Signal(intbv(0)[1:]),
+                flush=Signal(intbv(0)[1:]) ):
     """
     Latch to control state between Instruction Fetch and Instruction Decoder
 
@@ -26,6 +27,7 @@ def latch_if_id(clk, rst, instruction_in, pc_adder_in, instruction_out, pc_adder
     pc_adder_out -- 32 bits signal output for pc_add
 
     stall -- inhibit the count increment
+    flush -- load a NOP on the next edge (a branch taken in ID)
     """
 
     @always(clk.posedge, rst.posedge)
@@ -36,7 +38,10 @@ def latch_if_id(clk, rst, instruction_in, pc_adder_in, instruction_out, pc_adder
             pc_adder_out.next = 0
         
         else:
-            if not stall:
+            if flush:
+                instruction_out.next = 0
+                pc_adder_out.next = 0
+            elif not stall:
                 instruction_out.next = instruction_in
                 pc_adder_out.next = pc_adder_in
 
@@ -10,8 +10,9 @@ import random
 
 
 from myhdl import Signal, delay, always_comb, always, Simulation, \
-                  intbv, bin, instance, instances, now, toVHDL
+                  intbv, bin, instance, instances, now, toVHDL, concat
 
+from latch_bundle import latch_bundle
 
 
 def latch_mem_wb(clk, rst, 
@@ -48,6 +49,42 @@ def latch_mem_wb(clk, rst,
     return latch
 
 
+def latch_mem_wb_bundled(clk, rst,
+                         ram_in,
+                         alu_result_in,
+                         wr_reg_in,
+                         RegWrite_in, MemtoReg_in,
+                         ram_out,
+                         alu_result_out,
+                         wr_reg_out,
+                         RegWrite_out, MemtoReg_out,
+                        ):
+    """
+    latch_mem_wb with its fields packed in one 98 bits latch_bundle:
+
+      wr_reg [98:66] (unsigned), ram [66:34], alu_result [34:2] (signed),
+      RegWrite [1], MemtoReg [0]
+    """
+
+    bundle_in, bundle_out = [Signal(intbv(0)[98:]) for i in range(2)]
+
+    @always_comb
+    def pack():
+        bundle_in.next = concat(wr_reg_in, ram_in, alu_result_in, RegWrite_in, MemtoReg_in)
+
+    latch = latch_bundle(clk, rst, bundle_in, bundle_out)
+
+    @always_comb
+    def unpack():
+        wr_reg_out.next = bundle_out[98:66]
+        ram_out.next = bundle_out[66:34].signed()
+        alu_result_out.next = bundle_out[34:2].signed()
+        RegWrite_out.next = bundle_out[1]
+        MemtoReg_out.next = bundle_out[0]
+
+    return pack, latch, unpack
+
+
 def testBench():
 
     ram_in, alu_result_in, wr_reg_in = [Signal(intbv(random.randint(-255, 255), min=-(2**31), max=2**31-1)) for i in range(3)]
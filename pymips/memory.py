@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Data memory models
+"""
+
+import sys
+import zlib
+from array import array
+
+
+ADDRESS_SPACE = 2**32   #words addressable with a 32 bits address bus
+PAGE_BITS = 10          #1024 words (4KB) per page
+CHUNK = 1024            #words compared at once by DenseMemory.compare
+
+
+class PagedMemory(object):
+    """
+    Sparse word addressed memory for the whole 32 bits address space.
+
+    Pages of ``2**page_bits`` words are allocated on the first write to
+    them, so untouched words cost nothing and read as 0. Addresses wrap
+    to 32 bits: -1 is the last word of the address space.
+
+    contents -- initial contents: a sequence of words (from address 0) or
+                a mapping of ``{address: word}``
+    """
+
+    def __init__(self, contents=None, page_bits=PAGE_BITS):
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self._mask = self.page_size - 1
+        self._empty = array('i', [0]) * self.page_size
+        self.pages = {}
+        if contents is not None:
+            self.update(contents)
+
+    def __getitem__(self, address):
+        address &= 0xffffffff
+        page = self.pages.get(address >> self.page_bits)
+        if page is None:
+            return 0
+        return page[address & self._mask]
+
+    def __setitem__(self, address, value):
+        address &= 0xffffffff
+        number = address >> self.page_bits
+        page = self.pages.get(number)
+        if page is None:
+            if not value:
+                return
+            page = self.pages[number] = array('i', self._empty)
+        page[address & self._mask] = int(value)
+
+    def clear(self):
+        """
+        Set every word to 0, releasing the pages.
+        """
+        self.pages.clear()
+
+    def update(self, contents):
+        """
+        Write ``contents``: a sequence of words (from address 0) or a
+        mapping of ``{address: word}``.
+        """
+        if hasattr(contents, 'items'):
+            contents = contents.items()
+        else:
+            contents = enumerate(contents)
+        for address, value in contents:
+            self[address] = value
+
+    def items(self):
+        """
+        Return the sorted list of ``(address, word)`` of the non zero words.
+        """
+        items = []
+        for number in sorted(self.pages):
+            base = number << self.page_bits
+            items.extend((base + offset, value)
+                         for offset, value in enumerate(self.pages[number]) if value)
+        return items
+
+    def checksum(self):
+        """
+        CRC32 of the contents (the allocated pages and their numbers).
+        Pages of zeros are skipped, so it only depends on the contents.
+        """
+        crc = 0
+        for number in sorted(self.pages):
+            page = self.pages[number]
+            if any(page):
+                crc = zlib.crc32(str(number), crc)
+                crc = zlib.crc32(_view(page), crc)
+        return crc & 0xffffffff
+
+    def allocated(self):
+        """
+        Bytes allocated by the pages.
+        """
+        return len(self.pages) * self.page_size * self._empty.itemsize
+
+    def __repr__(self):
+        return 'PagedMemory(%i pages of %i words)' % (len(self.pages), self.page_size)
+
+
+def _view(words):
+    """
+    Bytes of an array, without copying them.
+    """
+    try:
+        return memoryview(words)
+    except TypeError:   #python 2 arrays only export the old buffer interface
+        return buffer(words)
+
+
+class DenseMemory(object):
+    """
+    Word addressed memory of ``size`` words kept in a single contiguous
+    ``array('i')``, so the whole image can be exported, dumped, compared
+    and checksummed without touching every word from python.
+
+    Indexes behave as in data_memory (a list of ``size`` words).
+
+    contents -- initial contents: a sequence of words (from address 0) or
+                a mapping of ``{address: word}``
+    """
+
+    def __init__(self, size=1024, contents=None):
+        self.words = array('i', [0]) * size
+        if contents is not None:
+            self.update(contents)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, address):
+        return self.words[address]
+
+    def __setitem__(self, address, value):
+        self.words[address] = int(value)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def clear(self):
+        """
+        Set every word to 0.
+        """
+        self.words[:] = array('i', [0]) * len(self.words)
+
+    def update(self, contents):
+        """
+        Write ``contents``: a sequence of words (from address 0) or a
+        mapping of ``{address: word}``. The memory is never resized:
+        contents beyond its end raise IndexError.
+        """
+        if hasattr(contents, 'items'):
+            for address, value in contents.items():
+                self[address] = value
+        else:
+            if len(contents) > len(self.words):
+                raise IndexError('%i words do not fit in a memory of %i'
+                                 % (len(contents), len(self.words)))
+            self.words[:len(contents)] = array('i', contents)
+
+    def items(self):
+        """
+        Return the sorted list of ``(address, word)`` of the non zero words.
+        """
+        return [(address, value) for (address, value) in enumerate(self.words) if value]
+
+    def snapshot(self):
+        """
+        Return a copy of the contents as a list.
+        """
+        return self.words.tolist()
+
+    def view(self):
+        """
+        Return a read only view of the raw bytes (native order), without
+        copying them.
+        """
+        return _view(self.words)
+
+    def as_numpy(self):
+        """
+        Return a NumPy int32 array sharing the memory contents.
+        Requires NumPy.
+        """
+        import numpy
+        return numpy.frombuffer(self.words, dtype=numpy.int32)
+
+    def checksum(self):
+        """
+        CRC32 of the contents, as dumped by ``dump``.
+        """
+        return zlib.crc32(self._little_endian()) & 0xffffffff
+
+    def dump(self, path):
+        """
+        Write the contents as a binary image of 32 bits little endian
+        words (see program.WordImage).
+        """
+        with open(path, 'wb') as image:
+            image.write(self._little_endian())
+
+    @classmethod
+    def load(cls, path, size=0):
+        """
+        Return a memory with the contents of a binary image written by
+        ``dump``, at least ``size`` words long.
+        """
+        with open(path, 'rb') as image:
+            data = image.read()
+        if len(data) % 4:
+            raise ValueError('%s: %i bytes is not a whole number of words'
+                             % (path, len(data)))
+        words = array('i')
+        words.fromstring(data)
+        if sys.byteorder == 'big':
+            words.byteswap()
+        if len(words) < size:
+            words.extend(array('i', [0]) * (size - len(words)))
+        memory = cls(0)
+        memory.words = words
+        return memory
+
+    def compare(self, other):
+        """
+        Return the sorted list of ``(address, word, other word)`` where
+        this memory differs from ``other`` (another DenseMemory or a
+        sequence of words of the same size).
+
+        Equal chunks are skipped in C, so only the ones that differ are
+        scanned word by word.
+        """
+        words = self.words
+        other = getattr(other, 'words', other)
+        if len(other) != len(words):
+            raise ValueError('Memories of different size: %i and %i words'
+                             % (len(words), len(other)))
+        if not isinstance(other, array):
+            other = array('i', other)
+        mine, theirs = _view(words), _view(other)
+        if mine == theirs:
+            return []
+
+        differences = []
+        step = CHUNK * words.itemsize
+        for start in xrange(0, len(mine), step):
+            if mine[start:start + step] != theirs[start:start + step]:
+                base = start // words.itemsize
+                differences.extend((base + offset, a, b) for (offset, (a, b))
+                                   in enumerate(zip(words[base:base + CHUNK],
+                                                    other[base:base + CHUNK]))
+                                   if a != b)
+        return differences
+
+    def _little_endian(self):
+        if sys.byteorder == 'big':
+            words = array('i', self.words)
+            words.byteswap()
+            return words.tostring()
+        return self.view()
+
+    def __repr__(self):
+        return 'DenseMemory(%i words)' % len(self.words)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Branch misprediction detector
+"""
+
+import random
+
+from myhdl import Signal, delay, always_comb, always, Simulation, \
+                  intbv, bin, instance, instances, now, toVHDL
+
+
+def mispredict(branch, taken, predicted, redirect):
+    """
+    branch: the instruction in ID is a branch
+    taken: the branch is taken
+    predicted: it was predicted taken when it was fetched
+    redirect: ``1`` when the prediction was wrong, so the instruction
+              fetched after the branch has to be flushed
+    """
+
+    @always_comb
+    def logic():
+        if branch == 1 and taken != predicted:
+            redirect.next = 1
+        else:
+            redirect.next = 0
+
+    return logic
+
+
+### TESTBENCHS
+
+def testBench_mispredict():
+
+    branch_i, taken_i, predicted_i, redirect_i = [Signal(intbv(0)[1:]) for i in range(4)]
+
+    mispredict_i = toVHDL(mispredict, branch_i, taken_i, predicted_i, redirect_i)
+
+    @instance
+    def stimulus():
+        for i in range(8):
+            branch_i.next = random.randint(0, 1)
+            taken_i.next = random.randint(0, 1)
+            predicted_i.next = random.randint(0, 1)
+
+            yield delay(2)
+
+            print "%i %i %i | %i " % (branch_i, taken_i, predicted_i, redirect_i)
+
+    return instances()
+
+
+def main():
+    sim = Simulation(testBench_mispredict())
+    sim.run()
+
+if __name__ == '__main__':
+    main()
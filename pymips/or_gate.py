@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+
+"""
+OR gate
+"""
+
+from myhdl import always_comb
+
+
+def or_gate(op1, op2, out):
+    """
+    op1: operator 1. 
+    op2: operator 2. 
+    out: or
+    """
+
+    @always_comb
+    def logic():
+        out.next = op1 | op2
+
+    return logic
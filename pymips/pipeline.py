@@ -6,19 +6,21 @@
 Datapath
 """
 
+import sys
+
 from myhdl import Signal, delay, always, always_comb, now, Simulation, \
                   intbv, bin, instance, instances, now, toVHDL, traceSignals
 
 from clock_driver import clock_driver
 from program_counter import program_counter
-from instruction_memory import instruction_memory
+from instruction_memory import instruction_memory, load_program
 from instruction_decoder import instruction_dec
 from alu import ALU
 
 from alu_control import alu_control
 from and_gate import and_gate
 from control import control
-from register_file import register_file
+from register_file import register_file, register_file_model, print_registers
 from sign_extender import sign_extend
 from mux import mux2, mux4
 from data_memory import data_memory
@@ -27,8 +29,12 @@ from latch_if_id import latch_if_id
 from latch_id_ex import latch_id_ex
 from latch_ex_mem import latch_ex_mem
 from latch_mem_wb import latch_mem_wb
+from trace import signals_of
+from memory import DenseMemory
+from isa import initial_registers
 
 DEBUG = True  #set to false to convert 
+PRINT_REGISTERS = False  #print the first registers on every cycle (see register_file.print_registers)
 
 
 import random
@@ -41,7 +47,8 @@ MAX_16 = 2**15 - 1
 
 
 
-def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])):
+def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:]), rom=None,
+             retirement=None, registers=None):
 
     """
     A DLX processor with 5 pipeline stages. 
@@ -65,6 +72,13 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
       For example: ``PcAdderO_if``  before IF/ID latch is the same signal than 
       ``PcAdderO_id`` after it. 
 
+    rom -- program image (default: the ROM loaded with
+           ``instruction_memory.load_program``)
+    retirement -- a ``cosim.PipelineRetirement`` reporting the writes to
+                  the register file and the data memory. Not convertible.
+    registers -- register values, a ``memory.DenseMemory`` (default: the
+                 Signals of ``register_file``). Not convertible.
+
     """
 
     ##############################
@@ -99,7 +113,7 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
 
     Ip = Signal(intbv(0)[32:] ) #connect PC with intruction_memory
     Instruction_if = Signal(intbv(0)[32:])   #32 bits instruction line.
-    im = instruction_memory (Ip, Instruction_if)
+    im = instruction_memory (Ip, Instruction_if, rom)
 
     #PC
     NextIp =  Signal(intbv(0)[32:] )   #output of mux_branch - input of pc
@@ -163,7 +177,12 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
     Data1_id =  Signal(intbv(0, min=MIN, max=MAX))
     Data2_id =  Signal(intbv(0, min=MIN, max=MAX))
 
-    register_file_i = register_file(Clk, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, depth=32)
+    if registers is None:
+        register_file_i = register_file(Clk, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, depth=32,
+                                        trace=print_registers if PRINT_REGISTERS else None)
+    else:
+        register_file_i = register_file_model(Clk, Rs_id, Rt_id, WrRegDest_wb, MuxMemO_wb, RegWrite_wb, Data1_id, Data2_id, registers,
+                                              trace=print_registers if PRINT_REGISTERS else None)
     
     
     
@@ -194,7 +213,7 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
     latch_id_ex_ = latch_id_ex(Clk, Reset, 
                                 PcAdderOut_id, 
                                 Data1_id, Data2_id, Address32_id,
-                                Rd_id, Rt_id, Func_id, 
+                                Rs_id, Rt_id, Rd_id, Func_id, 
                                 
                                 RegDst_id, ALUop_id, ALUSrc_id,     #signals to EX pipeline stage
                                 Branch_id, MemRead_id, MemWrite_id, #signals to MEM pipeline stage
@@ -202,7 +221,7 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
                                 
                                 PcAdderOut_ex, 
                                 Data1_ex, Data2_ex, Address32_ex,
-                                Rd_ex, Rt_ex, Func_ex, 
+                                Rs_ex, Rt_ex, Rd_ex, Func_ex, 
 
                                 RegDst_ex, ALUop_ex, ALUSrc_ex,     #signals to EX pipeline stage
                                 Branch_ex, MemRead_ex, MemWrite_ex, #signals to MEM pipeline stage
@@ -397,21 +416,24 @@ def pipeline(clk_period=1, Reset=Signal(intbv(0)[1:]), Zero=Signal(intbv(0)[1:])
                 
                 print 'DataMemOut_wb %i | AluResult_wb %i | MuxMemO_wb %i ' % (DataMemOut_wb, AluResult_wb, MuxMemO_wb)
                 print 'WrRegDest_wb %i | MuxMemO_wb %i' % (WrRegDest_wb, MuxMemO_wb)
-            
-            
+
+    if retirement is not None:
+        retirement_ = retirement.attach(Clk, signals_of(locals()))
                   
 
     return instances()
 
 
 
-def testBench():
+def testBench(registers=None):
 
 
     if not DEBUG:
         datapath_i = traceSignals(pipeline)  #() #toVHDL(datapath)
     else:
-        datapath_i = pipeline()
+        if registers is None:
+            registers = DenseMemory(32, initial_registers(32))
+        datapath_i = pipeline(registers=registers)
 
     
 
@@ -420,8 +442,11 @@ def testBench():
 
 
 def main():
-    sim = Simulation(testBench())
+    load_program(sys.argv[1] if len(sys.argv) > 1 else None)
+    registers = DenseMemory(32, initial_registers(32))
+    sim = Simulation(testBench(registers))
     sim.run(13)
+    print 'reg:', registers.snapshot()
 
 
 if __name__ == '__main__':
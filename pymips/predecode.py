@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Predecoded instructions
+"""
+
+#opcodes decoded by control
+R_FORMAT = 0x00
+LW = 0x23
+SW = 0x2b
+BEQ = 0x04
+
+#ALU control lines (see alu.ALU)
+ALU_AND = 0b0000
+ALU_OR = 0b0001
+ALU_ADD = 0b0010
+ALU_SUB = 0b0110
+ALU_SLT = 0b0111
+ALU_NOR = 0b1100
+
+#kind of instruction, once decoded
+NOP, ALU_OP, LOAD, STORE, BRANCH, ILLEGAL = range(6)
+
+#control bundle, in the order latch_id_ex takes them:
+#(RegDst, ALUop, ALUSrc, Branch, MemRead, MemWrite, RegWrite, MemtoReg)
+NO_CONTROL = (0, 0b00, 0, 0, 0, 0, 0, 0)
+
+
+def control_lines(opcode, nop=0, stall=0, previous=NO_CONTROL):
+    """
+    Same function that control.control implements.
+
+    The hardware doesn't assign every line for every opcode (RegDst and
+    MemtoReg for ``sw`` and ``beq``, all of them for unknown opcodes), so
+    those keep the value they had in ``previous``.
+    """
+    if nop or stall:
+        return NO_CONTROL
+    elif opcode == R_FORMAT:
+        return (1, 0b10, 0, 0, 0, 0, 1, 0)
+    elif opcode == LW:
+        return (0, 0b00, 1, 0, 1, 0, 1, 1)
+    elif opcode == SW:
+        return (previous[0], 0b00, 1, 0, 0, 1, 0, previous[7])
+    elif opcode == BEQ:
+        return (previous[0], 0b01, 0, 1, 0, 0, 0, previous[7])
+    return previous
+
+
+def alu_control_lines(aluop, funct):
+    """
+    Same function that alu_control.alu_control implements.
+
+    Note the hardware only looks at the 3 lower bits of the funct field,
+    so ``slt`` (101010) is decoded exactly like ``sub`` (100010).
+    """
+    if aluop == 0b00:
+        return ALU_ADD
+    elif aluop & 0b01:
+        return ALU_SUB
+
+    funct &= 0b111
+    if funct == 0b000:
+        return ALU_ADD
+    elif funct == 0b010:
+        return ALU_SUB
+    elif funct == 0b100:
+        return ALU_AND
+    elif funct == 0b101:
+        return ALU_OR
+    return ALU_AND
+
+
+#ALU_CONTROL[aluop][funct] == alu_control_lines(aluop, funct)
+ALU_CONTROL = tuple(tuple(alu_control_lines(aluop, funct) for funct in range(64))
+                    for aluop in range(4))
+
+
+class Decoded(object):
+    """
+    An instruction word decoded once, with everything instruction_dec,
+    sign_extend, control and alu_control derive from it.
+
+    control -- control lines when neither NOP nor stalled. If ``holds`` is
+               set, some of them depend on the previous instruction
+               (see ``control_lines``) and are 0 here.
+    alu_control -- ALU control lines given ``control``'s ALUop
+    kind -- NOP, ALU_OP, LOAD, STORE, BRANCH or ILLEGAL
+    dest -- register written by the instruction (0 if none)
+    """
+
+    __slots__ = ('word', 'opcode', 'rs', 'rt', 'rd', 'shamt', 'funct',
+                 'immediate', 'nop', 'control', 'holds', 'alu_control',
+                 'kind', 'dest')
+
+    def __init__(self, word):
+        self.word = word
+        self.opcode = opcode = word >> 26
+        self.rs = (word >> 21) & 0x1f
+        self.rt = (word >> 16) & 0x1f
+        self.rd = (word >> 11) & 0x1f
+        self.shamt = (word >> 6) & 0x1f
+        self.funct = word & 0x3f
+
+        immediate = word & 0xffff
+        if immediate & 0x8000:
+            immediate -= 0x10000
+        self.immediate = immediate
+
+        self.nop = nop = int(word == 0)
+        self.control = control_lines(opcode, nop)
+        self.holds = not nop and opcode not in (R_FORMAT, LW)
+        self.alu_control = ALU_CONTROL[self.control[1]][self.funct]
+
+        if nop:
+            self.kind, self.dest = NOP, 0
+        elif opcode == R_FORMAT:
+            self.kind, self.dest = ALU_OP, self.rd
+        elif opcode == LW:
+            self.kind, self.dest = LOAD, self.rt
+        elif opcode == SW:
+            self.kind, self.dest = STORE, 0
+        elif opcode == BEQ:
+            self.kind, self.dest = BRANCH, 0
+        else:
+            self.kind, self.dest = ILLEGAL, 0
+
+    def __repr__(self):
+        return 'Decoded(0x%08x)' % self.word
+
+
+_cache = {}
+
+def decode(word):
+    """
+    Return the (shared) ``Decoded`` record for an instruction word.
+    """
+    try:
+        return _cache[word]
+    except KeyError:
+        decoded = _cache[word] = Decoded(word)
+        return decoded
+
+
+def predecode(rom):
+    """
+    Decode every word of ``rom``. Return a tuple of ``Decoded``.
+    """
+    return tuple(decode(int(word)) for word in rom)
+
+
+NOP_INSTRUCTION = decode(0)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Branch predictors
+"""
+
+import sys
+from array import array
+
+from myhdl import always
+
+from trace import TYPECODE
+
+
+#prediction schemes
+NOT_TAKEN = 'not-taken'     #always fetch the next instruction
+BTFN = 'btfn'               #backward taken, forward not taken
+TWO_BIT = '2-bit'           #a table of 2 bits saturating counters indexed by PC
+GSHARE = 'gshare'           #the same, indexed by PC xor the global history
+
+SCHEMES = (NOT_TAKEN, BTFN, TWO_BIT, GSHARE)
+
+#2 bits counters
+STRONGLY_NOT_TAKEN, WEAKLY_NOT_TAKEN, WEAKLY_TAKEN, STRONGLY_TAKEN = range(4)
+
+
+class Predictor(object):
+    """
+    Predict the branches of dlx.dlx when they are fetched, and count how
+    well it went.
+
+    A branch target buffer (BTB), direct mapped and tagged with the whole
+    address, keeps the target of the branches that were taken: only an
+    address that hits it can be predicted taken, and then the target is
+    always right. Not taken branches aren't inserted.
+
+    scheme -- one of SCHEMES
+    entries -- counters of the 2-bit and gshare tables (a power of 2)
+    history -- bits of global history of gshare
+    btb_entries -- entries of the BTB (a power of 2)
+
+    After a run, ``branches``, ``taken``, ``mispredicts`` and ``btb_hits``
+    (fetches that hit the BTB) count what happened; ``clear()`` starts
+    over with cold tables.
+    """
+
+    def __init__(self, scheme=TWO_BIT, entries=64, history=6, btb_entries=16):
+        if scheme not in SCHEMES:
+            raise ValueError('Unknown branch prediction scheme %r' % (scheme,))
+        for name, value in (('entries', entries), ('btb_entries', btb_entries)):
+            if value < 1 or value & (value - 1):
+                raise ValueError('%s must be a power of 2, not %r' % (name, value))
+        self.scheme = scheme
+        self.entries = entries
+        self.history_bits = history
+        self.btb_entries = btb_entries
+        self.clear()
+
+    def clear(self):
+        """
+        Forget every branch and the counts, for a new run.
+        """
+        self.counters = array('B', [WEAKLY_NOT_TAKEN]) * self.entries
+        self.history = 0
+        self.btb_tags = array(TYPECODE, [-1]) * self.btb_entries
+        self.btb_targets = array(TYPECODE, [0]) * self.btb_entries
+        self.branches = self.taken = self.mispredicts = self.btb_hits = 0
+
+    def _index(self, pc):
+        if self.scheme == GSHARE:
+            pc ^= self.history
+        return pc & (self.entries - 1)
+
+    def predict(self, pc):
+        """
+        Return the target of the instruction at ``pc`` if it's predicted
+        to be a taken branch, None otherwise.
+        """
+        if self.scheme == NOT_TAKEN:
+            return None
+        slot = pc & (self.btb_entries - 1)
+        if self.btb_tags[slot] != pc:
+            return None
+        self.btb_hits += 1
+        target = self.btb_targets[slot]
+        if self.scheme == BTFN:
+            return target if target <= pc else None
+        return target if self.counters[self._index(pc)] >= WEAKLY_TAKEN else None
+
+    def update(self, pc, taken, target, predicted):
+        """
+        Learn the outcome of the branch at ``pc``, resolved in ID.
+
+        taken -- it branches to ``target``
+        predicted -- it was predicted taken
+        """
+        self.branches += 1
+        self.taken += taken
+        if bool(taken) != bool(predicted):
+            self.mispredicts += 1
+
+        index = self._index(pc)
+        if taken:
+            self.counters[index] = min(self.counters[index] + 1, STRONGLY_TAKEN)
+            slot = pc & (self.btb_entries - 1)
+            self.btb_tags[slot] = pc
+            self.btb_targets[slot] = target
+        else:
+            self.counters[index] = max(self.counters[index] - 1, STRONGLY_NOT_TAKEN)
+        if self.scheme == GSHARE:
+            self.history = ((self.history << 1) | bool(taken)) & ((1 << self.history_bits) - 1)
+
+    @property
+    def accuracy(self):
+        """
+        Fraction of the branches predicted right (None without branches).
+        """
+        if not self.branches:
+            return None
+        return 1.0 - float(self.mispredicts) / self.branches
+
+    def summary(self):
+        """
+        Return the counts and the accuracy as text.
+        """
+        accuracy = '-' if self.accuracy is None else '%.2f%%' % (100 * self.accuracy)
+        return 'predictor %s: %i branches, %i taken, %i mispredicted, %i BTB hits | accuracy: %s' \
+               % (self.scheme, self.branches, self.taken, self.mispredicts, self.btb_hits, accuracy)
+
+
+def branch_predictor(clk, ip, stall, flush, branch, taken, pc_adder, target,
+                     predicted, predicted_target, predictor):
+    """
+    Look up ``predictor`` (a Predictor) with the address fetched when the
+    instruction is latched into IF/ID, and keep the prediction next to
+    it. The outcome of the branch in ID is learnt on the same edge. Not
+    convertible.
+
+    clk -- trigger
+    ip -- address of the instruction fetched
+    stall -- IF/ID keeps its instruction, and its prediction
+    flush -- IF/ID loads a NOP, which isn't predicted
+    branch -- the instruction in ID is a branch
+    taken -- it is taken
+    pc_adder -- its address + 1
+    target -- its target
+    predicted -- output. The instruction in ID was predicted taken
+    predicted_target -- output. Where it was predicted to branch
+    """
+
+    @always(clk.posedge)
+    def logic():
+        if branch:
+            predictor.update(int(pc_adder) - 1, int(taken), int(target), int(predicted))
+
+        if flush:
+            predicted.next = 0
+        elif not stall:
+            prediction = predictor.predict(int(ip))
+            if prediction is None:
+                predicted.next = 0
+            else:
+                predicted.next = 1
+                predicted_target.next = prediction
+
+    return logic
+
+
+def main():
+    from processor import Processor
+    from program import load_image, DEFAULT_PROGRAM
+
+    args = sys.argv[1:]
+    program = args.pop(0) if args else DEFAULT_PROGRAM
+    schemes = args or SCHEMES
+    for scheme in schemes:
+        if scheme not in SCHEMES:
+            print 'usage: predictor.py [program] [%s...]' % '|'.join(SCHEMES)
+            sys.exit(1)
+
+    rom = load_image(program)
+    for scheme in schemes:
+        predictor = Predictor(scheme)
+        processor = Processor(max(len(rom), 1), predictor=predictor)
+        processor.load(rom)
+        cycles = processor.run()
+        print '%s: %i cycles (%s)' % (program, cycles, processor.halted)
+        print predictor.summary()
+
+if __name__ == '__main__':
+    main()
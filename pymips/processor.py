@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Reusable DLX processor
+"""
+
+import sys
+
+import myhdl
+from myhdl import Signal, intbv, instance, Simulation
+
+from dlx import dlx
+from cycle import CycleSimulation
+from halt import Halt
+from isa import initial_registers, initial_memory
+from memory import DenseMemory
+from predecode import predecode
+from program import load_image, DEFAULT_PROGRAM
+
+
+def flatten(instances):
+    """
+    Return the list of instances in a nested sequence of them.
+    """
+    if isinstance(instances, (list, tuple)):
+        return [i for item in instances for i in flatten(item)]
+    return [instances]
+
+
+MYHDL_VERSION = '0.8.1'    #the version pinned in requirements.txt
+
+
+def rearm(instances):
+    """
+    Restart the generators of ``instances`` so a new Simulation runs them
+    from the beginning. MyHDL leaves them suspended where the previous
+    simulation stopped, and resuming one would run its body once without
+    its trigger.
+
+    MyHDL has no public way to do this: it relies on its instances
+    keeping the function that creates their generator (``genfunc``) and
+    a ``waiter`` built from the generator, as MyHDL 0.8 does. Instances
+    without them raise RuntimeError.
+    """
+    for inst in instances:
+        try:
+            genfunc, waiter = inst.genfunc, inst.waiter.__class__
+        except AttributeError:
+            raise RuntimeError('Cannot restart %r with MyHDL %s: Processor needs MyHDL %s'
+                               % (inst, myhdl.__version__, MYHDL_VERSION))
+        inst.gen = genfunc()
+        inst.waiter = waiter(inst.gen)
+
+
+class Processor(object):
+    """
+    dlx.dlx elaborated once to run many programs.
+
+    Every ``run()`` starts from the power on state: stopping a MyHDL
+    simulation sets every Signal back to its initial value, the generators
+    are restarted and ``Reset`` is pulsed before the first clock edge.
+    The ROM, the registers and the data memory are plain sequences that
+    ``load()`` overwrites in place, so nothing is elaborated again.
+
+    rom_size -- words of the ROM: the largest program that can be loaded
+    memory -- data memory (default: a memory.DenseMemory of 1024 words,
+              as data_memory)
+    max_cycles -- cycle limit of every run (see halt.Halt)
+    trace -- optional trace.Trace, cleared before every run
+    counters -- optional counters.Counters, cleared before every run
+    profiler -- optional profiler.Profiler, cleared before every run
+    cpi_stack -- optional cpi.CPIStack, cleared before every run
+    early_branch -- resolve branches in ID (see dlx.dlx)
+    predictor -- optional predictor.Predictor (see dlx.dlx), cleared before
+                 every run
+    icache -- optional cache.Cache of instructions (see dlx.dlx), emptied
+              before every run
+    dcache -- optional cache.DataCache (see dlx.dlx), emptied before every
+              run
+    depth -- registers of the register file
+    cycle_based -- run with cycle.CycleSimulation instead of MyHDL's
+                   event driven Simulation
+    fast_arithmetic -- plain ints instead of intbv in the datapath (see
+                       dlx.dlx)
+    retirement -- optional cosim.DLXRetirement, cleared before every run
+    coverage -- optional coverage.Coverage, cleared before every run
+    predecoded -- decode the instructions once, when they are loaded (see
+                  dlx.dlx)
+    """
+
+    def __init__(self, rom_size=1024, memory=None, max_cycles=10000, trace=None,
+                 counters=None, profiler=None, cpi_stack=None, early_branch=False,
+                 predictor=None, icache=None, dcache=None, depth=32, cycle_based=False,
+                 fast_arithmetic=False, retirement=None, coverage=None, predecoded=True):
+        self.rom = [0] * rom_size
+        self.registers = DenseMemory(depth, initial_registers(depth))
+        self.memory = DenseMemory(1024) if memory is None else memory
+        self.max_cycles = max_cycles
+        self.halt = Halt(0, max_cycles)
+        self.trace = trace
+        self.counters = counters
+        self.profiler = profiler
+        self.cpi_stack = cpi_stack
+        self.predictor = predictor
+        self.icache = icache
+        self.dcache = dcache
+        self.retirement = retirement
+        self.coverage = coverage
+        self.predecoded = predecoded
+        self.reset = Signal(intbv(0)[1:])
+        self._loaded = 0
+
+        reset = self.reset
+
+        @instance
+        def reset_pulse():
+            reset.next = 1
+            yield reset.posedge
+            reset.next = 0
+
+        self.instances = flatten([dlx(Reset=reset, rom=self.rom, memory=self.memory,
+                                      registers=self.registers, trace=trace,
+                                      halt=self.halt, counters=counters,
+                                      profiler=profiler, cpi_stack=cpi_stack,
+                                      early_branch=early_branch, predictor=predictor,
+                                      icache=icache, dcache=dcache,
+                                      fast_arithmetic=fast_arithmetic,
+                                      retirement=retirement, coverage=coverage,
+                                      predecoded=predecoded),
+                                  reset_pulse])
+        self.kernel = CycleSimulation(self.instances) if cycle_based else None
+
+    def load(self, program, registers=None, memory=None):
+        """
+        Load a new program and initial state for the next ``run()``.
+
+        program -- sequence of 32 bits encoded instructions
+        registers -- initial register file (default: ``isa.initial_registers(depth)``)
+        memory -- initial data memory contents: a sequence of words or a
+                  ``{address: word}`` mapping (default: ``isa.initial_memory()``)
+        """
+        size = len(program)
+        if size > len(self.rom):
+            raise ValueError('Program of %i words does not fit in a ROM of %i'
+                             % (size, len(self.rom)))
+        self.rom[:size] = program
+        if self.predecoded:
+            predecode(program)
+        self.rom[size:max(size, self._loaded)] = [0] * (self._loaded - size)
+        self._loaded = size
+        self.halt.size = size
+        if self.profiler is not None:
+            self.profiler.size = size
+        if self.cpi_stack is not None:
+            self.cpi_stack.size = size
+
+        self.registers.update(initial_registers(len(self.registers)) if registers is None else registers)
+        self.memory.clear()
+        self.memory.update(initial_memory() if memory is None else memory)
+
+    def run(self, max_cycles=None):
+        """
+        Run the loaded program until it halts or ``max_cycles`` (default:
+        the processor's) cycles. Return the number of cycles.
+        ``registers`` and ``memory`` hold the final state.
+        """
+        self.halt.max_cycles = self.max_cycles if max_cycles is None else max_cycles
+        self.halt.clear()
+        if self.trace is not None:
+            self.trace.clear()
+        if self.counters is not None:
+            self.counters.clear()
+        if self.profiler is not None:
+            self.profiler.clear()
+        if self.cpi_stack is not None:
+            self.cpi_stack.clear()
+        if self.predictor is not None:
+            self.predictor.clear()
+        if self.icache is not None:
+            self.icache.clear()
+        if self.dcache is not None:
+            self.dcache.clear()
+        if self.retirement is not None:
+            self.retirement.clear()
+        if self.coverage is not None:
+            self.coverage.clear()
+
+        rearm(self.instances)
+        if self.kernel is not None:
+            self.kernel.run(quiet=1)
+        else:
+            Simulation(self.instances).run(quiet=1)
+        return self.halt.cycles
+
+    @property
+    def halted(self):
+        """
+        Why the last run stopped (see halt.Halt).
+        """
+        return self.halt.reason
+
+
+def main():
+    processor = Processor()
+    for program in sys.argv[1:] or [DEFAULT_PROGRAM]:
+        processor.load(load_image(program))
+        cycles = processor.run()
+        print '%s: %i cycles (%s)' % (program, cycles, processor.halted)
+        print 'reg:', processor.registers.snapshot()
+        print 'mem:', processor.memory.items()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Per instruction profiler
+"""
+
+import sys
+import csv
+from array import array
+
+from myhdl import always
+
+from trace import TYPECODE
+
+
+PIPELINE_DEPTH = 5  #cycles of an instruction that doesn't stall, from IF to WB
+FLUSH_PENALTY = 3   #bubbles after a taken branch: the two instructions behind it
+                    #and the first one fetched from the target are discarded
+EARLY_FLUSH_PENALTY = 1     #the same, resolved in ID (see dlx's early_branch)
+
+FIELDS = ('executions', 'cycles', 'stalls', 'taken', 'flush_penalty')
+
+
+class Profiler(object):
+    """
+    Profile dlx.dlx by instruction address, into one ``array`` per field
+    indexed by PC:
+
+    executions -- times the instruction was retired (latched into EX/MEM)
+    cycles -- cycles it spent in the pipeline: ``PIPELINE_DEPTH`` per
+              execution plus the cycles it was stalled in ID, fetched
+              from the instruction cache after a miss, or frozen in MEM
+              by the data cache
+    stalls -- load-use stall cycles caused (by a ``lw``)
+    taken -- times the instruction (a ``beq``) was taken
+    flush_penalty -- bubbles after it flushed the pipeline
+
+    Taken branches to a lower or the same address are recorded as loops
+    (see ``hot_loops``).
+
+    size -- words of the program image. The arrays grow if the PC goes
+            beyond it.
+
+    As counters.Counters, samples are added on the next positive edge, so
+    the edge a halt.Halt stops on isn't profiled.
+    """
+
+    def __init__(self, size=0):
+        self.size = size
+        self.clear()
+
+    def attach(self, clk, signals):
+        """
+        Return the instance profiling dlx's ``signals`` (a ``{name: Signal}``
+        dict) on the positive edges of ``clk``.
+        """
+        RegWrite_ex, MemWrite_ex, Branch_ex = [signals[name] for name in
+                                               ('RegWrite_ex', 'MemWrite_ex', 'Branch_ex')]
+        PcAdderOut_ex, Address32_ex, PcAdderOut_id, Address32_id = [signals[name] for name in
+                                                                    ('PcAdderOut_ex', 'Address32_ex',
+                                                                     'PcAdderOut_id', 'Address32_id')]
+        Stall, PCSrc_mem, BranchTaken_id, Redirect_id = [signals[name] for name in
+                                                         ('Stall', 'PCSrc_mem', 'BranchTaken_id',
+                                                          'Redirect_id')]
+        FetchStall, MemStall, Ip = signals['FetchStall'], signals['MemStall'], signals['Ip']
+        self.clear()
+
+        @always(clk.posedge)
+        def profiler():
+            if self._sample is not None:
+                self._add(*self._sample)
+
+            if MemStall._val:
+                #frozen: the load or store in MEM waits for the data cache
+                self._sample = (None, None, None, 0, None, None, None, self._mem)
+                return
+
+            pc_ex = stalled = fetching = target = taken_id = redirected = None
+            if RegWrite_ex._val or MemWrite_ex._val or Branch_ex._val:
+                pc_ex = int(PcAdderOut_ex._val) - 1
+                if Branch_ex._val:
+                    target = pc_ex + 1 + int(Address32_ex._val)
+            if Stall._val:
+                stalled = int(PcAdderOut_id._val) - 1
+            elif FetchStall._val and Ip._val < self.size:
+                fetching = int(Ip._val)
+            pc_id = int(PcAdderOut_id._val) - 1
+            if BranchTaken_id._val:
+                taken_id = (pc_id, pc_id + 1 + int(Address32_id._val))
+            if Redirect_id._val:
+                redirected = pc_id
+            self._sample = (pc_ex, stalled, target, int(PCSrc_mem._val), taken_id, redirected,
+                            fetching)
+            self._mem = pc_ex
+
+        return profiler
+
+    def _add(self, pc_ex, stalled, target, flush, taken_id=None, redirected=None, fetching=None,
+             frozen=None):
+        """
+        Add the sample of a cycle.
+
+        pc_ex -- address of the instruction retired (None for a bubble)
+        stalled -- address of the instruction stalled in ID (None if no stall)
+        target -- where the retired instruction branches if taken
+        flush -- a taken branch in MEM flushed the pipeline
+        taken_id -- ``(address, target)`` of a branch taken in ID
+        redirected -- address of the branch in ID that flushed IF/ID: a
+                      taken one, or a mispredicted one with a predictor
+        fetching -- address of the instruction waiting for the instruction cache
+        frozen -- address of the instruction in MEM waiting for the data
+                  cache: nothing else moved
+        """
+        for pc in (pc_ex, stalled, taken_id and taken_id[0], redirected, fetching, frozen):
+            if pc is not None and pc >= len(self.executions):
+                self._grow(pc + 1)
+
+        if frozen is not None:
+            self.cycles[frozen] += 1
+            return
+
+        if pc_ex is not None:
+            self.executions[pc_ex] += 1
+            self.cycles[pc_ex] += PIPELINE_DEPTH
+        if stalled is not None:
+            self.cycles[stalled] += 1
+            if pc_ex is not None:
+                self.stalls[pc_ex] += 1
+        if fetching is not None:
+            self.cycles[fetching] += 1
+        if flush and self._branch is not None:
+            branch, branch_target = self._branch
+            self._taken(branch, branch_target, FLUSH_PENALTY)
+        if taken_id is not None:
+            branch, branch_target = taken_id
+            self._taken(branch, branch_target, 0)
+        if redirected is not None:
+            self.flush_penalty[redirected] += EARLY_FLUSH_PENALTY
+
+        #the branch in EX reaches MEM on the next cycle
+        self._branch = None if target is None else (pc_ex, target)
+
+    def _taken(self, branch, target, penalty):
+        self.taken[branch] += 1
+        self.flush_penalty[branch] += penalty
+        if target <= branch:
+            self.loops[branch] = target
+
+    def _grow(self, size):
+        for field in FIELDS:
+            column = getattr(self, field)
+            column.extend(array(TYPECODE, [0]) * (size - len(column)))
+
+    def clear(self):
+        """
+        Forget the profile, to profile a new run.
+        """
+        for field in FIELDS:
+            setattr(self, field, array(TYPECODE, [0]) * self.size)
+        self.loops = {}         #{branch address: target address}
+        self._sample = None     #the cycle that ends on the next edge
+        self._branch = None     #(address, target) of the branch in MEM
+        self._mem = None        #address of the instruction in MEM
+
+    def rows(self):
+        """
+        Yield ``(pc, executions, cycles, stalls, taken, flush_penalty)`` for every
+        instruction that was executed or stalled.
+        """
+        columns = [getattr(self, field) for field in FIELDS]
+        for pc, values in enumerate(zip(*columns)):
+            if any(values):
+                yield (pc,) + values
+
+    def hot_loops(self):
+        """
+        Return ``(first, last, iterations, cycles)`` for every loop: the
+        instructions from ``first`` to the branch at ``last`` repeated
+        ``iterations`` times, costing ``cycles`` (their cycles and flush
+        penalties). The most expensive loops come first.
+        """
+        loops = []
+        for last, first in self.loops.items():
+            cycles = sum(self.cycles[first:last + 1]) + sum(self.flush_penalty[first:last + 1])
+            loops.append((first, last, self.taken[last], cycles))
+        return sorted(loops, key=lambda loop: (-loop[3], loop[0]))
+
+    def report(self, count=None, rom=None):
+        """
+        Return the ``count`` (default: all) most expensive instructions as
+        text, and the loops. ``rom`` adds the instruction words.
+        """
+        rows = sorted(self.rows(), key=lambda row: (-(row[2] + row[5]), row[0]))[:count]
+        total = (sum(self.cycles) + sum(self.flush_penalty)) or 1
+        lines = ['%6s %10s %10s %6s %8s %8s %8s%s' % ('pc', 'executions', 'cycles', '%', 'stalls',
+                                                      'taken', 'flushes', ' instruction' if rom else '')]
+        for pc, executions, cycles, stalls, taken, flush_penalty in rows:
+            line = '%6i %10i %10i %6.2f %8i %8i %8i' % (pc, executions, cycles,
+                                                        100.0 * (cycles + flush_penalty) / total,
+                                                        stalls, taken, flush_penalty)
+            if rom:
+                line += '    %08x' % rom[pc] if pc < len(rom) else ''
+            lines.append(line)
+        for first, last, iterations, cycles in self.hot_loops():
+            lines.append('loop %i-%i: %i iterations, %i cycles (%.2f%%)'
+                         % (first, last, iterations, cycles, 100.0 * cycles / total))
+        return '\n'.join(lines)
+
+    def write(self, path):
+        """
+        Write the profile as CSV, one row per executed or stalled instruction.
+        """
+        with open(path, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(('pc',) + FIELDS)
+            writer.writerows(self.rows())
+
+
+def main():
+    from processor import Processor
+    from program import load_image, DEFAULT_PROGRAM
+
+    if len(sys.argv) > 3:
+        print 'usage: profiler.py [program] [profile.csv]'
+        sys.exit(1)
+    program = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PROGRAM
+    rom = load_image(program)
+    profiler = Profiler(len(rom))
+    processor = Processor(max(len(rom), 1), profiler=profiler)
+    processor.load(rom)
+    cycles = processor.run()
+    print '%s: %i cycles (%s)' % (program, cycles, processor.halted)
+    print profiler.report(rom=rom)
+    if len(sys.argv) > 2:
+        profiler.write(sys.argv[2])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Program images
+"""
+
+import os
+import sys
+import mmap
+import struct
+
+
+DEFAULT_PROGRAM = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               os.pardir, 'programs', 'simple.txt')
+
+_WORD = struct.Struct('<I')     #32 bits little endian word
+
+
+def read_program(program, comment_char='#'):
+    """
+    Return the list of 32 bits words encoded in a program text file.
+
+    Each instruction is a line of 32 ASCII '0'/'1' chars (spaces are
+    ignored, so fields can be separated). Everything after
+    ``comment_char`` is discarded.
+    """
+
+    words = []
+    for line in open(program):
+        line = line.partition(comment_char)[0]
+        line = ''.join(line.split())
+        if len(line) == 32:
+            words.append(int(line, 2))
+
+    return words
+
+
+def read_hex(program, comment_char='#'):
+    """
+    Return the list of 32 bits words of a hex file: one word per line,
+    with or without ``0x`` prefix. Everything after ``comment_char`` is
+    discarded.
+    """
+
+    words = []
+    for line in open(program):
+        line = line.partition(comment_char)[0]
+        line = ''.join(line.split()).replace('_', '')
+        if line:
+            words.append(int(line, 16) & 0xffffffff)
+
+    return words
+
+
+class WordImage(object):
+    """
+    Read only sequence of the 32 bits little endian words stored in a
+    binary image. The file is mapped in memory, so words are unpacked on
+    access instead of being loaded into a list.
+
+    size -- minimum length of the sequence. Words beyond the end of the
+            file read as 0 (NOP).
+    """
+
+    def __init__(self, path, size=0):
+        self.path = path
+        self._file = open(path, 'rb')
+        length = os.fstat(self._file.fileno()).st_size
+        if length % _WORD.size:
+            self._file.close()
+            raise ValueError('%s: %i bytes is not a whole number of words'
+                             % (path, length))
+
+        self._words = length // _WORD.size
+        self._size = max(size, self._words)
+        if length:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = None
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in xrange(*index.indices(self._size)))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('image index out of range')
+        if index >= self._words:
+            return 0
+        return _WORD.unpack_from(self._map, index * _WORD.size)[0]
+
+    def __iter__(self):
+        for index in xrange(self._size):
+            yield self[index]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __repr__(self):
+        return 'WordImage(%r, %i words)' % (self.path, self._size)
+
+
+def write_image(path, words):
+    """
+    Write ``words`` as a binary image of 32 bits little endian words.
+    """
+    with open(path, 'wb') as image:
+        for word in words:
+            image.write(_WORD.pack(word & 0xffffffff))
+
+
+def image_format(program):
+    """
+    Guess the format of a program from its extension:
+    ``'bin'``, ``'hex'`` or ``'text'``.
+    """
+    extension = os.path.splitext(program)[1].lower()
+    if extension in ('.bin', '.img'):
+        return 'bin'
+    elif extension == '.hex':
+        return 'hex'
+    return 'text'
+
+
+def load_image(program, format=None, size=0, comment_char='#'):
+    """
+    Load a program image as a sequence of 32 bits words.
+
+    format -- ``'text'`` (lines of '0'/'1', as ``programs/simple.txt``),
+              ``'hex'`` or ``'bin'`` (mapped with ``WordImage``).
+              By default, guessed from the extension.
+    size -- minimum number of words. The image is padded with NOPs.
+    """
+    if format is None:
+        format = image_format(program)
+
+    if format == 'bin':
+        return WordImage(program, size)
+    elif format == 'hex':
+        words = read_hex(program, comment_char)
+    elif format == 'text':
+        words = read_program(program, comment_char)
+    else:
+        raise ValueError('Unknown program format %r' % format)
+
+    return tuple(words) + (0,) * (size - len(words))
+
+
+def main():
+    """
+    Convert a program to a binary image::
+
+        $ python program.py programs/simple.txt simple.bin
+    """
+    if len(sys.argv) != 3:
+        print 'usage: %s program image.bin' % sys.argv[0]
+        sys.exit(1)
+
+    words = load_image(sys.argv[1])
+    write_image(sys.argv[2], words)
+    print '%i words written to %s' % (len(words), sys.argv[2])
+
+if __name__ == '__main__':
+    main()
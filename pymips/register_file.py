@@ -11,9 +11,20 @@ import random
 from myhdl import Signal, delay, always_comb, always, Simulation, \
                   intbv, bin, instance, instances, now, toVHDL
 
+from memory import DenseMemory
+
+
+def register_file (clk, read_reg1, read_reg2, write_reg, data_in, write_control, out_data1, out_data2, depth=32, trace=None):
+    """
+    trace -- optional callable ``trace(time, registers)``, called on every
+             negative edge with the registers (Signals) before they are
+             written. Not convertible. See ``print_registers``.
+
+    A register written on an edge is read with its new value (``data_in``),
+    so an instruction decoded while another one is written back reads it
+    even if, later in EX, the forwarding unit doesn't see the writer.
+    """
 
-def register_file (clk, read_reg1, read_reg2, write_reg, data_in, write_control, out_data1, out_data2, depth=32):
-    
     mem = [Signal(intbv(i+1, min=-(2**31), max=2**31-1)) for i in range(depth)]
     #print mem
 
@@ -24,15 +35,62 @@ def register_file (clk, read_reg1, read_reg2, write_reg, data_in, write_control,
         if write_control == 1:
             mem[int(write_reg)].next = data_in #.signed()
 
-        out_data1.next = mem[int(read_reg1)]
-        out_data2.next = mem[int(read_reg2)]
-        
-        print 'reg:', [int(i) for i in mem][0:6]
+        if write_control == 1 and read_reg1 == write_reg:
+            out_data1.next = data_in
+        else:
+            out_data1.next = mem[int(read_reg1)]
+        if write_control == 1 and read_reg2 == write_reg:
+            out_data2.next = data_in
+        else:
+            out_data2.next = mem[int(read_reg2)]
+
+    if trace is None:
+        return logic
+
+    @always(clk.negedge)
+    def tracer():
+        trace(now(), mem)
+
+    return logic, tracer
+
+
+
+def register_file_model(clk, read_reg1, read_reg2, write_reg, data_in, write_control, out_data1, out_data2, registers=None, trace=None):
+    """
+    Same ports than register_file, but the registers are kept in
+    ``registers`` (by default, a memory.DenseMemory with the same initial
+    values than register_file) instead of a list of Signals, so they can
+    be inspected at any time with ``registers.snapshot()``. Not convertible.
+
+    trace -- as in register_file, called with ``registers``
+    """
+
+    if registers is None:
+        registers = DenseMemory(32, range(1, 33))
+
+    @always(clk.negedge)
+    def logic():
+        if trace is not None:
+            trace(now(), registers)
+
+        if write_control == 1:
+            registers[int(write_reg)] = int(data_in.val)
+
+        out_data1.next = registers[int(read_reg1)]
+        out_data2.next = registers[int(read_reg2)]
 
     return logic
 
 
 
+def print_registers(time, registers, count=6):
+    """
+    A ``trace`` for register_file that prints the first ``count`` registers.
+    """
+    print 'reg:', [int(registers[i]) for i in range(count)]
+
+
+
 def group(lst, n):
     """group([0,3,4,10,2,3], 2) => [(0,3), (4,10), (2,3)]
     
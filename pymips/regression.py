@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Regression driver
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+from optparse import OptionParser
+from xml.etree import ElementTree
+
+from concurrent.futures import ProcessPoolExecutor
+
+from program import load_image, image_format
+from halt import LIMIT
+
+
+PROGRAMS = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                         os.pardir, 'programs'))
+EXTENSIONS = ('.txt', '.hex', '.bin', '.img')
+
+SIMULATORS = ('dlx', 'model', 'isa')
+
+#'r1 = 7' or 'mem[7] = 3'
+_ASSIGNMENT = re.compile(r'^\s*(r\d+|mem\[\d+\])\s*=\s*(-?\d+)')
+_EXPECT = re.compile(r'^\s*#\s*expect:(.*)$')
+
+
+def read_expectations(program, comment_char='#'):
+    """
+    Return the ``{'r1': 7, 'mem[7]': 3}`` dict of the final values a
+    program expects.
+
+    They are read from the last ``|`` separated field of the comment of
+    each instruction, as in programs/simple.txt::
+
+        000000 00010 00011 00001 00000 100000   # r1 = r2 + r3 | add $r1, $r2, $r3 | r1 = 7
+
+    and from ``# expect: r1 = 7, mem[7] = 3`` lines. Fields that aren't
+    assignments to a register or a memory word (``next_ip = 0``) are
+    ignored, and later values override earlier ones. Commented out
+    instructions don't expect anything.
+    """
+    expected = {}
+    if image_format(program) != 'text':
+        return expected
+
+    for line in open(program):
+        code, sep, comment = line.partition(comment_char)
+        match = _EXPECT.match(line)
+        if match:
+            fields = match.group(1).split(',')
+        elif len(''.join(code.split())) == 32:
+            fields = comment.split('|')[-1:]
+        else:
+            continue
+        for field in fields:
+            match = _ASSIGNMENT.match(field)
+            if match:
+                expected[match.group(1)] = int(match.group(2))
+    return expected
+
+
+def discover(paths):
+    """
+    Return the list of program files in ``paths``: files, or directories
+    searched recursively (in sorted order).
+    """
+    programs = []
+    for path in paths:
+        if not os.path.isdir(path):
+            programs.append(path)
+            continue
+        found = []
+        for root, dirs, files in os.walk(path):
+            found.extend(os.path.join(root, name) for name in files
+                         if os.path.splitext(name)[1].lower() in EXTENSIONS)
+        programs.extend(sorted(found))
+    return programs
+
+
+class Timeout(Exception):
+    pass
+
+
+def _timeout(signum, frame):
+    raise Timeout('timed out')
+
+
+_processor = None   #elaborated once per worker process
+
+
+def simulate(program, simulator='dlx', max_cycles=10000):
+    """
+    Run a program to completion. Return the cycles (or steps, for the
+    ``isa``), why it halted, the registers and the data memory.
+    """
+    global _processor
+    rom = load_image(program)
+
+    if simulator == 'dlx':
+        if _processor is None:
+            from processor import Processor
+            _processor = Processor(max_cycles=max_cycles)
+        _processor.load(rom)
+        cycles = _processor.run(max_cycles)
+        return cycles, _processor.halted, _processor.registers, _processor.memory
+
+    elif simulator == 'model':
+        from dlx_model import DLXModel
+        model = DLXModel(rom)
+        cycles = model.run(max_cycles)
+        return cycles, model.halted or LIMIT, model.registers, model.memory
+
+    elif simulator == 'isa':
+        from isa import ISA
+        isa = ISA(rom)
+        steps = isa.run(max_cycles)
+        return steps, isa.halted or LIMIT, isa.registers, isa.memory
+
+    raise ValueError('Unknown simulator %r' % simulator)
+
+
+def check(program, simulator='dlx', timeout=None, max_cycles=10000):
+    """
+    Run a program and compare its final state with its expectations.
+
+    Return a dict with the ``program``, its ``status`` ('pass', 'fail',
+    'error' or 'timeout'), ``cycles``, ``halted``, run ``time``, a
+    ``message`` and the ``mismatches`` as ``[what, expected, got]``.
+    A program that doesn't halt before ``max_cycles`` fails.
+    """
+    result = {'program': program, 'status': 'pass', 'cycles': None,
+              'halted': None, 'time': 0.0, 'message': '', 'mismatches': []}
+    start = time.time()
+    if timeout:
+        previous = signal.signal(signal.SIGALRM, _timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            expected = read_expectations(program)
+            cycles, halted, registers, memory = simulate(program, simulator, max_cycles)
+        finally:
+            if timeout:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+    except Timeout:
+        result['status'] = 'timeout'
+        result['message'] = 'timed out after %gs' % timeout
+    except Exception, e:
+        result['status'] = 'error'
+        result['message'] = '%s: %s' % (e.__class__.__name__, e)
+    else:
+        result['cycles'] = cycles
+        result['halted'] = halted
+        for what in sorted(expected):
+            if what.startswith('mem'):
+                got = memory[int(what[4:-1])]
+            else:
+                got = registers[int(what[1:])]
+            if got != expected[what]:
+                result['mismatches'].append([what, expected[what], got])
+
+        messages = ['%s = %i (expected %i)' % tuple([m[0], m[2], m[1]])
+                    for m in result['mismatches']]
+        if halted == LIMIT:
+            messages.insert(0, 'did not halt in %i cycles' % max_cycles)
+        if messages:
+            result['status'] = 'fail'
+            result['message'] = '; '.join(messages)
+
+    result['time'] = time.time() - start
+    return result
+
+
+def run(programs, simulator='dlx', jobs=None, timeout=None, max_cycles=10000):
+    """
+    Check ``programs`` concurrently on a ProcessPoolExecutor of ``jobs``
+    processes (default: one per core). Return the results of ``check``,
+    in the same order.
+    """
+    executor = ProcessPoolExecutor(jobs)
+    try:
+        futures = [executor.submit(check, program, simulator, timeout, max_cycles)
+                   for program in programs]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown()
+
+
+def junit(results, name='pymips'):
+    """
+    Return the results as a JUnit XML report.
+    """
+    count = lambda status: str(sum(1 for r in results if r['status'] == status))
+    suite = ElementTree.Element('testsuite', name=name, tests=str(len(results)),
+                                failures=count('fail'),
+                                errors=str(int(count('error')) + int(count('timeout'))),
+                                time='%.3f' % sum(r['time'] for r in results))
+    for result in results:
+        case = ElementTree.SubElement(suite, 'testcase', name=result['program'],
+                                      classname=name, time='%.3f' % result['time'])
+        if result['status'] == 'fail':
+            ElementTree.SubElement(case, 'failure', message=result['message'])
+        elif result['status'] in ('error', 'timeout'):
+            ElementTree.SubElement(case, 'error', message=result['message'], type=result['status'])
+    return ElementTree.tostring(suite)
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [program or directory...]')
+    parser.add_option('-j', '--jobs', type='int', help='processes (default: one per core)')
+    parser.add_option('-s', '--simulator', choices=SIMULATORS, default='dlx',
+                      help='dlx (default), model (dlx_model) or isa')
+    parser.add_option('-t', '--timeout', type='float', help='seconds per program')
+    parser.add_option('--max-cycles', type='int', default=10000, help='cycle limit of every program')
+    parser.add_option('--junit', help='write a JUnit XML report')
+    parser.add_option('--json', help='write a JSON report')
+    options, paths = parser.parse_args()
+
+    programs = discover(paths or [PROGRAMS])
+    results = run(programs, options.simulator, options.jobs, options.timeout, options.max_cycles)
+
+    for result in results:
+        print '%-7s %s %s' % (result['status'].upper(), result['program'], result['message'])
+    failed = sum(1 for r in results if r['status'] != 'pass')
+    print '%i programs, %i failed' % (len(results), failed)
+
+    if options.junit:
+        with open(options.junit, 'w') as report:
+            report.write(junit(results))
+    if options.json:
+        with open(options.json, 'w') as report:
+            json.dump(results, report, indent=1)
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,18 @@ from myhdl import Signal, delay, always_comb, always, Simulation, \
 
 
 def sign_extend(input16, output32):
-    
+    """
+    With a plain int ``output32`` (dlx's fast_arithmetic), the value is
+    copied as an int. Not convertible then.
+    """
+
+    if not isinstance(output32.val, intbv):
+        @always_comb
+        def logic_int():
+            output32.next = int(input16)
+
+        return logic_int
+
     @always_comb
     def logic():
         output32.next = input16.val
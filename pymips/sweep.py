@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Design space sweep
+"""
+
+import os
+import csv
+import sys
+import itertools
+from optparse import OptionParser
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from processor import Processor
+from memory import DenseMemory
+from cache import Cache, DataCache
+from predictor import Predictor
+from counters import Counters
+from program import load_image
+from isa import initial_memory
+from regression import discover, PROGRAMS
+
+
+NONE = 'none'   #no cache, or no predictor
+
+#parameters of a configuration, with their default values
+PARAMETERS = (('depth', 32),                #registers
+              ('rom_size', 1024),           #words of the ROM
+              ('memory_size', 1024),        #words of the data memory
+              ('icache', NONE),             #instruction cache: size/line/ways
+              ('dcache', NONE),             #data cache: size/line/ways
+              ('replacement', 'lru'),       #of both caches
+              ('latency', 10),              #of both caches
+              ('write_back', 1),            #data cache write policies
+              ('write_allocate', 1),
+              ('write_buffer', 4),
+              ('predictor', NONE),          #one of predictor.SCHEMES
+              ('early_branch', 0))          #implied by a predictor
+
+NAMES = tuple(name for name, default in PARAMETERS)
+DEFAULTS = dict(PARAMETERS)
+_INTEGERS = set(name for name, default in PARAMETERS if isinstance(default, int))
+
+_CACHE = ('replacement', 'latency')                             #only with a cache
+_DATA_CACHE = ('write_back', 'write_allocate', 'write_buffer')  #only with a data cache
+
+#results of a program on a configuration
+RESULTS = ('program', 'cycles', 'retired', 'cpi', 'halted', 'fetch_stalls', 'mem_stalls',
+           'icache_hit_rate', 'dcache_hit_rate', 'predictor_accuracy', 'error')
+
+COLUMNS = NAMES + RESULTS
+
+
+def geometry(spec):
+    """
+    Return the ``(size, line, ways)`` of a ``size/line/ways`` cache.
+    """
+    fields = spec.split('/')
+    if len(fields) != 3:
+        raise ValueError('Cache %r is not size/line/ways' % (spec,))
+    return tuple(int(field) for field in fields)
+
+
+def parse_grid(axes):
+    """
+    Return the ``{parameter: [values]}`` grid given by ``axes``, strings
+    such as ``depth=16,32`` or ``icache=none,64/4/2``. The parameters not
+    given keep their default value.
+    """
+    grid = dict((name, [default]) for name, default in PARAMETERS)
+    for axis in axes:
+        name, sep, values = axis.partition('=')
+        name = name.strip().replace('-', '_')
+        if name not in DEFAULTS or not sep:
+            raise ValueError('Unknown parameter in %r' % (axis,))
+        values = [value.strip() for value in values.split(',')]
+        if name in _INTEGERS:
+            values = [int(value) for value in values]
+        elif name in ('icache', 'dcache'):
+            for value in values:
+                if value != NONE:
+                    geometry(value)
+        grid[name] = values
+    return grid
+
+
+def key(config):
+    """
+    Return a configuration (or a row) as the tuple of its parameters, as
+    written in the CSV.
+    """
+    return tuple('' if config[name] is None else str(config[name]) for name in NAMES)
+
+
+def configurations(grid):
+    """
+    Yield every configuration of ``grid`` (a ``{parameter: [values]}``
+    dict) once, as a ``{parameter: value}`` dict. Cache settings are None
+    without a cache, and ``early_branch`` is 1 with a predictor, so they
+    don't repeat a configuration.
+    """
+    seen = set()
+    for values in itertools.product(*[grid[name] for name in NAMES]):
+        config = dict(zip(NAMES, values))
+        if config['dcache'] == NONE:
+            config.update((name, None) for name in _DATA_CACHE)
+        if config['icache'] == NONE and config['dcache'] == NONE:
+            config.update((name, None) for name in _CACHE)
+        if config['predictor'] != NONE:
+            config['early_branch'] = 1
+        if key(config) not in seen:
+            seen.add(key(config))
+            yield config
+
+
+def build(config, max_cycles=10000):
+    """
+    Return the processor.Processor of a configuration, with its counters.
+    """
+    icache = dcache = predictor = None
+    if config['icache'] != NONE:
+        icache = Cache(*geometry(config['icache']), replacement=config['replacement'],
+                       latency=config['latency'])
+    if config['dcache'] != NONE:
+        dcache = DataCache(*geometry(config['dcache']), replacement=config['replacement'],
+                           latency=config['latency'], write_back=bool(config['write_back']),
+                           write_allocate=bool(config['write_allocate']),
+                           write_buffer=config['write_buffer'])
+    if config['predictor'] != NONE:
+        predictor = Predictor(config['predictor'])
+    return Processor(config['rom_size'], DenseMemory(config['memory_size']), max_cycles,
+                     counters=Counters(), early_branch=bool(config['early_branch']),
+                     predictor=predictor, icache=icache, dcache=dcache, depth=config['depth'])
+
+
+def evaluate(config, programs, max_cycles=10000):
+    """
+    Run ``programs`` (paths) on the processor of ``config``. Return one
+    row (a ``{column: value}`` dict) per program. What goes wrong, even
+    building the processor, is recorded in the ``error`` column instead
+    of raised.
+    """
+    processor = error = None
+    try:
+        processor = build(config, max_cycles)
+    except Exception, e:
+        error = '%s: %s' % (e.__class__.__name__, e)
+    memory = dict((address, value) for address, value in enumerate(initial_memory())
+                  if value and address < config['memory_size'])
+
+    rows = []
+    for program in programs:
+        row = dict(config)
+        row.update((name, None) for name in RESULTS)
+        row['program'] = program
+        row['error'] = error
+        if processor is not None:
+            try:
+                processor.load(load_image(program), memory=memory)
+                row['cycles'] = processor.run()
+                row['halted'] = processor.halted
+                counters = processor.counters
+                row.update((name, getattr(counters, name))
+                           for name in ('retired', 'cpi', 'fetch_stalls', 'mem_stalls'))
+                for name, model, rate in (('icache_hit_rate', processor.icache, 'hit_rate'),
+                                          ('dcache_hit_rate', processor.dcache, 'hit_rate'),
+                                          ('predictor_accuracy', processor.predictor, 'accuracy')):
+                    if model is not None:
+                        row[name] = getattr(model, rate)
+            except Exception, e:
+                row['error'] = '%s: %s' % (e.__class__.__name__, e)
+        rows.append(row)
+    return rows
+
+
+def read_rows(path):
+    """
+    Return the rows of a CSV written by ``sweep`` (none if it doesn't exist).
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(path, rows):
+    """
+    Replace the CSV ``path`` with ``rows``, atomically.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        writer = csv.DictWriter(f, COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.rename(temporary, path)
+
+
+def sweep(grid, programs, path, jobs=None, max_cycles=10000, progress=None):
+    """
+    Evaluate every configuration of ``grid`` on ``programs`` in a
+    ProcessPoolExecutor of ``jobs`` processes (default: one per core) and
+    write their rows (see ``evaluate``) to the CSV ``path``.
+
+    The CSV is the checkpoint too: the rows of a configuration are
+    appended as soon as it finishes, and the configurations it already
+    has for every program are skipped, so an interrupted sweep resumes
+    where it stopped. In the end, it's sorted in the order of the grid.
+
+    progress -- called with the rows of every configuration evaluated
+
+    Return the number of configurations evaluated (not skipped).
+    """
+    configs = list(configurations(grid))
+    order = dict((key(config), index) for index, config in enumerate(configs))
+    programs = list(programs)
+
+    #keep the configurations a previous run completed
+    done = {}
+    for row in read_rows(path):
+        if row['program'] in programs:
+            done.setdefault(key(row), {})[row['program']] = row
+    done = dict((k, rows) for k, rows in done.items() if len(rows) == len(programs))
+    write_rows(path, [row for rows in done.values() for row in rows.values()])
+
+    pending = [config for config in configs if key(config) not in done]
+    if pending:
+        executor = ProcessPoolExecutor(jobs)
+        try:
+            with open(path, 'ab') as f:
+                writer = csv.DictWriter(f, COLUMNS)
+                futures = [executor.submit(evaluate, config, programs, max_cycles)
+                           for config in pending]
+                for future in as_completed(futures):
+                    rows = future.result()
+                    writer.writerows(rows)
+                    f.flush()
+                    if progress is not None:
+                        progress(rows)
+        finally:
+            executor.shutdown()
+
+    rows = read_rows(path)
+    rows.sort(key=lambda row: (order.get(key(row), len(order)), key(row),
+                               programs.index(row['program'])))
+    write_rows(path, rows)
+    return len(pending)
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [program or directory...]',
+                          description='Run programs on every configuration of a grid of '
+                                      'parameters: %s. Caches are size/line/ways or none.'
+                                      % ', '.join(NAMES))
+    parser.add_option('-g', '--grid', action='append', default=[], metavar='PARAMETER=VALUE,...',
+                      help='values of a parameter (repeatable)')
+    parser.add_option('-o', '--output', default='sweep.csv',
+                      help='CSV of results, resumed if it exists (default: sweep.csv)')
+    parser.add_option('-j', '--jobs', type='int', help='processes (default: one per core)')
+    parser.add_option('--max-cycles', type='int', default=10000, help='cycle limit of every run')
+    options, paths = parser.parse_args()
+    try:
+        grid = parse_grid(options.grid)
+    except ValueError, e:
+        parser.error(str(e))
+    programs = discover(paths or [PROGRAMS])
+
+    def progress(rows):
+        changed = ' '.join('%s=%s' % (name, rows[0][name]) for name in NAMES
+                           if rows[0][name] not in (None, DEFAULTS[name])) or 'defaults'
+        errors = sum(1 for row in rows if row['error'])
+        print '%s: %s cycles%s' % (changed, sum(row['cycles'] or 0 for row in rows),
+                                   ', %i errors' % errors if errors else '')
+        sys.stdout.flush()
+
+    evaluated = sweep(grid, programs, options.output, options.jobs, options.max_cycles, progress)
+    print '%i configurations evaluated, %i programs each: %s' % (evaluated, len(programs),
+                                                                  options.output)
+
+if __name__ == '__main__':
+    main()
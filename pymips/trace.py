@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+
+"""
+Signal traces
+"""
+
+from array import array
+
+from myhdl import always, SignalType
+
+
+try:
+    array('q')
+    TYPECODE = 'q'      #64 bits: signals can be 32 bits unsigned or signed
+except ValueError:      #python 2 has no 'q'. 'l' is 64 bits on LP64
+    TYPECODE = 'l'
+
+
+def signals_of(namespace):
+    """
+    Return a ``{name: Signal}`` dict of the Signals in ``namespace``
+    (e.g. the ``locals()`` of a component).
+    """
+    return dict((name, value) for (name, value) in namespace.items()
+                if isinstance(value, SignalType))
+
+
+class Trace(object):
+    """
+    Record the value of some signals on every positive clock edge into
+    preallocated columns (one ``array`` per signal). Nothing is formatted
+    until the trace is queried.
+
+    names -- signals to record (default: all the attached ones)
+    start, stop -- cycles to record (``stop`` excluded; default: all)
+    depth -- cycles kept: once full, the oldest are overwritten.
+             ``None`` keeps every cycle.
+
+    Cycles are counted from 0 on the first positive edge.
+    """
+
+    def __init__(self, names=None, start=0, stop=None, depth=4096):
+        self.names = names
+        self.start = start
+        self.stop = stop
+        self.depth = depth
+        self.sources = []
+        self.columns = {}
+        self.cycles = array(TYPECODE)
+        self.count = 0      #cycles recorded, including the overwritten ones
+        self.cycle = 0      #cycles seen
+
+    def attach(self, clk, signals):
+        """
+        Return the instance recording the selected ``signals``
+        (a ``{name: Signal}`` dict) on the positive edges of ``clk``.
+        """
+        names = sorted(signals) if self.names is None else list(self.names)
+        missing = [name for name in names if name not in signals]
+        if missing:
+            raise ValueError('Unknown signals: %s' % ', '.join(missing))
+
+        self.sources = [(name, signals[name]) for name in names]
+        self.columns = dict((name, array(TYPECODE)) for name in names)
+        self.clear()
+
+        columns = [(self.columns[name], signal) for (name, signal) in self.sources]
+        cycles = self.cycles
+        start, stop, depth = self.start, self.stop, self.depth
+
+        @always(clk.posedge)
+        def tracer():
+            cycle = self.cycle
+            self.cycle = cycle + 1
+            if cycle < start or (stop is not None and cycle >= stop):
+                return
+            if depth is None:
+                cycles.append(cycle)
+                for column, signal in columns:
+                    column.append(int(signal._val))
+            else:
+                index = self.count % depth
+                cycles[index] = cycle
+                for column, signal in columns:
+                    column[index] = int(signal._val)
+            self.count += 1
+
+        return tracer
+
+    def clear(self):
+        """
+        Forget the recorded cycles, to trace a new run from cycle 0.
+        """
+        size = self.depth or 0
+        for column in list(self.columns.values()) + [self.cycles]:
+            del column[:]
+            column.extend(array(TYPECODE, [0]) * size)
+        self.count = 0
+        self.cycle = 0
+
+    def __len__(self):
+        if self.depth is None:
+            return self.count
+        return min(self.count, self.depth)
+
+    def _order(self, column):
+        """
+        Return the kept values of ``column``, oldest first.
+        """
+        if self.depth is None or self.count <= self.depth:
+            return column[:len(self)]
+        split = self.count % self.depth
+        return column[split:] + column[:split]
+
+    def column(self, name):
+        """
+        Return the list of the recorded values of a signal, oldest first.
+        """
+        return self._order(self.columns[name]).tolist()
+
+    def rows(self, names=None, start=None, stop=None):
+        """
+        Yield ``(cycle, values)`` for every recorded cycle from ``start``
+        to ``stop`` (excluded), with the values of ``names`` (default: all
+        the recorded signals).
+        """
+        if names is None:
+            names = [name for (name, signal) in self.sources]
+        columns = [self._order(self.columns[name]) for name in names]
+        for index, cycle in enumerate(self._order(self.cycles)):
+            if (start is None or cycle >= start) and (stop is None or cycle < stop):
+                yield cycle, tuple(column[index] for column in columns)
+
+    def format(self, names=None, start=None, stop=None):
+        """
+        Return the recorded values as text, one line per cycle.
+        """
+        if names is None:
+            names = [name for (name, signal) in self.sources]
+        lines = []
+        for cycle, values in self.rows(names, start, stop):
+            lines.append('cycle %i: ' % cycle +
+                         ' | '.join('%s %i' % item for item in zip(names, values)))
+        return '\n'.join(lines)
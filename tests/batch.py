@@ -0,0 +1,63 @@
+import os
+import time
+import signal
+import unittest
+
+from pymips.batch import BatchRunner
+from pymips.program import DEFAULT_PROGRAM
+from pymips.halt import SELF_BRANCH, END
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def test_run(self):
+        runner = BatchRunner(rom_size=8, jobs=2)
+        programs = [('arithmetic', [ADD_R1_R2_R3, SUB_R5_R1_R4]),
+                    ('load', [LW_R1_5_R1, ADD_R2_R1_R3]),
+                    ('too long', [0] * 9),
+                    DEFAULT_PROGRAM]
+        results = dict((result['name'], result) for result in runner.run(programs))
+        self.assertEqual(sorted(results), sorted(['arithmetic', 'load', 'too long', DEFAULT_PROGRAM]))
+
+        self.assertEqual(results['arithmetic']['registers'][:6], [1, 7, 3, 4, 5, 2])
+        self.assertEqual(results['arithmetic']['halted'], END)
+        self.assertEqual(results['load']['registers'][2], 55)
+        self.assertEqual(results['load']['memory'], results['arithmetic']['memory'])
+        self.assertEqual(results[DEFAULT_PROGRAM]['halted'], SELF_BRANCH)
+        self.assertEqual(results[DEFAULT_PROGRAM]['cycles'], 4)
+        self.assertTrue(results['too long']['error'].startswith('ValueError'))
+
+        runner.processor.load([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        runner.processor.run()
+        self.assertEqual(results['arithmetic']['cycles'], runner.processor.halt.cycles)
+
+    def test_idle_worker_died(self):
+        runner = BatchRunner(rom_size=8, jobs=1)
+        pids = []
+        fork = runner._fork
+        def recording_fork(workers):
+            worker = fork(workers)
+            pids.append(worker[0])
+            return worker
+        runner._fork = recording_fork
+
+        def programs():
+            yield ('first', [ADD_R1_R2_R3])
+            #kill the idle worker before the next program is sent to it
+            os.kill(pids[-1], signal.SIGKILL)
+            time.sleep(0.2)
+            yield ('second', [ADD_R1_R2_R3, SUB_R5_R1_R4])
+
+        results = dict((result['name'], result) for result in runner.run(programs()))
+        self.assertEqual(len(pids), 2)
+        self.assertEqual(results['first']['error'], None)
+        self.assertEqual(results['second']['error'], None)
+        self.assertEqual(results['second']['registers'][:6], [1, 7, 3, 4, 5, 2])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import unittest
+
+from pymips.processor import Processor
+from pymips.cache import Cache, DataCache, LRU, FIFO, RANDOM
+from pymips.counters import Counters
+from pymips.cpi import CPIStack, FETCH, MEMORY
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, SW_R2_3_R0, \
+                               LW_R6_3_R0
+
+
+class TestCache(unittest.TestCase):
+
+    def test_replacement(self):
+        #2 sets of 2 lines of 1 word: 0, 2 and 4 go to set 0
+        lru = Cache(4, 1, 2, LRU)
+        fifo = Cache(4, 1, 2, FIFO)
+        for cache in (lru, fifo):
+            self.assertEqual([cache.read(address) for address in (0, 2, 0, 1, 4)],
+                             [False, False, True, False, False])
+        self.assertTrue(lru.read(0))
+        self.assertFalse(fifo.read(0))
+        self.assertEqual((lru.accesses, lru.hits, lru.misses, lru.evictions), (6, 2, 4, 1))
+        self.assertEqual(fifo.evictions, 2)
+
+        lru.clear()
+        self.assertEqual(lru.hit_rate, None)
+        self.assertFalse(lru.read(0))
+        self.assertTrue(lru.read(0))
+        self.assertEqual(lru.hit_rate, 0.5)
+
+        cache = Cache(8, 4, 2, RANDOM)
+        self.assertEqual([cache.read(address) for address in (0, 3, 8, 4, 7)],
+                         [False, True, False, False, True])
+
+        self.assertRaises(ValueError, Cache, 12)
+        self.assertRaises(ValueError, Cache, 8, 4, 4)
+        self.assertRaises(ValueError, Cache, 8, 4, 1, 'mru')
+
+    def test_fetch(self):
+        program = [LW_R1_5_R1, ADD_R2_R1_R3, SUB_R5_R1_R4, ADD_R1_R2_R3]
+        processor = Processor(rom_size=8)
+        processor.load(program)
+        cycles = processor.run()
+        registers = processor.registers.snapshot()
+
+        counters = Counters()
+        stack = CPIStack()
+        icache = Cache(8, 2, 1, latency=3)
+        processor = Processor(rom_size=8, icache=icache, counters=counters, cpi_stack=stack)
+        processor.load(program)
+        self.assertTrue(processor.run() > cycles)
+        self.assertEqual(processor.registers.snapshot(), registers)
+        self.assertEqual(counters.cycles, stack.cycles)
+        self.assertTrue(stack.totals[FETCH] > 0)
+        self.assertTrue(counters.fetch_stalls <= icache.misses * icache.latency)
+        misses = icache.misses
+
+        #larger lines, fewer misses
+        icache = Cache(8, 4, 1, latency=3)
+        processor = Processor(rom_size=8, icache=icache)
+        processor.load(program)
+        processor.run()
+        self.assertTrue(icache.misses < misses)
+
+    def test_write_policies(self):
+        #1 line of 2 words, 4 cycles to memory
+        cache = DataCache(2, 2, 1, latency=4, write_buffer=1)
+        self.assertEqual(cache.access(0, False, 0), 4)
+        self.assertEqual(cache.access(1, True, 4), 0)
+        #the dirty line is written back through the write buffer
+        self.assertEqual(cache.access(2, False, 5), 4)
+        self.assertEqual((cache.misses, cache.evictions, cache.writebacks), (2, 1, 1))
+        self.assertEqual(cache.buffer_stalls, 0)
+
+        cache = DataCache(2, 2, 1, latency=4, write_back=False, write_buffer=1)
+        self.assertEqual(cache.access(0, True, 0), 4)
+        #the write buffer (1 entry) is busy until cycle 4 + 4
+        self.assertEqual(cache.access(1, True, 5), 3)
+        self.assertEqual((cache.writebacks, cache.buffer_stalls), (0, 3))
+
+        cache = DataCache(2, 2, 1, latency=4, write_back=False, write_allocate=False,
+                          write_buffer=0)
+        self.assertEqual(cache.access(0, True, 0), 4)
+        self.assertEqual(cache.access(0, False, 4), 4)
+        self.assertEqual(cache.access(1, True, 8), 4)
+        self.assertEqual((cache.hits, cache.misses, cache.writebacks), (1, 2, 0))
+
+    def test_memory(self):
+        program = [ADD_R1_R2_R3, SW_R2_3_R0, LW_R6_3_R0, LW_R1_5_R1, ADD_R2_R1_R3]
+        processor = Processor(rom_size=8)
+        processor.load(program)
+        cycles = processor.run()
+        registers = processor.registers.snapshot()
+        memory = processor.memory.snapshot()
+
+        for dcache in (DataCache(4, 2, 1, latency=3),
+                       DataCache(4, 2, 1, latency=3, write_back=False, write_allocate=False,
+                                 write_buffer=0)):
+            counters = Counters()
+            stack = CPIStack()
+            processor = Processor(rom_size=8, dcache=dcache, counters=counters, cpi_stack=stack)
+            processor.load(program)
+            self.assertEqual(processor.run(), cycles + counters.mem_stalls)
+            self.assertEqual(processor.registers.snapshot(), registers)
+            self.assertEqual(processor.memory.snapshot(), memory)
+            self.assertEqual(counters.cycles, stack.cycles)
+            self.assertEqual(stack.totals[MEMORY], counters.mem_stalls)
+            self.assertEqual(dcache.accesses, 3)
+            self.assertTrue(counters.mem_stalls >= dcache.latency)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
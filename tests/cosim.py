@@ -0,0 +1,55 @@
+import unittest
+
+from pymips.cosim import Checker, DLXRetirement, Event, reference, REG, MEM
+from pymips.processor import Processor
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, SW_R2_3_R0, LW_R6_3_R0, LOOP
+
+#no hazards, so the unhazarded pipeline gets it right too
+PROGRAM = [ADD_R1_R2_R3, SW_R2_3_R0, LW_R6_3_R0, SUB_R5_R1_R4]
+
+
+class TestCosim(unittest.TestCase):
+
+    def test_reference(self):
+        self.assertEqual(list(reference(PROGRAM)),
+                         [Event(1, 0, REG, 1, 7), Event(2, 1, MEM, 4, 3),
+                          Event(3, 2, REG, 6, 3), Event(4, 3, REG, 5, 2)])
+
+        events = []
+        processor = Processor(rom_size=8, retirement=DLXRetirement(events.append))
+        processor.load(PROGRAM)
+        processor.run()
+        self.assertEqual([event[1:] for event in events],
+                         [event[1:] for event in reference(PROGRAM)])
+        self.assertEqual([event.cycle for event in events], [4, 4, 6, 7])
+
+    def test_agree(self):
+        checker = Checker(max_cycles=100, window=1)
+        self.assertEqual(checker.check(PROGRAM), [])
+        self.assertEqual(checker.retired, 4)
+
+        checker = Checker(['dlx'], max_cycles=200, early_branch=True, cycle_based=True)
+        self.assertEqual(checker.check(LOOP), [])
+        self.assertEqual(checker.retired, 22)
+
+    def test_mismatch(self):
+        mismatches = dict((mismatch.model, mismatch) for mismatch in
+                          Checker(max_cycles=200).check(LOOP))
+        self.assertEqual(sorted(mismatches), ['datapath', 'dlx', 'pipeline'])
+
+        #the sub is executed on every edge of clk
+        datapath = mismatches['datapath']
+        self.assertEqual((datapath.index, datapath.pc, datapath.cycle), (1, 1, 2))
+        self.assertEqual((datapath.expected.value, datapath.got.value), (9, -3))
+
+        #the branch taken in MEM fetches from 0 instead of 5
+        dlx = mismatches['dlx']
+        self.assertEqual((dlx.index, dlx.pc, dlx.cycle), (21, 1, 74))
+        self.assertEqual(dlx.expected.pc, 5)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import unittest
+
+from pymips.counters import Counters
+from tests.instructions import run, ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, \
+                               BEQ_R4_R4_M1, BEQ_R4_R4_1
+
+
+class TestCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.counters = Counters()
+
+    def test_forward_from_mem(self):
+        cycles = run([ADD_R1_R2_R3, SUB_R5_R1_R4], counters=self.counters)
+        self.assertEqual(self.counters.cycles, cycles)
+        self.assertEqual(self.counters.retired, 2)
+        self.assertEqual(self.counters.cpi, cycles / 2.0)
+        self.assertEqual(self.counters.forward_a_mem, 1)
+        self.assertEqual(self.counters.stalls, 0)
+
+    def test_load_use_stall(self):
+        run([LW_R1_5_R1, ADD_R2_R1_R3], counters=self.counters)
+        self.assertEqual(self.counters.stalls, 1)
+        #not the forward of the bubble, which keeps the registers of the add
+        self.assertEqual(self.counters.forward_a_wb, 1)
+        self.assertEqual(self.counters.forward_a_mem, 0)
+
+    def test_nops_and_flushes(self):
+        run([ADD_R1_R2_R3, 0, BEQ_R4_R4_M1], counters=self.counters)
+        self.assertEqual(self.counters.retired, 2)
+        self.assertEqual(self.counters.flushes, 0)
+
+        run([ADD_R1_R2_R3, BEQ_R4_R4_1, SUB_R5_R1_R4], max_cycles=20, counters=self.counters)
+        self.assertEqual(self.counters.cycles, 20)
+        self.assertTrue(self.counters.flushes > 0)
+        self.assertEqual(self.counters.as_dict()['flushes'], self.counters.flushes)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import unittest
+
+from myhdl import Simulation
+
+from pymips import dlx, instruction_memory
+from pymips.halt import Halt
+from pymips.cpi import CPIStack, RETIRED, STALL, FETCH, MEMORY, FLUSH, FILL, DRAIN, NOP
+from tests.instructions import run, ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, \
+                               BEQ_R4_R4_M2
+
+
+class TestCPIStack(unittest.TestCase):
+
+    def setUp(self):
+        self.stack = CPIStack()
+
+    def test_stall_nop_fill_drain(self):
+        cycles = run([LW_R1_5_R1, ADD_R2_R1_R3, 0], cpi_stack=self.stack)
+        self.assertEqual(self.stack.cycles, cycles)
+        self.assertEqual(self.stack.totals, {RETIRED: 2, STALL: 1, FETCH: 0, MEMORY: 0,
+                                             FLUSH: 0, FILL: 2, DRAIN: 0, NOP: 1})
+        #the stall belongs to the add, which waited for the load
+        self.assertEqual(self.stack.region(1, 1)[STALL], 1)
+        self.assertEqual(self.stack.region(2, 2), {RETIRED: 0, STALL: 0, FETCH: 0, MEMORY: 0,
+                                                   FLUSH: 0, FILL: 0, DRAIN: 0, NOP: 1})
+
+    def test_flush(self):
+        cycles = run([ADD_R1_R2_R3, SUB_R5_R1_R4, BEQ_R4_R4_M2], max_cycles=30,
+                     cpi_stack=self.stack)
+        self.assertEqual(self.stack.cycles, cycles)
+        loop = self.stack.region(1, 2)
+        self.assertEqual(loop[FLUSH], 3 * (loop[RETIRED] // 2 - 1))
+        self.assertTrue('loop (1-2)' in self.stack.report([('loop', 1, 2)]))
+
+    def test_test_bench(self):
+        stack, halt = CPIStack(8), Halt(8, 100)
+        rom, instruction_memory.ROM = instruction_memory.ROM, [LW_R1_5_R1, ADD_R2_R1_R3] + [0] * 6
+        try:
+            Simulation(dlx.testBench(halt=halt, cpi_stack=stack)).run(quiet=1)
+        finally:
+            instruction_memory.ROM = rom
+        self.assertEqual(stack.cycles, halt.cycles)
+        self.assertEqual((stack.totals[RETIRED], stack.totals[STALL]), (2, 1))
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
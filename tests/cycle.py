@@ -0,0 +1,65 @@
+import unittest
+
+from myhdl import Signal, intbv, always_comb
+
+from pymips.processor import Processor
+from pymips.cycle import CycleSimulation, CombinationalLoop
+from pymips.cache import Cache, DataCache
+from pymips.predictor import Predictor, GSHARE
+from pymips.counters import Counters
+from pymips.cpi import CPIStack
+from pymips.or_gate import or_gate
+from tests.instructions import HAZARDS, LOOP
+
+
+class TestCycle(unittest.TestCase):
+
+    def run_both(self, program, **kwargs):
+        """
+        Return what the event driven and the cycle based processors end
+        with: cycles, registers, memory, counters and CPI stack.
+        """
+        results = []
+        for cycle_based in (False, True):
+            kw = dict(kwargs)
+            for name in ('icache', 'dcache', 'predictor'):
+                if name in kw:
+                    kw[name] = kw[name]()
+            processor = Processor(rom_size=8, counters=Counters(), cpi_stack=CPIStack(),
+                                  cycle_based=cycle_based, **kw)
+            processor.load(program)
+            cycles = processor.run()
+            results.append((cycles, processor.halted, processor.registers.snapshot(),
+                            processor.memory.snapshot(), processor.counters.as_dict(),
+                            processor.cpi_stack.totals))
+        return results
+
+    def test_equivalence(self):
+        for program in (HAZARDS, LOOP):
+            event, cycle = self.run_both(program)
+            self.assertEqual(event, cycle)
+            event, cycle = self.run_both(program, early_branch=True,
+                                         predictor=lambda: Predictor(GSHARE))
+            self.assertEqual(event, cycle)
+
+    def test_caches(self):
+        event, cycle = self.run_both(HAZARDS, icache=lambda: Cache(8, 2, 1, latency=3),
+                                     dcache=lambda: DataCache(4, 2, 1, latency=2, write_buffer=0))
+        self.assertEqual(event, cycle)
+        self.assertTrue(cycle[4]['mem_stalls'] > 0 and cycle[4]['fetch_stalls'] > 0)
+
+    def test_levels(self):
+        a, b, c = [Signal(intbv(0)[1:]) for i in range(3)]
+        self.assertRaises(CombinationalLoop, CycleSimulation, or_gate(a, b, c), or_gate(c, a, b))
+
+        processor = Processor(rom_size=8, cycle_based=True)
+        self.assertTrue(processor.kernel.levels > 1)
+        #ClkPc drives nothing
+        self.assertEqual(len(processor.kernel.clocks), 1)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import unittest
+
+from pymips.dlx_model import DLXModel
+from pymips.halt import SELF_BRANCH, END
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, ADD_R0_R1_R2, \
+                               BEQ_R4_R4_M1
+
+
+class TestDLXModel(unittest.TestCase):
+    """
+    Expected values were recorded from dlx.dlx, one per cycle, just
+    before each positive edge of the clock.
+    """
+
+    def trace(self, rom, cycles=12):
+        model = DLXModel(rom)
+        rows = []
+        for i in range(cycles):
+            rows.append((model.pc, model.stall, model.flush,
+                         model.forward_a, model.forward_b))
+            model.step()
+        return model, zip(*rows)
+
+    def test_forwarding(self):
+        model, (pc, stall, flush, fa, fb) = self.trace([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        self.assertEqual(pc, tuple(range(12)))
+        self.assertEqual(fa, (0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(fb, (0,) * 12)
+        self.assertEqual(model.registers[:8], [1, 7, 3, 4, 5, 2, 7, 8])
+
+    def test_load_use_stall(self):
+        model, (pc, stall, flush, fa, fb) = self.trace([LW_R1_5_R1, ADD_R2_R1_R3])
+        self.assertEqual(pc, (0, 1, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10))
+        self.assertEqual(stall, (0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(fa, (0, 0, 0, 2, 1, 0, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(model.registers[:8], [1, 51, 55, 4, 5, 6, 7, 8])
+
+    def test_branch_flush(self):
+        model, (pc, stall, flush, fa, fb) = self.trace([ADD_R0_R1_R2, BEQ_R4_R4_M1,
+                                                        ADD_R1_R2_R3, SUB_R5_R1_R4])
+        self.assertEqual(pc, (0, 1, 2, 3) * 3)
+        self.assertEqual(flush, (0, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0))
+        self.assertEqual(stall, (0,) * 12)
+        self.assertEqual(model.registers[:8], [5, 2, 3, 4, 5, 6, 7, 8])
+
+    def test_run(self):
+        model = DLXModel([LW_R1_5_R1, ADD_R2_R1_R3])
+        self.assertEqual(model.run(3), 3)
+        self.assertEqual(model.halted, None)
+        self.assertEqual(model.run(), 3)
+        self.assertEqual(model.halted, END)
+        self.assertEqual(model.cycle, 6)
+        self.assertEqual(model.registers[2], 55)
+
+    def test_halt_on_self_branch(self):
+        model = DLXModel([ADD_R0_R1_R2, BEQ_R4_R4_M1, ADD_R1_R2_R3, SUB_R5_R1_R4])
+        self.assertEqual(model.run(100), 4)
+        self.assertEqual(model.halted, SELF_BRANCH)
+        self.assertEqual(model.registers[:6], [5, 2, 3, 4, 5, 6])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+import multiprocessing
+
+from pymips.coverage import Coverage, fields, count, LOAD
+from pymips.counters import FROM_MEM
+from pymips.fuzz import Generator, Fuzzer, check, minimize, r_format, REGISTERS
+from pymips.predecode import decode, LOAD as LOAD_KIND, BRANCH
+from pymips.processor import Processor
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, SW_R1_3_R0, LW_R6_3_R0
+
+
+def scenarios(bits):
+    return [fields(index) for index in range(bits.bit_length()) if bits >> index & 1]
+
+
+class TestFuzz(unittest.TestCase):
+
+    def test_generator(self):
+        generator = Generator(random.Random(3), length=24)
+        load_use = branch_pairs = 0
+        for i in range(50):
+            program = [decode(word) for word in generator.program()]
+            self.assertEqual(len(program), 24)
+            for d, after in zip(program, program[1:] + [None]):
+                self.assertTrue(d.dest in REGISTERS or d.dest == 0)
+                if d.kind == BRANCH:
+                    self.assertTrue(0 <= d.immediate <= 3)
+                    branch_pairs += after is not None and after.kind == BRANCH
+                elif d.kind == LOAD_KIND:
+                    self.assertEqual(d.rs, 0)
+                    load_use += after is not None and d.rt in (after.rs, after.rt)
+        self.assertTrue(load_use > 50)
+        self.assertTrue(branch_pairs > 20)
+
+        program = generator.program()
+        self.assertNotEqual(generator.mutate(program), program)
+
+    def test_coverage(self):
+        processor = Processor(rom_size=8, coverage=Coverage())
+        processor.load([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        processor.run()
+        self.assertTrue(any(s['forward_a'] == FROM_MEM for s in scenarios(processor.coverage.bits)))
+
+        processor.load([LW_R6_3_R0, r_format(0b100000, 1, 6, 6)])
+        processor.run()
+        self.assertTrue(any(s['ex'] == LOAD and s['stall'] for s in
+                            scenarios(processor.coverage.bits)))
+
+    def test_minimize(self):
+        fails = lambda program: 3 in program and 7 in program
+        self.assertEqual(minimize(range(10), fails), [3, 7])
+        self.assertEqual(minimize([7, 3], fails), [7, 3])
+
+    def test_fuzz(self):
+        bits, message = check([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        self.assertTrue(bits)
+        self.assertEqual(message, None)
+
+        #the data of a store isn't forwarded
+        self.assertEqual(check([ADD_R1_R2_R3, SW_R1_3_R0])[1], 'mem[4] = 2 (expected 7)')
+
+        self.assertEqual(Fuzzer().jobs, multiprocessing.cpu_count())
+        fuzzer = Fuzzer(jobs=1, seed=1, batch=4)
+        failures = fuzzer.run(8, max_failures=1)
+        self.assertTrue(count(fuzzer.bits) > 20)
+        self.assertTrue(fuzzer.corpus)
+        self.assertEqual(len(failures), 1)
+        failure = failures[0]
+        self.assertTrue(len(failure.minimized) < len(failure.program))
+        self.assertEqual(check(failure.minimized)[1], failure.message)
+        self.assertTrue('# expect: ' in failure.text())
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Encoded instructions, programs and a runner shared by the tests
+"""
+
+from pymips.processor import Processor
+
+ADD_R0_R1_R2 = 0b00000000001000100000000000100000  # add $r0, $r1, $r2
+ADD_R1_R2_R3 = 0b00000000010000110000100000100000  # add $r1, $r2, $r3
+ADD_R2_R1_R3 = 0b00000000001000110001000000100000  # add $r2, $r1, $r3
+ADD_R2_R3_R4 = 0b00000000011001000001000000100000  # add $r2, $r3, $r4
+SUB_R5_R1_R4 = 0b00000000001001000010100000100010  # sub $r5, $r1, $r4
+LW_R0_5_R1 = 0b10001100001000000000000000000101    # lw $r0, 5($r1)
+LW_R1_5_R1 = 0b10001100001000010000000000000101    # lw $r1, 5($r1)
+LW_R3_M2_R0 = 0b10001100000000111111111111111110   # lw $r3, -2($r0)
+LW_R6_3_R0 = 0b10001100000001100000000000000011    # lw $r6, 3($r0)
+SW_R1_3_R0 = 0b10101100000000010000000000000011    # sw $r1, 3($r0)
+SW_R2_3_R0 = 0b10101100000000100000000000000011    # sw $r2, 3($r0)
+SW_R2_5_R1 = 0b10101100001000100000000000000101    # sw $r2, 5($r1)
+SW_R2_M2_R0 = 0b10101100000000101111111111111110   # sw $r2, -2($r0)
+BEQ_R4_R4_1 = 0b00010000100001000000000000000001   # beq r4, r4, 1
+BEQ_R4_R4_M1 = 0b00010000100001001111111111111111  # beq r4, r4, -1
+BEQ_R4_R4_M2 = 0b00010000100001001111111111111110  # beq r4, r4, -2
+
+#r9 counts down to 0 (r10) in a loop of 4 instructions
+LOOP = [0b00000001010010100101000000100010,     # sub $r10, $r10, $r10
+        0b00000001001000000100100000100010,     # sub $r9, $r9, $r0
+        0b00000000110000000011000000100000,     # add $r6, $r6, $r0
+        0b00010001001010100000000000000001,     # beq r9, r10, 1
+        0b00010000000000001111111111111100,     # beq r0, r0, -4
+        0b00000000111000000011100000100000]     # add $r7, $r7, $r0
+
+#forwarding, a store and a load of the same word, and a load-use stall
+HAZARDS = [ADD_R1_R2_R3, SW_R2_3_R0, LW_R6_3_R0, LW_R1_5_R1, ADD_R2_R1_R3, SUB_R5_R1_R4]
+
+
+def run(program, max_cycles=None, **monitors):
+    """Run a program on a processor with the given monitors, return the cycles"""
+    processor = Processor(rom_size=8, **monitors)
+    processor.load(program)
+    return processor.run(max_cycles)
@@ -0,0 +1,63 @@
+import unittest
+
+from pymips.isa import ISA, wrap32
+from pymips.halt import SELF_BRANCH, END
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, SW_R2_5_R1, \
+                               LW_R0_5_R1, BEQ_R4_R4_M1
+
+
+class TestISA(unittest.TestCase):
+
+    def test_arithmetic(self):
+        isa = ISA([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        self.assertEqual(isa.run(), 2)
+        self.assertEqual(isa.registers[1], 7)
+        self.assertEqual(isa.registers[5], 2)
+
+    def test_load(self):
+        isa = ISA([LW_R1_5_R1, ADD_R2_R1_R3])
+        isa.run()
+        self.assertEqual(isa.registers[1], 51)
+        self.assertEqual(isa.registers[2], 55)
+
+    def test_load_store(self):
+        isa = ISA([SW_R2_5_R1, LW_R0_5_R1])
+        isa.run()
+        self.assertEqual(isa.memory[7], 3)
+        self.assertEqual(isa.registers[0], 3)
+
+    def test_branch(self):
+        isa = ISA([BEQ_R4_R4_M1, ADD_R1_R2_R3])
+        self.assertEqual(isa.run(max_steps=10), 1)
+        self.assertEqual(isa.halted, SELF_BRANCH)
+        self.assertEqual(isa.pc, 0)
+        self.assertEqual(isa.registers[1], 2)
+
+    def test_max_steps(self):
+        isa = ISA([ADD_R1_R2_R3] * 10)
+        self.assertEqual(isa.run(max_steps=4), 4)
+        self.assertEqual(isa.halted, None)
+        isa.run()
+        self.assertEqual((isa.steps, isa.halted), (10, END))
+
+    def test_nop(self):
+        isa = ISA([0, 0, 0])
+        isa.run()
+        self.assertEqual(isa.pc, 3)
+        self.assertEqual(isa.registers[0], 1)
+
+    def test_wrap(self):
+        self.assertEqual(wrap32(2**31), -(2**31))
+        self.assertEqual(wrap32(-(2**31) - 1), 2**31 - 1)
+
+    def test_illegal(self):
+        isa = ISA([ADD_R1_R2_R3, 0xffffffff])
+        self.assertRaises(ValueError, isa.run)
+        self.assertEqual(isa.pc, 1)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import unittest
+import random
+
+from myhdl import Signal, intbv, Simulation, delay, instance
+
+from pymips.latch_id_ex import latch_id_ex, latch_id_ex_bundled
+from pymips.latch_ex_mem import latch_ex_mem, latch_ex_mem_bundled
+from pymips.latch_mem_wb import latch_mem_wb, latch_mem_wb_bundled
+
+MIN, MAX = -(2**31), 2**31 - 1
+
+#the fields of every latch, as dlx connects them: (bits, signed)
+FIELDS = ((latch_id_ex, latch_id_ex_bundled,
+           [(32, False), (32, True), (32, True), (32, True), (5, False), (5, False), (5, False),
+            (6, False), (1, False), (2, False)] + [(1, False)] * 6),
+          (latch_ex_mem, latch_ex_mem_bundled,
+           [(32, True), (32, True), (1, False), (32, True), (32, False)] + [(1, False)] * 5),
+          (latch_mem_wb, latch_mem_wb_bundled,
+           [(32, True), (32, True), (32, False), (1, False), (1, False)]))
+
+
+def signals(fields):
+    return [Signal(intbv(0, min=MIN, max=MAX)) if signed else Signal(intbv(0)[bits:])
+            for bits, signed in fields]
+
+
+class TestLatchBundle(unittest.TestCase):
+
+    def test_latches(self):
+        for latch, bundled, fields in FIELDS:
+            inputs, outputs, expected = signals(fields), signals(fields), signals(fields)
+            clk, rst = [Signal(intbv(0)[1:]) for i in range(2)]
+            checked = []
+
+            @instance
+            def stimulus():
+                for i in range(20):
+                    for sig in inputs:
+                        sig.next = random.randint(sig.min or 0, sig.max - 1)
+                    rst.next = i % 5 == 4
+                    yield delay(1)
+                    clk.next = 1
+                    yield delay(1)
+                    self.assertEqual([int(sig) for sig in outputs], [int(sig) for sig in expected])
+                    checked.append(rst == 0 and int(outputs[0]) == int(inputs[0]))
+                    clk.next = rst.next = 0
+
+            Simulation(latch(clk, rst, *(inputs + expected)),
+                       bundled(clk, rst, *(inputs + outputs)), stimulus).run(quiet=1)
+            self.assertEqual(len(checked), 20)
+            self.assertEqual(checked.count(True), 16)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from pymips.memory import PagedMemory, DenseMemory
+from pymips.isa import ISA
+from tests.instructions import SW_R2_M2_R0, LW_R3_M2_R0
+
+
+class TestPagedMemory(unittest.TestCase):
+
+    def test_untouched(self):
+        mem = PagedMemory()
+        self.assertEqual(mem[0], 0)
+        self.assertEqual(mem[2**32 - 1], 0)
+        mem[123456789] = 0
+        self.assertEqual(mem.pages, {})
+
+    def test_lazy_pages(self):
+        mem = PagedMemory({7: 51})
+        mem[2**31] = -5
+        mem[2**31 + 1] = 6
+        self.assertEqual(len(mem.pages), 2)
+        self.assertEqual(mem.allocated(), 2 * 1024 * 4)
+        self.assertEqual(mem.items(), [(7, 51), (2**31, -5), (2**31 + 1, 6)])
+
+    def test_wrap(self):
+        mem = PagedMemory([1, 2, 3])
+        mem[-1] = 9
+        self.assertEqual(mem[2**32 - 1], 9)
+        self.assertEqual(mem[2**32 + 2], 3)
+
+    def test_isa(self):
+        mem = PagedMemory()
+        isa = ISA([SW_R2_M2_R0, LW_R3_M2_R0], memory=mem)
+        isa.run()
+        self.assertEqual(mem[2**32 - 1], 3)
+        self.assertEqual(isa.registers[3], 3)
+
+
+class TestDenseMemory(unittest.TestCase):
+
+    def test_access(self):
+        mem = DenseMemory(16, {7: 51})
+        mem[3] = -2
+        self.assertEqual(len(mem), 16)
+        self.assertEqual(mem[7], 51)
+        self.assertEqual(mem.items(), [(3, -2), (7, 51)])
+        self.assertRaises(IndexError, mem.__getitem__, 16)
+        self.assertRaises(IndexError, mem.update, range(17))
+        self.assertRaises(IndexError, mem.update, {16: 1})
+        self.assertEqual(len(mem), 16)
+        self.assertEqual(len(mem.view()), 16 * 4)
+
+    def test_compare(self):
+        mem = DenseMemory(5000, [1, 2, 3])
+        golden = DenseMemory(5000, [1, 2, 3])
+        self.assertEqual(mem.compare(golden), [])
+        self.assertEqual(mem.checksum(), golden.checksum())
+        golden[4500] = 9
+        self.assertEqual(mem.compare(golden), [(4500, 0, 9)])
+        self.assertEqual(mem.compare(list(golden)), [(4500, 0, 9)])
+        self.assertNotEqual(mem.checksum(), golden.checksum())
+        self.assertRaises(ValueError, mem.compare, [0])
+
+    def test_dump(self):
+        mem = DenseMemory(64, {7: 51, 63: -1})
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            mem.dump(path)
+            self.assertEqual(os.path.getsize(path), 64 * 4)
+            loaded = DenseMemory.load(path, size=128)
+        finally:
+            os.remove(path)
+        self.assertEqual(len(loaded), 128)
+        self.assertEqual(loaded.items(), [(7, 51), (63, -1)])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import unittest
+
+from myhdl import Signal, intbv, Simulation, delay, instance
+
+from pymips.or_gate import or_gate
+
+
+class TestOrGate(unittest.TestCase):
+
+    def test_truth_table(self):
+        op1, op2, out = [Signal(intbv(0)[1:]) for i in range(3)]
+        table = []
+
+        @instance
+        def stimulus():
+            for a in range(2):
+                for b in range(2):
+                    op1.next, op2.next = a, b
+                    yield delay(1)
+                    table.append((a, b, int(out)))
+
+        Simulation(or_gate(op1, op2, out), stimulus).run(quiet=1)
+        self.assertEqual(table, [(0, 0, 0), (0, 1, 1), (1, 0, 1), (1, 1, 1)])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
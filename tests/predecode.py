@@ -0,0 +1,69 @@
+import unittest
+
+from pymips.predecode import predecode, decode, alu_control_lines, \
+                             control_lines, ALU_CONTROL, NO_CONTROL, \
+                             ALU_ADD, ALU_SUB, ALU_AND, ALU_OR, \
+                             ALU_OP, LOAD, STORE, BRANCH, NOP
+from pymips.processor import Processor
+from pymips.program import load_image, DEFAULT_PROGRAM
+from tests.instructions import ADD_R1_R2_R3, LW_R1_5_R1, SW_R2_5_R1, BEQ_R4_R4_M1
+
+
+class TestPredecode(unittest.TestCase):
+
+    def test_fields(self):
+        add, lw, beq = predecode([ADD_R1_R2_R3, LW_R1_5_R1, BEQ_R4_R4_M1])
+
+        self.assertEqual((add.opcode, add.rs, add.rt, add.rd, add.shamt, add.funct),
+                         (0, 2, 3, 1, 0, 0b100000))
+        self.assertEqual((add.kind, add.dest, add.alu_control), (ALU_OP, 1, ALU_ADD))
+        self.assertEqual(lw.immediate, 5)
+        self.assertEqual((lw.kind, lw.dest), (LOAD, 1))
+        self.assertEqual(beq.immediate, -1)
+        self.assertEqual((beq.kind, beq.alu_control), (BRANCH, ALU_SUB))
+
+    def test_control(self):
+        self.assertEqual(decode(ADD_R1_R2_R3).control, (1, 0b10, 0, 0, 0, 0, 1, 0))
+        self.assertEqual(decode(LW_R1_5_R1).control, (0, 0b00, 1, 0, 1, 0, 1, 1))
+        self.assertFalse(decode(LW_R1_5_R1).holds)
+
+        sw = decode(SW_R2_5_R1)
+        self.assertEqual(sw.kind, STORE)
+        self.assertTrue(sw.holds)
+        self.assertEqual(control_lines(sw.opcode, previous=decode(LW_R1_5_R1).control),
+                         (0, 0b00, 1, 0, 0, 1, 0, 1))
+
+    def test_nop(self):
+        nop = decode(0)
+        self.assertEqual(nop.kind, NOP)
+        self.assertTrue(nop.nop)
+        self.assertEqual(nop.control, NO_CONTROL)
+
+    def test_shared(self):
+        first, second = predecode([ADD_R1_R2_R3, ADD_R1_R2_R3])
+        self.assertTrue(first is second)
+
+    def test_alu_control(self):
+        self.assertEqual(alu_control_lines(0b00, 0), ALU_ADD)
+        self.assertEqual(alu_control_lines(0b01, 0), ALU_SUB)
+        self.assertEqual(alu_control_lines(0b10, 0b100100), ALU_AND)
+        self.assertEqual(alu_control_lines(0b10, 0b100101), ALU_OR)
+        self.assertEqual(alu_control_lines(0b10, 0b101010), ALU_SUB)
+        self.assertEqual(ALU_CONTROL[0b10][0b100101], ALU_OR)
+
+    def test_netlist(self):
+        program = load_image(DEFAULT_PROGRAM)
+        results = []
+        for predecoded in (False, True):
+            processor = Processor(rom_size=len(program), early_branch=True, predecoded=predecoded)
+            processor.load(program)
+            results.append((processor.run(), processor.registers.snapshot(),
+                            processor.memory.snapshot()))
+        self.assertEqual(results[0], results[1])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import unittest
+
+from pymips.processor import Processor
+from pymips.predictor import Predictor, NOT_TAKEN, BTFN, TWO_BIT, GSHARE, SCHEMES
+from pymips.counters import Counters
+from tests.instructions import LOOP
+
+
+class TestPredictor(unittest.TestCase):
+
+    def test_two_bit(self):
+        predictor = Predictor(TWO_BIT, entries=4, btb_entries=4)
+        self.assertEqual(predictor.predict(5), None)
+        predictor.update(5, 1, 2, 0)
+        self.assertEqual(predictor.predict(5), 2)
+        #same BTB entry, other address
+        self.assertEqual(predictor.predict(1), None)
+        predictor.update(5, 0, 2, 1)
+        self.assertEqual(predictor.predict(5), None)
+        self.assertEqual((predictor.branches, predictor.taken, predictor.mispredicts), (2, 1, 2))
+        self.assertEqual(predictor.accuracy, 0.0)
+
+        predictor.clear()
+        self.assertEqual(predictor.accuracy, None)
+        self.assertEqual(predictor.predict(5), None)
+
+    def test_btfn_and_gshare(self):
+        predictor = Predictor(BTFN)
+        predictor.update(3, 1, 7, 0)
+        predictor.update(8, 1, 1, 0)
+        self.assertEqual(predictor.predict(3), None)
+        self.assertEqual(predictor.predict(8), 1)
+
+        predictor = Predictor(GSHARE, history=2)
+        predictor.update(3, 1, 1, 0)
+        self.assertEqual(predictor.history, 1)
+        predictor.update(3, 1, 1, 0)
+        predictor.update(3, 0, 1, 0)
+        self.assertEqual(predictor.history, 2)
+
+        self.assertRaises(ValueError, Predictor, 'perceptron')
+        self.assertRaises(ValueError, Predictor, TWO_BIT, 12)
+
+    def test_loop(self):
+        results = {}
+        for scheme in SCHEMES:
+            counters = Counters()
+            predictor = Predictor(scheme)
+            processor = Processor(rom_size=8, counters=counters, predictor=predictor)
+            processor.load(LOOP)
+            cycles = processor.run()
+            results[scheme] = cycles
+            self.assertEqual(processor.registers.snapshot()[5:11], [6, 17, 9, 9, 0, 0])
+            self.assertEqual(predictor.taken, 10)
+            self.assertEqual(counters.flushes, predictor.mispredicts)
+
+        processor = Processor(rom_size=8, early_branch=True)
+        processor.load(LOOP)
+        self.assertEqual(processor.run(), results[NOT_TAKEN])
+        self.assertTrue(results[TWO_BIT] < results[NOT_TAKEN])
+        self.assertTrue(results[BTFN] < results[NOT_TAKEN])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import unittest
+
+from pymips.processor import Processor, rearm
+from pymips.memory import PagedMemory
+from pymips.halt import SELF_BRANCH, END, LIMIT
+from pymips.counters import Counters
+from pymips.isa import ISA
+from pymips.dlx_model import DLXModel
+from tests.instructions import ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, SW_R2_5_R1, \
+                               ADD_R0_R1_R2, BEQ_R4_R4_M1, BEQ_R4_R4_1, ADD_R2_R3_R4
+
+
+class TestProcessor(unittest.TestCase):
+
+    def test_reload(self):
+        processor = Processor(rom_size=16)
+        processor.load([ADD_R1_R2_R3, SUB_R5_R1_R4, SW_R2_5_R1])
+        self.assertEqual(processor.run(), 5)
+        self.assertEqual(processor.halted, END)
+        self.assertEqual(processor.registers[5], 2)
+        self.assertEqual(processor.memory[12], 3)
+
+        processor.load([LW_R1_5_R1, ADD_R2_R1_R3])
+        self.assertEqual(processor.run(), 6)
+        self.assertEqual(processor.registers.snapshot()[:6], [1, 51, 55, 4, 5, 6])
+        self.assertEqual(processor.memory.items(), [(7, 51)])
+
+        processor.load([ADD_R0_R1_R2, BEQ_R4_R4_M1, ADD_R1_R2_R3])
+        self.assertEqual(processor.run(), 4)
+        self.assertEqual(processor.halted, SELF_BRANCH)
+        self.assertEqual(processor.registers[0], 5)
+        self.assertEqual(processor.registers[1], 2)
+
+    def test_initial_state(self):
+        processor = Processor(rom_size=4, memory=PagedMemory())
+        processor.load([LW_R1_5_R1], registers=[0] * 32, memory={5: -9, 2**20: 1})
+        processor.run()
+        self.assertEqual(processor.registers[1], -9)
+        self.assertEqual(processor.memory.items(), [(5, -9), (2**20, 1)])
+        self.assertRaises(ValueError, processor.load, [0] * 5)
+
+    def test_limit(self):
+        processor = Processor(rom_size=4)
+        processor.load([ADD_R0_R1_R2, BEQ_R4_R4_M1])
+        processor.registers[4] = 0
+        self.assertEqual(processor.run(max_cycles=3), 3)
+        self.assertEqual(processor.halted, LIMIT)
+
+    def test_early_branch(self):
+        counters = Counters()
+        processor = Processor(rom_size=8, counters=counters, early_branch=True)
+        processor.load([ADD_R1_R2_R3, BEQ_R4_R4_1, SUB_R5_R1_R4, ADD_R2_R3_R4])
+        self.assertEqual(processor.run(max_cycles=30), 7)
+        self.assertEqual(processor.halted, END)
+        self.assertEqual(processor.registers.snapshot()[:6], [1, 7, 9, 4, 5, 6])
+        self.assertEqual(counters.flushes, 1)
+        self.assertEqual(counters.retired, 3)
+
+    def test_fast_arithmetic(self):
+        program = [ADD_R1_R2_R3, SW_R2_5_R1, LW_R1_5_R1, ADD_R2_R1_R3, SUB_R5_R1_R4, BEQ_R4_R4_1,
+                   ADD_R0_R1_R2, ADD_R2_R3_R4]
+        results = []
+        for fast_arithmetic in (False, True):
+            processor = Processor(rom_size=8, counters=Counters(), early_branch=True,
+                                  fast_arithmetic=fast_arithmetic)
+            processor.load(program)
+            results.append((processor.run(), processor.registers.snapshot(),
+                            processor.memory.snapshot(), processor.counters.retired))
+        self.assertEqual(results[0], results[1])
+
+        #wraps around instead of overflowing
+        processor.load([ADD_R1_R2_R3, SUB_R5_R1_R4])
+        processor.registers[2] = 2**31 - 1
+        processor.run()
+        self.assertEqual(processor.registers[1], -2**31 + 3)
+        self.assertEqual(processor.registers[5], 2**31 - 2)
+
+    def test_write_back_read(self):
+        #the sub is decoded while the add that writes r1 is written back
+        program = [ADD_R1_R2_R3, ADD_R2_R3_R4, ADD_R2_R3_R4, SUB_R5_R1_R4]
+        isa = ISA(program)
+        isa.run()
+        model = DLXModel(program)
+        model.run()
+        self.assertEqual(model.registers[:6], isa.registers[:6])
+        for early_branch in (False, True):
+            processor = Processor(rom_size=8, early_branch=early_branch)
+            processor.load(program)
+            processor.run()
+            self.assertEqual(processor.registers.snapshot(), isa.registers)
+        self.assertEqual(isa.registers[5], 2)
+
+    def test_rearm(self):
+        #instances of another MyHDL are refused instead of misbehaving
+        self.assertRaises(RuntimeError, rearm, [object()])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
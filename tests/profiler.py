@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from myhdl import Simulation
+
+from pymips import dlx, instruction_memory
+from pymips.halt import Halt
+from pymips.profiler import Profiler, FLUSH_PENALTY
+from tests.instructions import run, ADD_R1_R2_R3, SUB_R5_R1_R4, LW_R1_5_R1, ADD_R2_R1_R3, \
+                               BEQ_R4_R4_M2
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def test_load_use_stall(self):
+        run([LW_R1_5_R1, ADD_R2_R1_R3], profiler=self.profiler)
+        self.assertEqual(list(self.profiler.rows()), [(0, 1, 5, 1, 0, 0), (1, 1, 6, 0, 0, 0)])
+
+    def test_loop(self):
+        run([ADD_R1_R2_R3, SUB_R5_R1_R4, BEQ_R4_R4_M2], max_cycles=30, profiler=self.profiler)
+        profiler = self.profiler
+        taken = profiler.taken[2]
+        self.assertTrue(taken > 1)
+        self.assertEqual(profiler.flush_penalty[2], taken * FLUSH_PENALTY)
+        self.assertEqual(profiler.loops, {2: 1})
+        self.assertEqual(profiler.hot_loops()[0][:3], (1, 2, taken))
+        self.assertEqual(profiler.executions[1], profiler.executions[2])
+
+        path = os.path.join(tempfile.mkdtemp(), 'profile.csv')
+        try:
+            profiler.write(path)
+            lines = open(path).read().splitlines()
+        finally:
+            shutil.rmtree(os.path.dirname(path))
+        self.assertEqual(lines[0], 'pc,executions,cycles,stalls,taken,flush_penalty')
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(profiler.report(1).splitlines()[1].split()[0], '2')
+
+    def test_test_bench(self):
+        profiler = Profiler(8)
+        rom, instruction_memory.ROM = instruction_memory.ROM, [LW_R1_5_R1, ADD_R2_R1_R3] + [0] * 6
+        try:
+            Simulation(dlx.testBench(halt=Halt(8, 100), profiler=profiler)).run(quiet=1)
+        finally:
+            instruction_memory.ROM = rom
+        self.assertEqual(list(profiler.rows())[:2], [(0, 1, 5, 1, 0, 0), (1, 1, 6, 0, 0, 0)])
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pymips.program import load_image, write_image, read_hex, WordImage, \
+                           DEFAULT_PROGRAM
+from tests.instructions import ADD_R0_R1_R2, BEQ_R4_R4_M1
+
+
+class TestProgram(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_text(self):
+        words = load_image(DEFAULT_PROGRAM)
+        self.assertEqual(words[:2], (ADD_R0_R1_R2, BEQ_R4_R4_M1))
+        self.assertEqual(len(load_image(DEFAULT_PROGRAM, size=32)), 32)
+
+    def test_hex(self):
+        with open(self.path('prog.hex'), 'w') as f:
+            f.write('# a comment\n0x00220020\n\n1084ffff  # beq\n')
+        self.assertEqual(read_hex(self.path('prog.hex')), [ADD_R0_R1_R2, BEQ_R4_R4_M1])
+        self.assertEqual(load_image(self.path('prog.hex'), size=4),
+                         (ADD_R0_R1_R2, BEQ_R4_R4_M1, 0, 0))
+
+    def test_binary(self):
+        words = [ADD_R0_R1_R2, BEQ_R4_R4_M1] * 1000
+        write_image(self.path('prog.bin'), words)
+        self.assertEqual(os.path.getsize(self.path('prog.bin')), 4 * len(words))
+
+        image = load_image(self.path('prog.bin'))
+        self.assertTrue(isinstance(image, WordImage))
+        self.assertEqual(len(image), len(words))
+        self.assertEqual(list(image), words)
+        self.assertEqual(image[-1], BEQ_R4_R4_M1)
+        self.assertEqual(image[1:3], (BEQ_R4_R4_M1, ADD_R0_R1_R2))
+        self.assertRaises(IndexError, image.__getitem__, len(words))
+        image.close()
+
+    def test_binary_padding(self):
+        write_image(self.path('prog.bin'), [ADD_R0_R1_R2])
+        image = load_image(self.path('prog.bin'), size=8)
+        self.assertEqual(len(image), 8)
+        self.assertEqual(image[0], ADD_R0_R1_R2)
+        self.assertEqual(image[7], 0)
+        image.close()
+
+    def test_bad_binary(self):
+        with open(self.path('prog.bin'), 'wb') as f:
+            f.write('\x00' * 5)
+        self.assertRaises(ValueError, load_image, self.path('prog.bin'))
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import sys
+import unittest
+from StringIO import StringIO
+
+from myhdl import Signal, intbv, delay, instance, Simulation
+
+from pymips.register_file import register_file, register_file_model
+from pymips.memory import DenseMemory
+from pymips.halt import Halt
+from pymips import dlx
+
+
+def bench(component, writes, **kwargs):
+    """
+    Write ``writes`` ``[(register, value)]`` and read them back.
+    Return the values read.
+    """
+    clk = Signal(intbv(1)[1:])
+    read_reg1, read_reg2, write_reg = [Signal(intbv(0)[5:]) for i in range(3)]
+    data_in, out_data1, out_data2 = [Signal(intbv(0, min=-(2**31), max=2**31-1)) for i in range(3)]
+    write_control = Signal(intbv(0)[1:])
+    read = []
+
+    @instance
+    def stimulus():
+        for register, value in writes:
+            write_reg.next, data_in.next, write_control.next = register, value, 1
+            clk.next = 0
+            yield delay(5)
+            write_control.next = 0
+            clk.next = 1
+            yield delay(5)
+        for register, value in writes:
+            read_reg1.next = register
+            clk.next = 0
+            yield delay(5)
+            read.append(int(out_data1))
+            clk.next = 1
+            yield delay(5)
+
+    rf = component(clk, read_reg1, read_reg2, write_reg, data_in, write_control,
+                   out_data1, out_data2, **kwargs)
+    Simulation(rf, stimulus).run(quiet=1)
+    return read
+
+
+def read_while_written(component, register, value, **kwargs):
+    """
+    Read ``register`` on the edge it is written with ``value``. Return
+    the value read.
+    """
+    clk = Signal(intbv(1)[1:])
+    read_reg1, read_reg2, write_reg = [Signal(intbv(register)[5:]) for i in range(3)]
+    data_in, out_data1, out_data2 = [Signal(intbv(v, min=-(2**31), max=2**31-1)) for v in (value, 0, 0)]
+    write_control = Signal(intbv(1)[1:])
+    read = []
+
+    @instance
+    def stimulus():
+        yield delay(5)
+        clk.next = 0
+        yield delay(5)
+        read.append(int(out_data1))
+
+    rf = component(clk, read_reg1, read_reg2, write_reg, data_in, write_control,
+                   out_data1, out_data2, **kwargs)
+    Simulation(rf, stimulus).run(quiet=1)
+    return read[0]
+
+
+class TestRegisterFile(unittest.TestCase):
+
+    writes = [(3, -7), (31, 2**31 - 2), (0, 5)]
+
+    def test_model(self):
+        registers = DenseMemory(32, range(1, 33))
+        self.assertEqual(bench(register_file_model, self.writes, registers=registers),
+                         [-7, 2**31 - 2, 5])
+        self.assertEqual(registers.snapshot()[:5], [5, 2, 3, -7, 5])
+
+    def test_trace(self):
+        seen = {register_file: [], register_file_model: []}
+        for component, values in seen.items():
+            trace = lambda time, registers: values.append(int(registers[3]))
+            bench(component, self.writes, trace=trace)
+        #traced before the write of each negative edge
+        self.assertEqual(seen[register_file][:3], [4, -7, -7])
+        self.assertEqual(seen[register_file], seen[register_file_model])
+
+    def test_read_while_written(self):
+        #the writer in WB and the reader in ID share an edge
+        self.assertEqual(read_while_written(register_file, 3, -7), -7)
+        self.assertEqual(read_while_written(register_file_model, 3, -7,
+                                            registers=DenseMemory(32, range(1, 33))), -7)
+
+    def test_quiet(self):
+        #dlx's test bench uses register_file_model and prints nothing per cycle
+        registers = DenseMemory(32, range(1, 33))
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            Simulation(dlx.testBench(halt=Halt(8, 100), registers=registers)).run(quiet=1)
+            printed = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(printed, '')
+        self.assertEqual(registers.snapshot(), range(1, 33))
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pymips.regression import read_expectations, discover, check, run, junit
+from pymips.program import DEFAULT_PROGRAM
+
+ARITHMETIC = """\
+000000 00010 00011 00001 00000 100000   # r1 = r2 + r3     | add $r1, $r2, $r3     | r1 = 7
+#000000 00001 00100 00101 00000 100010  # r5 = r1 - r4     | sub $r5, $r1, $r4     | r5 = 2
+000000 00001 00100 00101 00000 100010   # r5 = r1 - r4     | sub $r5, $r1, $r4     | r5 = 3
+# expect: mem[7] = 51, r2 = 3
+"""
+
+LOOP = """\
+000000 00010 00011 00001 00000 100000   # r1 = r2 + r3     | add $r1, $r2, $r3
+000100 00100 00100  1111111111111110    # go2 $-2          | beq r4, r4, -2
+"""
+
+
+class TestRegression(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_read_expectations(self):
+        self.assertEqual(read_expectations(DEFAULT_PROGRAM), {'r0': 5})
+        path = self.write('arithmetic.txt', ARITHMETIC)
+        self.assertEqual(read_expectations(path), {'r1': 7, 'r5': 3, 'mem[7]': 51, 'r2': 3})
+        self.assertEqual(discover([self.dir, DEFAULT_PROGRAM]), [path, DEFAULT_PROGRAM])
+
+    def test_check(self):
+        result = check(self.write('arithmetic.txt', ARITHMETIC), 'isa')
+        self.assertEqual(result['status'], 'fail')
+        self.assertEqual(result['mismatches'], [['r5', 3, 2]])
+
+        loop = self.write('loop.txt', LOOP)
+        self.assertEqual(check(loop, 'model', max_cycles=100)['status'], 'fail')
+        self.assertEqual(check(loop, 'model', timeout=0.1, max_cycles=None)['status'], 'timeout')
+        self.assertEqual(check(os.path.join(self.dir, 'missing.txt'))['status'], 'error')
+
+    def test_run(self):
+        results = run([DEFAULT_PROGRAM, self.write('arithmetic.txt', ARITHMETIC)], jobs=2)
+        self.assertEqual([r['status'] for r in results], ['pass', 'fail'])
+        self.assertEqual(results[0]['cycles'], 4)
+        self.assertTrue('failures="1"' in junit(results))
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pymips.sweep import parse_grid, configurations, evaluate, sweep, read_rows, write_rows, NONE
+from pymips.program import DEFAULT_PROGRAM
+
+#r5 doesn't exist in a register file of 5
+ADD_R5 = """\
+000000 00010 00011 00101 00000 100000   # r5 = r2 + r3     | add $r5, $r2, $r3
+"""
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'sweep.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_grid(self):
+        grid = parse_grid(['depth=16,32', 'dcache=none,8/2/1', 'write-back=0,1',
+                           'predictor=none,2-bit', 'early_branch=0,1'])
+        configs = list(configurations(grid))
+        #write policies only with a data cache, early_branch always with a predictor
+        self.assertEqual(len(configs), 2 * (1 + 2) * (2 + 1))
+        self.assertEqual(configs[0]['write_back'], None)
+        self.assertEqual(set(c['early_branch'] for c in configs if c['predictor'] != NONE), set([1]))
+
+        self.assertRaises(ValueError, parse_grid, ['ways=2'])
+        self.assertRaises(ValueError, parse_grid, ['icache=64/4'])
+        self.assertRaises(ValueError, parse_grid, ['depth=many'])
+
+    def test_evaluate(self):
+        path = os.path.join(self.dir, 'r5.txt')
+        with open(path, 'w') as f:
+            f.write(ADD_R5)
+        small, large = configurations(parse_grid(['depth=5,32', 'icache=16/2/1']))
+        rows = evaluate(small, [DEFAULT_PROGRAM, path])
+        self.assertEqual(rows[0]['error'], None)
+        self.assertEqual(rows[0]['cycles'], 4 + rows[0]['fetch_stalls'])
+        self.assertTrue(0 < rows[0]['icache_hit_rate'] < 1)
+        self.assertTrue(rows[1]['error'].startswith('IndexError'))
+        self.assertEqual(evaluate(large, [path])[0]['error'], None)
+
+    def test_resume(self):
+        grid = parse_grid(['depth=16,32', 'predictor=none,gshare'])
+        self.assertEqual(sweep(grid, [DEFAULT_PROGRAM], self.path, jobs=2), 4)
+        rows = read_rows(self.path)
+        self.assertEqual([(row['depth'], row['predictor']) for row in rows],
+                         [('16', 'none'), ('16', 'gshare'), ('32', 'none'), ('32', 'gshare')])
+        self.assertEqual(rows[0]['cycles'], '4')
+
+        #interrupted after two configurations
+        write_rows(self.path, rows[:2])
+        self.assertEqual(sweep(grid, [DEFAULT_PROGRAM], self.path, jobs=2), 2)
+        self.assertEqual(read_rows(self.path), rows)
+        self.assertEqual(sweep(grid, [DEFAULT_PROGRAM], self.path), 0)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import unittest
+
+from myhdl import Signal, intbv, delay, always, instance, Simulation
+
+from pymips.trace import Trace
+
+
+def bench(trace, cycles=10):
+    """
+    Trace a counter (``count``) and its double (``double``) for ``cycles``.
+    """
+    clk = Signal(intbv(0)[1:])
+    count = Signal(intbv(0)[32:])
+    double = Signal(intbv(0, min=-(2**31), max=2**31))
+
+    @instance
+    def clock():
+        for i in range(2 * cycles):
+            yield delay(1)
+            clk.next = not clk
+
+    @always(clk.posedge)
+    def counter():
+        count.next = count + 1
+        double.next = -2 * (count + 1)
+
+    tracer = trace.attach(clk, {'count': count, 'double': double})
+    Simulation(clock, counter, tracer).run(quiet=1)
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_all(self):
+        trace = Trace()
+        bench(trace)
+        self.assertEqual(len(trace), 10)
+        self.assertEqual(trace.column('count'), range(10))
+        self.assertEqual(list(trace.rows(start=8)), [(8, (8, -16)), (9, (9, -18))])
+        self.assertEqual(trace.format(['double'], stop=2), 'cycle 0: double 0\ncycle 1: double -2')
+
+    def test_selection(self):
+        trace = Trace(['double'], start=3, stop=6)
+        bench(trace)
+        self.assertEqual(list(trace.rows()), [(3, (-6,)), (4, (-8,)), (5, (-10,))])
+        self.assertRaises(KeyError, trace.column, 'count')
+        self.assertRaises(ValueError, bench, Trace(['missing']))
+
+    def test_ring(self):
+        trace = Trace(depth=4)
+        bench(trace)
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace.count, 10)
+        self.assertEqual([cycle for (cycle, values) in trace.rows()], [6, 7, 8, 9])
+        self.assertEqual(trace.column('count'), [6, 7, 8, 9])
+
+    def test_unbounded(self):
+        trace = Trace(depth=None)
+        bench(trace, 5000)
+        self.assertEqual(trace.column('count')[-1], 4999)
+
+
+def main():
+    unittest.main()
+
+if __name__ == '__main__':
+    main()